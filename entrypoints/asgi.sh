@@ -0,0 +1,5 @@
+#!/bin/bash
+
+cd stock_market
+
+uvicorn stock_market.asgi:application --host $WEB_CONTAINER_HOST --port $ASGI_PORT
@@ -2,4 +2,5 @@
 
 python stock_market/manage.py makemigrations
 python stock_market/manage.py migrate
+python stock_market/manage.py create_trade_partitions
 python stock_market/manage.py runserver $WEB_CONTAINER_HOST:$WEB_PORT
@@ -1,4 +1,6 @@
 from brokers.models import (
+    Candle,
+    FailedMail,
     Investment,
     InvestmentPortfolio,
     LimitOrder,
@@ -9,5 +11,14 @@ from brokers.models import (
 from django.contrib import admin
 
 admin.site.register(
-    [Investment, MarketOrder, LimitOrder, InvestmentPortfolio, Trade, Recommendation]
+    [
+        Investment,
+        MarketOrder,
+        LimitOrder,
+        InvestmentPortfolio,
+        Trade,
+        Recommendation,
+        Candle,
+        FailedMail,
+    ]
 )
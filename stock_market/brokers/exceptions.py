@@ -0,0 +1,2 @@
+class TradeError(Exception):
+    """Trade can't be executed"""
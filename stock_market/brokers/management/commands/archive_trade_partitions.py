@@ -0,0 +1,29 @@
+from brokers.partitions import TradePartitionService
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from stock_market.settings import TRADE_ARCHIVE_AFTER_MONTHS, TRADE_ARCHIVE_SCHEMA
+
+
+class Command(BaseCommand):
+    help = "Detach old monthly trade partitions into the archive schema"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--months",
+            type=int,
+            default=TRADE_ARCHIVE_AFTER_MONTHS,
+            help="Keep partitions of this many recent months attached",
+        )
+
+    def handle(self, *args, **options):
+        service = TradePartitionService()
+        if not service.is_supported:
+            raise CommandError("Trade partitioning requires PostgreSQL")
+
+        current_month = timezone.now().date().replace(day=1)
+        names = service.archive(service.add_months(current_month, -options["months"]))
+
+        self.stdout.write(
+            f"Archived to {TRADE_ARCHIVE_SCHEMA}: {', '.join(names) or 'none'}"
+        )
@@ -0,0 +1,108 @@
+import random
+import statistics
+import time
+from decimal import Decimal
+
+from brokers.models import (
+    Investment,
+    InvestmentPortfolio,
+    InvestmentTypes,
+    LimitOrder,
+    OrderActivatedStatuses,
+    OrderStatuses,
+)
+from brokers.utils import LimitOrderService
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from users.models import User
+
+
+class Command(BaseCommand):
+    help = "Seed limit orders and measure the matching query plan and latency"
+
+    batch_size = 10_000
+
+    def add_arguments(self, parser):
+        parser.add_argument("--orders", type=int, default=1_000_000)
+        parser.add_argument("--investments", type=int, default=100)
+        parser.add_argument("--samples", type=int, default=20)
+        parser.add_argument(
+            "--keep", action="store_true", help="Keep seeded rows in the db"
+        )
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            investments = self.__seed(options["orders"], options["investments"])
+            samples = min(options["samples"], len(investments))
+            self.__benchmark(random.sample(investments, samples))
+
+            transaction.set_rollback(not options["keep"])
+
+    def __seed(self, orders_count: int, investments_count: int) -> list[Investment]:
+        suffix = time.time_ns()
+        owner = User.objects.create_user(
+            email=f"benchmark{suffix}@example.com",
+            username=f"benchmark{suffix}",
+            password=str(suffix),
+        )
+        investments = Investment.objects.bulk_create(
+            Investment(
+                name=f"benchmark-{suffix}-{i}",
+                price=Decimal(random.randint(1, 1000)),
+                quantity=random.randint(1, 1000),
+                type=InvestmentTypes.CRYPTOCURRENCY,
+            )
+            for i in range(investments_count)
+        )
+        portfolios = InvestmentPortfolio.objects.bulk_create(
+            InvestmentPortfolio(
+                owner=owner, investment=investment, quantity=0, spend_amount=0
+            )
+            for investment in investments
+        )
+
+        statuses = [OrderStatuses.ACTIVE] + [OrderStatuses.COMPLETED] * 4
+        for start in range(0, orders_count, self.batch_size):
+            size = min(self.batch_size, orders_count - start)
+            LimitOrder.objects.bulk_create(
+                LimitOrder(
+                    portfolio=portfolio,
+                    investment_id=portfolio.investment_id,
+                    quantity=random.randint(1, 100),
+                    status=random.choice(statuses),
+                    price=Decimal(random.randint(1, 1000)),
+                    activated_status=random.choice(OrderActivatedStatuses.values),
+                )
+                for portfolio in random.choices(portfolios, k=size)
+            )
+
+        if connection.vendor == "postgresql":
+            with connection.cursor() as cursor:
+                cursor.execute("ANALYZE limit_order")
+
+        self.stdout.write(f"Seeded {orders_count} orders")
+        return investments
+
+    def __benchmark(self, investments: list[Investment]):
+        service = LimitOrderService()
+        explain_options = {"analyze": True} if connection.vendor == "postgresql" else {}
+
+        self.stdout.write(
+            service.get_executable(investments[0]).explain(**explain_options)
+        )
+
+        timings = []
+        for investment in investments:
+            started_at = time.perf_counter()
+            list(service.get_executable(investment))
+            timings.append((time.perf_counter() - started_at) * 1000)
+
+        started_at = time.perf_counter()
+        list(service.get_group_by_investment())
+        group_timing = (time.perf_counter() - started_at) * 1000
+
+        self.stdout.write(
+            "matching: avg %.2f ms, median %.2f ms, max %.2f ms"
+            % (statistics.mean(timings), statistics.median(timings), max(timings))
+        )
+        self.stdout.write("group by investment: %.2f ms" % group_timing)
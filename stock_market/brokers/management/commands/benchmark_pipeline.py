@@ -0,0 +1,264 @@
+import json
+import random
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from decimal import Decimal
+from unittest import mock
+
+import factory.random
+from brokers.factories import (
+    InvestmentFactory,
+    InvestmentPortfolioFactory,
+    LimitOrderFactory,
+    RecommendationFactory,
+)
+from brokers.models import (
+    Investment,
+    InvestmentPortfolio,
+    LimitOrder,
+    OrderActivatedStatuses,
+    OrderStatuses,
+    Recommendation,
+)
+from brokers.order_book import limit_order_book
+from brokers.tasks import LimitOrderTrade, Sender
+from brokers.utils import InvestmentUpdateService, TradeMaker
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from users.factories import UserFactory
+from users.models import User
+
+from stock_market.settings import LIMIT_ORDER_BOOK_ENABLED
+
+
+class Command(BaseCommand):
+    help = (
+        "Seed investments, portfolios and active limit orders and measure "
+        "the ticker to trade pipeline, the report is printed as JSON"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--sizes",
+            type=lambda value: [int(size) for size in value.split(",")],
+            default=[10, 100, 1000],
+            help="Comma separated numbers of investments",
+        )
+        parser.add_argument("--portfolios-per-investment", type=int, default=10)
+        parser.add_argument("--orders-per-investment", type=int, default=10)
+        parser.add_argument("--samples", type=int, default=20)
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument("--output", help="Write the report to the file")
+
+    def handle(self, *args, **options):
+        random.seed(options["seed"])
+        factory.random.reseed_random(options["seed"])
+
+        report = {
+            "database": connection.vendor,
+            "started_at": datetime.now(timezone.utc).isoformat(),
+            "options": {
+                key: options[key]
+                for key in (
+                    "sizes",
+                    "portfolios_per_investment",
+                    "orders_per_investment",
+                    "samples",
+                    "seed",
+                )
+            },
+            "results": [],
+        }
+
+        with self.__isolate():
+            for size in options["sizes"]:
+                report["results"].append(
+                    self.__run(
+                        size,
+                        size * options["portfolios_per_investment"],
+                        size * options["orders_per_investment"],
+                        options["samples"],
+                    )
+                )
+
+        output = json.dumps(report, indent=2)
+        if options["output"]:
+            with open(options["output"], "w") as file:
+                file.write(output)
+
+        self.stdout.write(output)
+
+    @contextmanager
+    def __isolate(self):
+        """Run matching in this process and don't send emails"""
+        with (
+            mock.patch.object(Sender.send_mass_mail, "delay"),
+            mock.patch("brokers.tasks.LIMIT_ORDER_MATCHING_PARALLEL", False),
+        ):
+            yield
+
+    def __run(
+        self, investments_count: int, portfolios_count: int, orders_count: int, samples
+    ) -> dict:
+        with transaction.atomic():
+            investments, portfolios = self.__seed(
+                investments_count, portfolios_count, orders_count
+            )
+
+            result = {
+                "investments": investments_count,
+                "portfolios": portfolios_count,
+                "orders": orders_count,
+                "operations": {
+                    "update": self.__benchmark_update(investments, samples),
+                    "make_orders": self.__benchmark_make_orders(orders_count, samples),
+                    "make": self.__benchmark_make(portfolios, samples),
+                },
+            }
+
+            transaction.set_rollback(True)
+
+        return result
+
+    def __seed(
+        self, investments_count: int, portfolios_count: int, orders_count: int
+    ) -> tuple[list[Investment], list[InvestmentPortfolio]]:
+        suffix = time.time_ns()
+
+        investments = Investment.objects.bulk_create(
+            InvestmentFactory.build(
+                name=f"benchmark-{suffix}-{i}",
+                image=None,
+                price=Decimal(random.randint(1, 1000)),
+                quantity=1_000_000,
+            )
+            for i in range(investments_count)
+        )
+        Recommendation.objects.bulk_create(
+            RecommendationFactory.build(investment=investment, percentage=0)
+            for investment in investments
+        )
+        owners = User.objects.bulk_create(
+            UserFactory.build(
+                email=f"benchmark-{suffix}-{i}@example.com",
+                # usernames are limited to 30 characters
+                username=f"bench-{suffix:x}-{i}",
+                image=None,
+                # fits the numeric(10, 2) column of the initial migration
+                balance=Decimal(10_000_000),
+            )
+            for i in range(portfolios_count)
+        )
+        portfolios = InvestmentPortfolio.objects.bulk_create(
+            InvestmentPortfolioFactory.build(
+                owner=owner,
+                investment=investments[i % investments_count],
+                quantity=0,
+                spend_amount=0,
+            )
+            for i, owner in enumerate(owners)
+        )
+        LimitOrder.objects.bulk_create(
+            LimitOrderFactory.build(
+                portfolio=portfolio,
+                investment=portfolio.investment,
+                quantity=random.randint(1, 10),
+                status=OrderStatuses.ACTIVE,
+                price=max(
+                    portfolio.investment.price + Decimal(random.randint(-10, 10)),
+                    Decimal(1),
+                ),
+                activated_status=random.choice(OrderActivatedStatuses.values),
+            )
+            for portfolio in random.choices(portfolios, k=orders_count)
+        )
+
+        if connection.vendor == "postgresql":
+            with connection.cursor() as cursor:
+                cursor.execute("ANALYZE investment, investment_portfolio, limit_order")
+
+        return investments, portfolios
+
+    def __benchmark_update(self, investments: list[Investment], samples: int) -> dict:
+        service = InvestmentUpdateService()
+        tickers = [
+            {
+                "symbol": investment.name,
+                "best_bid_price": str(investment.price),
+                "price_change_percent": 0,
+            }
+            for investment in investments
+        ]
+        service.update(tickers)
+
+        def update():
+            for ticker in tickers:
+                ticker["best_bid_price"] = str(random.randint(1, 1000))
+            service.update(tickers)
+
+            return len(tickers)
+
+        return self.__measure(update, samples)
+
+    def __benchmark_make_orders(self, orders_count: int, samples: int) -> dict:
+        def prepare():
+            if LIMIT_ORDER_BOOK_ENABLED:
+                limit_order_book.load()
+
+        def make_orders():
+            LimitOrderTrade.make_orders()
+            return orders_count
+
+        return self.__measure(make_orders, samples, prepare=prepare, rollback=True)
+
+    def __benchmark_make(self, portfolios: list[InvestmentPortfolio], samples: int):
+        maker = TradeMaker()
+
+        def make():
+            portfolio = random.choice(portfolios)
+            maker.make(1, portfolio, portfolio.investment)
+            return 1
+
+        return self.__measure(make, samples)
+
+    @staticmethod
+    def __measure(function, samples: int, prepare=None, rollback=False) -> dict:
+        """
+        Call the function, which returns the number of processed items,
+        and return latency percentiles, query counts and throughput.
+        Rolled back samples start from the same seeded rows.
+        """
+        timings, queries, items = [], [], 0
+
+        for _ in range(samples):
+            savepoint = transaction.savepoint() if rollback else None
+            if prepare is not None:
+                prepare()
+
+            with CaptureQueriesContext(connection) as context:
+                started_at = time.perf_counter()
+                items += function()
+                timings.append(time.perf_counter() - started_at)
+
+            queries.append(len(context.captured_queries))
+            if savepoint is not None:
+                transaction.savepoint_rollback(savepoint)
+
+        timings.sort()
+        total = sum(timings)
+
+        return {
+            "samples": samples,
+            "queries": {"mean": sum(queries) / samples, "max": max(queries)},
+            "p50_ms": round(Command.__percentile(timings, 50) * 1000, 3),
+            "p99_ms": round(Command.__percentile(timings, 99) * 1000, 3),
+            "throughput": round(items / total, 2) if total else None,
+        }
+
+    @staticmethod
+    def __percentile(timings: list[float], percent: int) -> float:
+        """Nearest rank percentile of sorted timings"""
+        rank = max(1, -(-len(timings) * percent // 100))
+        return timings[rank - 1]
@@ -0,0 +1,66 @@
+import json
+import time
+from email.message import EmailMessage
+
+from django.core.management.base import BaseCommand
+from utils.smtp import AsyncSMTPDelivery
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure mail throughput per concurrency against a local SMTP sink, "
+        "e.g. python -m aiosmtpd -n -l localhost:8025"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--host", default="localhost")
+        parser.add_argument("--port", type=int, default=8025)
+        parser.add_argument("--ssl", action="store_true")
+        parser.add_argument("--messages", type=int, default=200)
+        parser.add_argument(
+            "--concurrency",
+            type=lambda value: [int(item) for item in value.split(",")],
+            default=[1, 2, 4, 8],
+            help="Comma separated numbers of connections",
+        )
+
+    def handle(self, *args, **options):
+        messages = [
+            self.__get_message(f"benchmark{i}@example.com")
+            for i in range(options["messages"])
+        ]
+
+        results = []
+        for concurrency in options["concurrency"]:
+            delivery = AsyncSMTPDelivery(
+                options["host"],
+                options["port"],
+                use_ssl=options["ssl"],
+                concurrency=concurrency,
+            )
+
+            started_at = time.perf_counter()
+            failures = delivery.send(messages)
+            seconds = time.perf_counter() - started_at
+
+            results.append(
+                {
+                    "concurrency": concurrency,
+                    "messages": len(messages),
+                    "failures": len(failures),
+                    "seconds": round(seconds, 3),
+                    "throughput": round(len(messages) / seconds, 2),
+                }
+            )
+
+        self.stdout.write(json.dumps(results, indent=2))
+
+    @staticmethod
+    def __get_message(recipient: str) -> EmailMessage:
+        message = EmailMessage()
+        message["Subject"] = "Benchmark"
+        message["From"] = "benchmark@example.com"
+        message["To"] = recipient
+        message.set_content("Benchmark message")
+
+        return message
@@ -0,0 +1,20 @@
+from brokers.partitions import TradePartitionService
+from django.core.management.base import BaseCommand, CommandError
+
+from stock_market.settings import TRADE_PARTITIONS_AHEAD
+
+
+class Command(BaseCommand):
+    help = "Create monthly trade partitions for the upcoming months"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--months", type=int, default=TRADE_PARTITIONS_AHEAD)
+
+    def handle(self, *args, **options):
+        service = TradePartitionService()
+        if not service.is_supported:
+            raise CommandError("Trade partitioning requires PostgreSQL")
+
+        names = service.create_ahead(options["months"])
+
+        self.stdout.write(f"Created partitions: {', '.join(names) or 'none'}")
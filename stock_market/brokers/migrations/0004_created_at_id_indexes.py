@@ -0,0 +1,42 @@
+# Generated by Django 5.0 on 2026-10-18 14:29
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("brokers", "0003_rename_counter_recommendation_percentage"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="investment",
+            index=models.Index(
+                fields=["created_at", "id"], name="investment_created_4a2ffd_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="investmentportfolio",
+            index=models.Index(
+                fields=["created_at", "id"], name="investment__created_c59731_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="limitorder",
+            index=models.Index(
+                fields=["created_at", "id"], name="limit_order_created_ca2d66_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="marketorder",
+            index=models.Index(
+                fields=["created_at", "id"], name="market_orde_created_23ba72_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="trade",
+            index=models.Index(
+                fields=["created_at", "id"], name="trade_created_cc48eb_idx"
+            ),
+        ),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 5.0 on 2026-10-18 14:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("brokers", "0004_created_at_id_indexes"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="limitorder",
+            index=models.Index(
+                condition=models.Q(("status", "active")),
+                fields=["investment", "activated_status", "price"],
+                name="limit_order_active_match_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="limitorder",
+            index=models.Index(
+                fields=["updated_at"], name="limit_order_updated_at_idx"
+            ),
+        ),
+    ]
@@ -0,0 +1,77 @@
+# Generated by Django 5.0 on 2026-10-18 15:02
+
+import re
+
+from django.db import migrations
+
+PARTITIONS_AHEAD = 3
+
+
+def add_months(month, months):
+    index = month.year * 12 + month.month - 1 + months
+    return month.replace(year=index // 12, month=index % 12 + 1, day=1)
+
+
+def partition_trade(apps, schema_editor):
+    """Convert trade into a table partitioned by month of created_at"""
+    if schema_editor.connection.vendor != "postgresql":
+        return
+
+    execute = schema_editor.execute
+    with schema_editor.connection.cursor() as cursor:
+        execute("ALTER TABLE trade RENAME TO trade_legacy")
+
+        cursor.execute(
+            "SELECT indexname, indexdef FROM pg_indexes "
+            "WHERE tablename = 'trade_legacy' AND indexname <> 'trade_pkey'"
+        )
+        indexes = cursor.fetchall()
+        cursor.execute(
+            "SELECT conname, pg_get_constraintdef(oid) FROM pg_constraint "
+            "WHERE conrelid = 'trade_legacy'::regclass AND contype = 'f'"
+        )
+        foreign_keys = cursor.fetchall()
+        cursor.execute(
+            "SELECT date_trunc('month', COALESCE(MIN(created_at), now()))::date, "
+            "date_trunc('month', now())::date FROM trade_legacy"
+        )
+        first_month, current_month = cursor.fetchone()
+
+    execute(
+        "CREATE TABLE trade "
+        "(LIKE trade_legacy INCLUDING DEFAULTS INCLUDING CONSTRAINTS) "
+        "PARTITION BY RANGE (created_at)"
+    )
+    execute("CREATE TABLE trade_default PARTITION OF trade DEFAULT")
+
+    month, last_month = first_month, add_months(current_month, PARTITIONS_AHEAD)
+    while month <= last_month:
+        execute(
+            f"CREATE TABLE trade_p{month:%Y%m} PARTITION OF trade "
+            "FOR VALUES FROM (%s) TO (%s)",
+            [f"{month}T00:00:00+00:00", f"{add_months(month, 1)}T00:00:00+00:00"],
+        )
+        month = add_months(month, 1)
+
+    execute("INSERT INTO trade SELECT * FROM trade_legacy")
+    execute("DROP TABLE trade_legacy")
+
+    execute("CREATE SEQUENCE trade_id_seq OWNED BY trade.id")
+    execute("SELECT setval('trade_id_seq', COALESCE(MAX(id), 0) + 1, false) FROM trade")
+    execute("ALTER TABLE trade ALTER COLUMN id SET DEFAULT nextval('trade_id_seq')")
+    execute("ALTER TABLE trade ADD CONSTRAINT trade_pkey PRIMARY KEY (id, created_at)")
+
+    for _, definition in indexes:
+        execute(re.sub(r" ON (\S+\.)?trade_legacy ", " ON trade ", definition))
+    for name, definition in foreign_keys:
+        execute(f"ALTER TABLE trade ADD CONSTRAINT {name} {definition}")
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("brokers", "0005_limit_order_matching_indexes"),
+    ]
+
+    operations = [
+        migrations.RunPython(partition_trade, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,81 @@
+# Generated by Django 5.0 on 2026-10-18 14:41
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("brokers", "0006_partition_trade"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="Candle",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "interval",
+                    models.CharField(
+                        choices=[("1m", "1m"), ("1h", "1h"), ("1d", "1d")], max_length=2
+                    ),
+                ),
+                ("started_at", models.DateTimeField()),
+                (
+                    "open",
+                    models.DecimalField(
+                        decimal_places=settings.DECIMAL_PLACES,
+                        max_digits=settings.DECIMAL_MAX_DIGITS,
+                    ),
+                ),
+                (
+                    "high",
+                    models.DecimalField(
+                        decimal_places=settings.DECIMAL_PLACES,
+                        max_digits=settings.DECIMAL_MAX_DIGITS,
+                    ),
+                ),
+                (
+                    "low",
+                    models.DecimalField(
+                        decimal_places=settings.DECIMAL_PLACES,
+                        max_digits=settings.DECIMAL_MAX_DIGITS,
+                    ),
+                ),
+                (
+                    "close",
+                    models.DecimalField(
+                        decimal_places=settings.DECIMAL_PLACES,
+                        max_digits=settings.DECIMAL_MAX_DIGITS,
+                    ),
+                ),
+                ("ticks", models.PositiveIntegerField(default=0)),
+                (
+                    "investment",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        to="brokers.investment",
+                    ),
+                ),
+            ],
+            options={
+                "db_table": "candle",
+                "ordering": ["started_at"],
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("investment", "interval", "started_at"),
+                        name="candle_investment_interval_started_at_unique",
+                    )
+                ],
+            },
+        ),
+    ]
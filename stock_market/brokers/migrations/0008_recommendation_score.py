@@ -0,0 +1,17 @@
+# Generated by Django 5.0 on 2026-10-18 14:44
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("brokers", "0007_candle"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="recommendation",
+            name="score",
+            field=models.FloatField(blank=True, null=True),
+        ),
+    ]
@@ -1,3 +1,4 @@
+from datetime import timedelta
 from decimal import Decimal
 
 from django.conf import settings
@@ -25,6 +26,19 @@ class OrderStatuses(models.TextChoices):
     COMPLETED = ("completed", "completed")
 
 
+class CandleIntervals(models.TextChoices):
+    MINUTE = ("1m", "1m")
+    HOUR = ("1h", "1h")
+    DAY = ("1d", "1d")
+
+
+CANDLE_INTERVAL_LENGTHS = {
+    CandleIntervals.MINUTE: timedelta(minutes=1),
+    CandleIntervals.HOUR: timedelta(hours=1),
+    CandleIntervals.DAY: timedelta(days=1),
+}
+
+
 class Investment(models.Model):
     name = models.CharField(max_length=128, unique=True, db_index=True, null=False)
     image = models.ImageField(null=True, upload_to="logos/", blank=True)
@@ -41,6 +55,7 @@ class Investment(models.Model):
 
     class Meta:
         db_table = "investment"
+        indexes = [models.Index(fields=["created_at", "id"])]
         constraints = [
             models.CheckConstraint(
                 check=models.Q(price__gte=Decimal("0")),
@@ -70,6 +85,7 @@ class MarketOrder(Order):
     class Meta:
         db_table = "market_order"
         ordering = ["created_at"]
+        indexes = [models.Index(fields=["created_at", "id"])]
         constraints = [
             models.CheckConstraint(
                 check=models.Q(quantity__gte=1),
@@ -92,6 +108,15 @@ class LimitOrder(Order):
     class Meta:
         db_table = "limit_order"
         ordering = ["created_at"]
+        indexes = [
+            models.Index(fields=["created_at", "id"]),
+            models.Index(
+                fields=["investment", "activated_status", "price"],
+                condition=models.Q(status=OrderStatuses.ACTIVE),
+                name="limit_order_active_match_idx",
+            ),
+            models.Index(fields=["updated_at"], name="limit_order_updated_at_idx"),
+        ]
         constraints = [
             models.CheckConstraint(
                 check=models.Q(price__gte=Decimal("0")),
@@ -122,6 +147,7 @@ class InvestmentPortfolio(models.Model):
     class Meta:
         db_table = "investment_portfolio"
         ordering = ["-quantity"]
+        indexes = [models.Index(fields=["created_at", "id"])]
         unique_together = ("owner", "investment")
         constraints = [
             models.CheckConstraint(
@@ -146,6 +172,7 @@ class Trade(models.Model):
     class Meta:
         db_table = "trade"
         ordering = ["-created_at"]
+        indexes = [models.Index(fields=["created_at", "id"])]
         constraints = [
             models.CheckConstraint(
                 check=models.Q(price__gte=Decimal("0")), name="trade_price_non_negative"
@@ -159,6 +186,7 @@ class Trade(models.Model):
 
 class Recommendation(models.Model):
     percentage = models.IntegerField(default=0)
+    score = models.FloatField(null=True, blank=True)
     investment = models.OneToOneField(
         "Investment", on_delete=models.CASCADE, db_index=True
     )
@@ -167,3 +195,52 @@ class Recommendation(models.Model):
 
     class Meta:
         db_table = "recommendation"
+
+
+class Candle(models.Model):
+    """OHLC of investment price over an interval, ticks is the number of updates"""
+
+    investment = models.ForeignKey("Investment", on_delete=models.CASCADE)
+    interval = models.CharField(choices=CandleIntervals.choices, max_length=2)
+    started_at = models.DateTimeField()
+    open = models.DecimalField(
+        max_digits=settings.DECIMAL_MAX_DIGITS,
+        decimal_places=settings.DECIMAL_PLACES,
+    )
+    high = models.DecimalField(
+        max_digits=settings.DECIMAL_MAX_DIGITS,
+        decimal_places=settings.DECIMAL_PLACES,
+    )
+    low = models.DecimalField(
+        max_digits=settings.DECIMAL_MAX_DIGITS,
+        decimal_places=settings.DECIMAL_PLACES,
+    )
+    close = models.DecimalField(
+        max_digits=settings.DECIMAL_MAX_DIGITS,
+        decimal_places=settings.DECIMAL_PLACES,
+    )
+    ticks = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        db_table = "candle"
+        ordering = ["started_at"]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["investment", "interval", "started_at"],
+                name="candle_investment_interval_started_at_unique",
+            ),
+        ]
+
+
+class FailedMail(models.Model):
+    """Mail which could not be delivered after all retries"""
+
+    recipient = models.CharField(max_length=255)
+    subject = models.CharField(max_length=255)
+    body = models.TextField()
+    error = models.TextField()
+    attempts = models.PositiveIntegerField(default=1)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        db_table = "failed_mail"
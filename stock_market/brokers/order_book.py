@@ -0,0 +1,186 @@
+from bisect import bisect_left, bisect_right
+from datetime import datetime, timedelta
+from decimal import Decimal
+from typing import Iterable
+
+from brokers.models import LimitOrder, OrderActivatedStatuses, OrderStatuses
+from django.utils import timezone
+
+
+class PriceLadder:
+    """Limit orders of one activated status sorted by price"""
+
+    def __init__(self):
+        self.prices: list[Decimal] = []
+        self.order_ids: list[int] = []
+
+    def __len__(self):
+        return len(self.order_ids)
+
+    def add(self, price: Decimal, order_id: int):
+        index = bisect_right(self.prices, price)
+        self.prices.insert(index, price)
+        self.order_ids.insert(index, order_id)
+
+    def remove(self, price: Decimal, order_id: int):
+        index = bisect_left(self.prices, price)
+        while index < len(self.prices) and self.prices[index] == price:
+            if self.order_ids[index] == order_id:
+                del self.prices[index]
+                del self.order_ids[index]
+                return
+            index += 1
+
+    def below(self, price: Decimal, inclusive: bool) -> list[int]:
+        """Return ids of orders with price lower than the given one"""
+        bisect = bisect_right if inclusive else bisect_left
+        index = bisect(self.prices, price)
+        return self.order_ids[:index]
+
+    def above(self, price: Decimal, inclusive: bool) -> list[int]:
+        """Return ids of orders with price higher than the given one"""
+        bisect = bisect_left if inclusive else bisect_right
+        index = bisect(self.prices, price)
+        return self.order_ids[index:]
+
+
+class OrderBook:
+    """Active limit orders of one investment"""
+
+    def __init__(self):
+        self.ladders = {status: PriceLadder() for status in OrderActivatedStatuses}
+        self.orders: dict[int, tuple[str, Decimal, int]] = {}
+
+    def __len__(self):
+        return len(self.orders)
+
+    def add(self, order_id: int, activated_status: str, price: Decimal, quantity: int):
+        self.remove(order_id)
+
+        self.ladders[activated_status].add(price, order_id)
+        self.orders[order_id] = (activated_status, price, quantity)
+
+    def remove(self, order_id: int):
+        order = self.orders.pop(order_id, None)
+        if order is None:
+            return
+
+        activated_status, price, _ = order
+        self.ladders[activated_status].remove(price, order_id)
+
+    def get_triggered(self, price: Decimal, max_quantity: int) -> list[int]:
+        """Return ids of orders executable at the given investment price"""
+        ladders = self.ladders
+        order_ids = [
+            *ladders[OrderActivatedStatuses.LTE].above(price, inclusive=True),
+            *ladders[OrderActivatedStatuses.EQUAL].above(price, inclusive=True),
+            *ladders[OrderActivatedStatuses.LT].above(price, inclusive=False),
+            *ladders[OrderActivatedStatuses.GTE].below(price, inclusive=True),
+            *ladders[OrderActivatedStatuses.GT].below(price, inclusive=False),
+        ]
+
+        return [
+            order_id
+            for order_id in order_ids
+            if self.orders[order_id][2] <= max_quantity
+        ]
+
+
+class LimitOrderBook:
+    """
+    Price-indexed active limit orders grouped by investment.
+
+    The book lives in the memory of a worker process. It is loaded from the db
+    once and then synchronized with orders changed since the last refresh,
+    so changes made by other processes are picked up on the next tick.
+    Each refresh re-reads an overlap window to catch transactions which
+    were committed after the previous refresh.
+    """
+
+    sync_overlap = timedelta(seconds=60)
+    fields = ("id", "investment_id", "activated_status", "price", "quantity", "status")
+
+    def __init__(self):
+        self.books: dict[int, OrderBook] = {}
+        self.synced_at: datetime | None = None
+
+    @property
+    def is_loaded(self) -> bool:
+        return self.synced_at is not None
+
+    @property
+    def investment_ids(self) -> list[int]:
+        return [investment_id for investment_id, book in self.books.items() if book]
+
+    def load(self):
+        self.books = {}
+        self.synced_at = timezone.now()
+
+        orders = LimitOrder.objects.filter(status=OrderStatuses.ACTIVE).values_list(
+            *self.fields
+        )
+        self.__apply(orders)
+
+    def refresh(self):
+        if not self.is_loaded:
+            return self.load()
+
+        synced_at, self.synced_at = self.synced_at, timezone.now()
+
+        orders = LimitOrder.objects.filter(
+            updated_at__gte=synced_at - self.sync_overlap
+        ).values_list(*self.fields)
+        self.__apply(orders)
+
+    def sync(self, order: LimitOrder):
+        if not self.is_loaded:
+            return
+
+        self.__apply(
+            [
+                (
+                    order.id,
+                    order.investment_id,
+                    order.activated_status,
+                    order.price,
+                    order.quantity,
+                    order.status,
+                )
+            ]
+        )
+
+    def remove(self, investment_id: int, order_ids: Iterable[int]):
+        book = self.books.get(investment_id)
+        if book is None:
+            return
+
+        for order_id in order_ids:
+            book.remove(order_id)
+
+    def get_triggered(
+        self, investment_id: int, price: Decimal, max_quantity: int
+    ) -> list[int]:
+        book = self.books.get(investment_id)
+        if not book:
+            return []
+
+        return book.get_triggered(price, max_quantity)
+
+    def __apply(self, orders: Iterable[tuple]):
+        for (
+            order_id,
+            investment_id,
+            activated_status,
+            price,
+            quantity,
+            status,
+        ) in orders:
+            book = self.books.setdefault(investment_id, OrderBook())
+
+            if status == OrderStatuses.ACTIVE:
+                book.add(order_id, activated_status, Decimal(price), quantity)
+            else:
+                book.remove(order_id)
+
+
+limit_order_book = LimitOrderBook()
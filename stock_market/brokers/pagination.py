@@ -0,0 +1,34 @@
+from rest_framework.pagination import CursorPagination
+
+
+class OptionalCursorPagination(CursorPagination):
+    """
+    Keyset pagination on created_at and id.
+
+    It is enabled only when the request passes the "cursor" or "page_size"
+    query param, otherwise the list is returned unpaginated as before.
+    The direction follows the model Meta ordering when it is on created_at.
+    """
+
+    page_size = 100
+    page_size_query_param = "page_size"
+    max_page_size = 1000
+
+    def paginate_queryset(self, queryset, request, view=None):
+        query_params = request.query_params
+        if (
+            self.cursor_query_param not in query_params
+            and self.page_size_query_param not in query_params
+        ):
+            return None
+
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_ordering(self, request, queryset, view):
+        ordering = queryset.model._meta.ordering
+        if ordering and ordering[0].lstrip("-") == "created_at":
+            field = ordering[0]
+        else:
+            field = "created_at"
+
+        return field, "-id" if field.startswith("-") else "id"
@@ -0,0 +1,117 @@
+import re
+from datetime import date, datetime
+from datetime import timezone as dt_timezone
+
+from django.db import connection, transaction
+from django.utils import timezone
+
+from stock_market.settings import TRADE_ARCHIVE_SCHEMA
+
+
+class TradePartitionService:
+    """
+    Monthly range partitions of the trade table on created_at.
+
+    Partitions are named trade_pYYYYMM. Rows without a partition land in
+    trade_default and are moved out when their month partition is created.
+    Archived partitions are detached and moved to the archive schema.
+    Partitioning is available on PostgreSQL only.
+    """
+
+    table = "trade"
+    default_partition = "trade_default"
+    prefix = "trade_p"
+    name_pattern = re.compile(r"^trade_p\d{6}$")
+
+    @property
+    def is_supported(self) -> bool:
+        return connection.vendor == "postgresql"
+
+    @staticmethod
+    def add_months(month: date, months: int) -> date:
+        index = month.year * 12 + month.month - 1 + months
+        return date(index // 12, index % 12 + 1, 1)
+
+    def get_name(self, month: date) -> str:
+        return f"{self.prefix}{month:%Y%m}"
+
+    def get_month(self, name: str) -> date:
+        return datetime.strptime(name.removeprefix(self.prefix), "%Y%m").date()
+
+    def get_partitions(self) -> list[str]:
+        """Return names of the month partitions, other child tables are skipped"""
+        with connection.cursor() as cursor:
+            cursor.execute(
+                """
+                SELECT child.relname FROM pg_inherits
+                JOIN pg_class parent ON parent.oid = pg_inherits.inhparent
+                JOIN pg_class child ON child.oid = pg_inherits.inhrelid
+                WHERE parent.relname = %s
+                ORDER BY child.relname
+                """,
+                [self.table],
+            )
+            names = [row[0] for row in cursor.fetchall()]
+
+        return [name for name in names if self.name_pattern.match(name)]
+
+    def create(self, month: date) -> bool:
+        """Create the partition of the month, return False if it exists"""
+        month = month.replace(day=1)
+        name = self.get_name(month)
+        if name in self.get_partitions():
+            return False
+
+        bounds = [
+            datetime.combine(value, datetime.min.time(), dt_timezone.utc).isoformat()
+            for value in (month, self.add_months(month, 1))
+        ]
+
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute(
+                f"CREATE TABLE {name} "
+                f"(LIKE {self.table} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)"
+            )
+            cursor.execute(
+                f"""
+                WITH moved AS (
+                    DELETE FROM {self.default_partition}
+                    WHERE created_at >= %s AND created_at < %s
+                    RETURNING *
+                )
+                INSERT INTO {name} SELECT * FROM moved
+                """,
+                bounds,
+            )
+            cursor.execute(
+                f"ALTER TABLE {self.table} ATTACH PARTITION {name} "
+                "FOR VALUES FROM (%s) TO (%s)",
+                bounds,
+            )
+
+        return True
+
+    def create_ahead(self, months: int) -> list[str]:
+        """Create partitions from the current month to the given months ahead"""
+        current_month = timezone.now().date().replace(day=1)
+
+        return [
+            self.get_name(month)
+            for month in (self.add_months(current_month, i) for i in range(months + 1))
+            if self.create(month)
+        ]
+
+    def archive(self, before: date) -> list[str]:
+        """Detach partitions older than the given month into the archive schema"""
+        before = before.replace(day=1)
+        names = [
+            name for name in self.get_partitions() if self.get_month(name) < before
+        ]
+
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute(f"CREATE SCHEMA IF NOT EXISTS {TRADE_ARCHIVE_SCHEMA}")
+            for name in names:
+                cursor.execute(f"ALTER TABLE {self.table} DETACH PARTITION {name}")
+                cursor.execute(f"ALTER TABLE {name} SET SCHEMA {TRADE_ARCHIVE_SCHEMA}")
+
+        return names
@@ -0,0 +1,177 @@
+import logging
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+import numpy as np
+from brokers.models import (
+    CANDLE_INTERVAL_LENGTHS,
+    Candle,
+    CandleIntervals,
+    Recommendation,
+)
+from django.db import OperationalError, connection, transaction
+from django.db.models import Case, FloatField, Value, When
+from django.utils import timezone
+
+from stock_market.settings import (
+    SCORING_SHORT_WINDOW,
+    SCORING_TIME_BUDGET,
+    SCORING_WINDOW,
+)
+
+logger = logging.getLogger(__name__)
+
+
+class RecommendationScorer:
+    """
+    Score recommendations of all investments from their minute candles.
+
+    Close prices are loaded into a matrix with a row per investment and a
+    column per minute, so every indicator is computed for all investments at
+    once. The higher the score the stronger the buy signal: falling below the
+    moving average, negative momentum and a deep drawdown raise it, while
+    volatility lowers it.
+    """
+
+    interval = CandleIntervals.MINUTE
+    volatility_penalty = 100
+    query_canceled_code = "57014"
+
+    def __init__(
+        self,
+        window: int = SCORING_WINDOW,
+        short_window: int = SCORING_SHORT_WINDOW,
+        time_budget: float = SCORING_TIME_BUDGET,
+    ):
+        self.window = window
+        self.short_window = min(short_window, window)
+        self.time_budget = time_budget
+
+    def score(self) -> int:
+        """Return the number of scored investments, 0 if the budget ran out"""
+        started = time.perf_counter()
+
+        try:
+            with self.limit_query_time(self.time_budget):
+                investment_ids, prices = self.get_prices(timezone.now())
+        except OperationalError as error:
+            if getattr(error.__cause__, "pgcode", None) != self.query_canceled_code:
+                raise
+
+            logger.warning(
+                "Skipped scores, loading prices took over %.3fs budget",
+                self.time_budget,
+            )
+            return 0
+
+        if not investment_ids or self.__is_over_budget(started, investment_ids):
+            return 0
+
+        scores = self.compute(prices)
+        if self.__is_over_budget(started, investment_ids):
+            return 0
+
+        self.save(dict(zip(investment_ids, scores.tolist())))
+
+        return len(investment_ids)
+
+    def __is_over_budget(self, started: float, investment_ids: list[int]) -> bool:
+        elapsed = time.perf_counter() - started
+        if elapsed <= self.time_budget:
+            return False
+
+        logger.warning(
+            "Skipped scores of %s investments, took %.3fs of %.3fs budget",
+            len(investment_ids),
+            elapsed,
+            self.time_budget,
+        )
+        return True
+
+    @staticmethod
+    @contextmanager
+    def limit_query_time(seconds: float):
+        """Cancel queries running longer than the given seconds on PostgreSQL"""
+        if connection.vendor != "postgresql":
+            yield
+            return
+
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute(
+                "SET LOCAL statement_timeout = %s", [max(1, int(seconds * 1000))]
+            )
+            yield
+            cursor.execute("SET LOCAL statement_timeout TO DEFAULT")
+
+    def get_prices(self, now: datetime) -> tuple[list[int], np.ndarray]:
+        """
+        Return investment ids and the matrix of their close prices.
+
+        Minutes without a candle repeat the previous close, minutes before the
+        first candle of an investment are NaN.
+        """
+        length = CANDLE_INTERVAL_LENGTHS[self.interval]
+        ended_at = now.replace(second=0, microsecond=0)
+        started_at = ended_at - length * (self.window - 1)
+
+        rows = list(
+            Candle.objects.filter(
+                interval=self.interval, started_at__gte=started_at
+            ).values_list("investment_id", "started_at", "close")
+        )
+        if not rows:
+            return [], np.empty((0, self.window))
+
+        investment_ids = sorted({row[0] for row in rows})
+        positions = {investment_id: i for i, investment_id in enumerate(investment_ids)}
+
+        prices = np.full((len(investment_ids), self.window), np.nan)
+        for investment_id, candle_started_at, close in rows:
+            column = (candle_started_at - started_at) // length
+            if column < self.window:
+                prices[positions[investment_id], column] = float(close)
+
+        return investment_ids, self.forward_fill(prices)
+
+    @staticmethod
+    def forward_fill(prices: np.ndarray) -> np.ndarray:
+        columns = np.where(np.isnan(prices), 0, np.arange(prices.shape[1]))
+        np.maximum.accumulate(columns, axis=1, out=columns)
+
+        return prices[np.arange(prices.shape[0])[:, None], columns]
+
+    def compute(self, prices: np.ndarray) -> np.ndarray:
+        """Return a score per row of the price matrix"""
+        rows = np.arange(prices.shape[0])
+        known = ~np.isnan(prices)
+        first = prices[rows, known.argmax(axis=1)]
+        last = prices[:, -1]
+        recent = prices[:, slice(-self.short_window, None)]
+
+        with np.errstate(invalid="ignore", divide="ignore"):
+            momentum = last / first - 1
+            trend = np.nanmean(recent, axis=1) / np.nanmean(prices, axis=1) - 1
+            drawdown = 1 - last / np.nanmax(prices, axis=1)
+
+            returns = np.diff(np.log(prices), axis=1)
+            counts = (~np.isnan(returns)).sum(axis=1)
+            volatility = np.nanstd(np.where(counts[:, None] > 1, returns, 0), axis=1)
+
+        scores = (drawdown - momentum - trend) * 100
+        scores /= 1 + self.volatility_penalty * volatility
+
+        return np.round(np.nan_to_num(scores), 4)
+
+    @staticmethod
+    def save(scores: dict[int, float]):
+        """Write all scores with a single update"""
+        Recommendation.objects.filter(investment_id__in=scores.keys()).update(
+            score=Case(
+                *(
+                    When(investment_id=investment_id, then=Value(score))
+                    for investment_id, score in scores.items()
+                ),
+                output_field=FloatField(),
+            )
+        )
@@ -1,4 +1,7 @@
 from brokers.models import (
+    CANDLE_INTERVAL_LENGTHS,
+    Candle,
+    CandleIntervals,
     Investment,
     InvestmentPortfolio,
     LimitOrder,
@@ -6,8 +9,12 @@ from brokers.models import (
     Recommendation,
     Trade,
 )
+from django.conf import settings
+from django.utils import timezone
 from rest_framework import serializers
 
+from stock_market.settings import CANDLES_MAX_POINTS
+
 
 class InvestmentCreateSerializer(serializers.ModelSerializer):
     class Meta:
@@ -44,6 +51,45 @@ class InvestmentRetrieveSerializer(serializers.ModelSerializer):
         )
 
 
+class CandleQuerySerializer(serializers.Serializer):
+    interval = serializers.ChoiceField(
+        choices=CandleIntervals.choices, default=CandleIntervals.HOUR
+    )
+    started_from = serializers.DateTimeField(required=False)
+    started_to = serializers.DateTimeField(required=False)
+
+    def validate(self, attrs):
+        interval_length = CANDLE_INTERVAL_LENGTHS[attrs["interval"]]
+        max_range = interval_length * (CANDLES_MAX_POINTS - 1)
+
+        attrs.setdefault("started_to", timezone.now())
+        attrs.setdefault("started_from", attrs["started_to"] - max_range)
+
+        if attrs["started_from"] > attrs["started_to"]:
+            raise serializers.ValidationError(
+                {"started_to": "Must be later than 'started_from'"}
+            )
+        if attrs["started_to"] - attrs["started_from"] > max_range:
+            raise serializers.ValidationError(
+                {"detail": f"Range exceeds {CANDLES_MAX_POINTS} candles"}
+            )
+
+        return attrs
+
+
+class CandleRetrieveSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Candle
+        fields = (
+            "started_at",
+            "open",
+            "high",
+            "low",
+            "close",
+            "ticks",
+        )
+
+
 class InvestmentUpdateSerializer(serializers.ModelSerializer):
     class Meta:
         model = Investment
@@ -217,6 +263,22 @@ class InvestmentPortfolioRetrieveSerializer(serializers.ModelSerializer):
         )
 
 
+class InvestmentPortfolioSummarySerializer(serializers.Serializer):
+    portfolios = serializers.IntegerField()
+    market_value = serializers.DecimalField(
+        max_digits=settings.DECIMAL_MAX_DIGITS,
+        decimal_places=settings.DECIMAL_PLACES,
+    )
+    cost_basis = serializers.DecimalField(
+        max_digits=settings.DECIMAL_MAX_DIGITS,
+        decimal_places=settings.DECIMAL_PLACES,
+    )
+    unrealized_pnl = serializers.DecimalField(
+        max_digits=settings.DECIMAL_MAX_DIGITS,
+        decimal_places=settings.DECIMAL_PLACES,
+    )
+
+
 class InvestmentPortfolioUpdateSerializer(serializers.ModelSerializer):
     class Meta:
         model = InvestmentPortfolio
@@ -271,6 +333,24 @@ class TradeRetrieveSerializer(serializers.ModelSerializer):
         )
 
 
+class TradeExportSerializer(serializers.Serializer):
+    output = serializers.ChoiceField(choices=("ndjson", "csv"), default="ndjson")
+    investment = serializers.IntegerField(required=False)
+    portfolio = serializers.IntegerField(required=False)
+    created_from = serializers.DateTimeField(required=False)
+    created_to = serializers.DateTimeField(required=False)
+
+    def validate(self, attrs):
+        created_from = attrs.get("created_from")
+        created_to = attrs.get("created_to")
+        if created_from and created_to and created_from > created_to:
+            raise serializers.ValidationError(
+                {"created_to": "Must be later than 'created_from'"}
+            )
+
+        return attrs
+
+
 class TradeUpdateSerializer(serializers.ModelSerializer):
     class Meta:
         model = Trade
@@ -292,12 +372,14 @@ class RecommendationCreateSerializer(serializers.ModelSerializer):
         fields = (
             "id",
             "percentage",
+            "score",
             "investment",
             "created_at",
             "updated_at",
         )
 
         read_only_fields = (
+            "score",
             "created_at",
             "updated_at",
         )
@@ -309,6 +391,7 @@ class RecommendationRetrieveSerializer(serializers.ModelSerializer):
         fields = (
             "id",
             "percentage",
+            "score",
             "investment",
             "created_at",
             "updated_at",
@@ -321,12 +404,14 @@ class RecommendationUpdateSerializer(serializers.ModelSerializer):
         fields = (
             "id",
             "percentage",
+            "score",
             "investment",
             "created_at",
             "updated_at",
         )
 
         read_only_fields = (
+            "score",
             "investment",
             "created_at",
             "updated_at",
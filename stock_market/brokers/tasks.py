@@ -1,18 +1,46 @@
-import smtplib
+import json
+import logging
+import time
+from collections import defaultdict
 from email.message import EmailMessage
 
-from brokers.models import Investment, OrderActivatedStatuses, OrderStatuses
+from brokers.models import FailedMail, Investment, OrderStatuses
+from brokers.order_book import limit_order_book
+from brokers.scoring import RecommendationScorer
 from brokers.utils import (
     InvestmentService,
     InvestmentUpdateService,
     LimitOrderService,
     TradeMaker,
 )
-from django.db import IntegrityError
-from django.db.models import Q
+from celery import group
+from celery.signals import (
+    before_task_publish,
+    task_postrun,
+    task_prerun,
+    worker_process_init,
+    worker_process_shutdown,
+)
+from django.core.cache import cache
+from django.template import Context, Engine
+from utils.smtp import (
+    async_smtp_delivery,
+    order_mail_buffer,
+    smtp_pool,
+    welcome_mail_buffer,
+)
+from utils.statsd import statsd
 
 from stock_market import celery_app, settings
-from stock_market.settings import CELERY_QUEUE
+from stock_market.settings import (
+    CELERY_QUEUE,
+    LIMIT_ORDER_BOOK_ENABLED,
+    LIMIT_ORDER_MATCHING_PARALLEL,
+    SCORING_ENABLED,
+    SCORING_TIME_BUDGET,
+)
+
+logger = logging.getLogger(__name__)
 
 
 class MessageBrokerHandler:
@@ -21,8 +49,10 @@ class MessageBrokerHandler:
     @staticmethod
     @celery_app.task(queue=CELERY_QUEUE)
     def handle(tickers: list[dict]):
-        InvestmentUpdateService().update(tickers)
-        LimitOrderTrade().make_orders()
+        investment_ids = InvestmentUpdateService().update(tickers)
+        if investment_ids:
+            LimitOrderTrade().make_orders(list(investment_ids))
+            RecommendationScoring.schedule()
 
 
 class LimitOrderTrade:
@@ -30,77 +60,190 @@ class LimitOrderTrade:
 
     @staticmethod
     @celery_app.task(queue=CELERY_QUEUE)
-    def make_orders() -> None:
+    def make_orders(investment_ids: list[int] = None) -> None:
+        """Match orders of the given investments or of all of them"""
         order_service = LimitOrderService()
 
-        result = order_service.get_group_by_investment()
+        if LIMIT_ORDER_BOOK_ENABLED:
+            limit_order_book.refresh()
+            order_investment_ids = limit_order_book.investment_ids
+        else:
+            filters = (
+                {} if investment_ids is None else {"investment__in": investment_ids}
+            )
+            result = order_service.get_group_by_investment(**filters)
+            order_investment_ids = [item["investment"] for item in result]
+
+        if investment_ids is not None:
+            order_investment_ids = set(order_investment_ids) & set(investment_ids)
 
         investments = InvestmentService().get_by_filters(
-            id__in=[item["investment"] for item in result], quantity__gt=0
+            id__in=order_investment_ids, quantity__gt=0
         )
 
-        trade_maker = TradeMaker()
-        completed_orders = []
+        if LIMIT_ORDER_MATCHING_PARALLEL:
+            group(LimitOrderTrade.__get_shards(investments)).apply_async()
+            return
+
         completed_orders_data = []
         for investment in investments:
-            orders = LimitOrderTrade.__get_orders(investment)
-
-            for i, order in enumerate(orders):
-                try:
-                    trade_maker.make(order.quantity, order.portfolio, investment)
-                except IntegrityError:
-                    continue
-
-                order.status = OrderStatuses.COMPLETED
-                completed_orders.append(order)
-                completed_orders_data.append(
-                    {
-                        "investment": investment.name,
-                        "recipient": order.portfolio.owner.email,
-                    }
+            completed_orders_data.extend(
+                LimitOrderTrade.__make_orders(
+                    investment, LimitOrderTrade.__get_orders(investment)
                 )
+            )
+
+        if completed_orders_data:
+            Sender.send_mass_mail.delay(completed_orders_data)
+
+    @staticmethod
+    @celery_app.task(queue=CELERY_QUEUE)
+    def make_investment_orders(investment_id: int, order_ids: list[int] = None) -> None:
+        """
+        Match orders of one investment, shards run in parallel.
+
+        The book lives in the dispatcher process, so it passes the triggered
+        order ids, without them the executable orders are read from the db.
+        """
+        investment = (
+            InvestmentService().get_by_filters(id=investment_id, quantity__gt=0).first()
+        )
+        if investment is None:
+            return
 
-                if i < len(orders) - 1:
-                    investment.refresh_from_db()
-                    if investment.quantity == 0:
-                        break
+        if order_ids is None:
+            orders = LimitOrderService().get_executable(investment)
+        else:
+            orders = LimitOrderTrade.__get_active_orders(investment, order_ids)
 
-        if completed_orders:
-            order_service.bulk_update(completed_orders, ("status",))
+        completed_orders_data = LimitOrderTrade.__make_orders(investment, orders)
+        if completed_orders_data:
             Sender.send_mass_mail.delay(completed_orders_data)
 
+    @staticmethod
+    def __get_shards(investments) -> list:
+        """Return a shard task per investment with orders triggered in the book"""
+        make_investment_orders = LimitOrderTrade.make_investment_orders
+        if not LIMIT_ORDER_BOOK_ENABLED:
+            return [
+                make_investment_orders.s(investment.id) for investment in investments
+            ]
+
+        shards = []
+        for investment in investments:
+            order_ids = limit_order_book.get_triggered(
+                investment.id, investment.price, investment.quantity
+            )
+            if order_ids:
+                shards.append(make_investment_orders.s(investment.id, order_ids))
+
+        return shards
+
+    @staticmethod
+    def __make_orders(investment: Investment, orders) -> list[dict]:
+        orders = list(orders)
+        completed_orders = TradeMaker().make_batch(investment, orders)
+
+        statsd.incr("orders.scanned", len(orders))
+        statsd.incr("orders.filled", len(completed_orders))
+
+        limit_order_book.remove(investment.id, [order.id for order in completed_orders])
+
+        return [
+            {
+                "investment": investment.name,
+                "quantity": order.quantity,
+                "recipient": order.portfolio.owner.email,
+            }
+            for order in completed_orders
+        ]
+
     @staticmethod
     def __get_orders(investment: Investment):
         """Return executable limit orders"""
-        return LimitOrderService().get_by_filters(
-            Q(
-                investment=investment,
-                status=OrderStatuses.ACTIVE,
-                quantity__lte=investment.quantity,
-            )
-            & (
-                Q(
-                    price__gte=investment.price,
-                    activated_status__in=[
-                        OrderActivatedStatuses.LTE,
-                        OrderActivatedStatuses.EQUAL,
-                    ],
-                )
-                | Q(
-                    price__gt=investment.price,
-                    activated_status=OrderActivatedStatuses.LT,
-                )
-                | Q(
-                    price__lte=investment.price,
-                    activated_status=OrderActivatedStatuses.GTE,
-                )
-                | Q(
-                    price__lt=investment.price,
-                    activated_status=OrderActivatedStatuses.GT,
-                )
+        if not LIMIT_ORDER_BOOK_ENABLED:
+            return LimitOrderService().get_executable(investment)
+
+        order_ids = limit_order_book.get_triggered(
+            investment.id, investment.price, investment.quantity
+        )
+        if not order_ids:
+            return []
+
+        return LimitOrderTrade.__get_active_orders(investment, order_ids)
+
+    @staticmethod
+    def __get_active_orders(investment: Investment, order_ids: list[int]):
+        orders = list(
+            LimitOrderService().get_by_filters(
+                id__in=order_ids, status=OrderStatuses.ACTIVE
             )
         )
 
+        stale_ids = set(order_ids) - {order.id for order in orders}
+        limit_order_book.remove(investment.id, stale_ids)
+
+        return orders
+
+
+class RecommendationScoring:
+    """Score recommendations after ticker batches"""
+
+    lock_key = "recommendation_scoring"
+
+    @staticmethod
+    def schedule():
+        if SCORING_ENABLED:
+            RecommendationScoring.score.delay()
+
+    @staticmethod
+    @celery_app.task(queue=CELERY_QUEUE)
+    def score() -> None:
+        """Skip the run if another worker is scoring, the next batch rescores"""
+        lock_timeout = int(SCORING_TIME_BUDGET) + 60
+        if not cache.add(RecommendationScoring.lock_key, 1, lock_timeout):
+            return
+
+        try:
+            RecommendationScorer().score()
+        finally:
+            cache.delete(RecommendationScoring.lock_key)
+
+
+@worker_process_init.connect
+def load_limit_order_book(**kwargs):
+    if LIMIT_ORDER_BOOK_ENABLED:
+        limit_order_book.load()
+
+
+@before_task_publish.connect
+def add_enqueued_at(headers: dict = None, **kwargs):
+    """Stamp every task, the publisher may run with statsd disabled"""
+    if headers is not None:
+        headers["enqueued_at"] = time.time()
+
+
+@task_prerun.connect
+def record_task_start(task=None, **kwargs):
+    if not statsd.enabled:
+        return
+
+    enqueued_at = getattr(task.request, "enqueued_at", None)
+    if enqueued_at is not None:
+        statsd.timing(f"celery.{task.name}.queue_lag", time.time() - enqueued_at)
+
+    task.request.started_at = time.perf_counter()
+
+
+@task_postrun.connect
+def record_task_runtime(task=None, state: str = None, **kwargs):
+    started_at = getattr(task.request, "started_at", None)
+    if not statsd.enabled or started_at is None:
+        return
+
+    statsd.timing(f"celery.{task.name}.runtime", time.perf_counter() - started_at)
+    statsd.incr(f"celery.{task.name}.{(state or 'unknown').lower()}")
+
 
 class Sender:
     """Send messages on emails"""
@@ -108,51 +251,139 @@ class Sender:
     @staticmethod
     @celery_app.task(queue=CELERY_QUEUE)
     def send_mass_mail(orders: list[dict]):
-        with Email() as email:
-            email.send_executed_orders(orders)
+        """Add executed orders to the digests of the current window"""
+        if settings.ORDER_DIGEST_WINDOW <= 0:
+            Email().send_order_digests(Sender.__group_orders(orders))
+            return
+
+        if order_mail_buffer.add(*(json.dumps(order) for order in orders)):
+            Sender.send_buffered_digests.apply_async(
+                countdown=settings.ORDER_DIGEST_WINDOW
+            )
+
+    @staticmethod
+    @celery_app.task(queue=CELERY_QUEUE)
+    def send_buffered_digests():
+        """Group orders of the window by recipient and queue digests in batches"""
+        orders = [json.loads(order) for order in order_mail_buffer.pop_all()]
+        digests = list(Sender.__group_orders(orders).items())
+
+        batch_size = settings.ORDER_DIGEST_BATCH_SIZE
+        for start in range(0, len(digests), batch_size):
+            end = start + batch_size
+            Sender.send_digests.delay(dict(digests[start:end]))
+
+    @staticmethod
+    @celery_app.task(queue=CELERY_QUEUE, rate_limit=settings.ORDER_DIGEST_RATE_LIMIT)
+    def send_digests(digests: dict[str, dict[str, int]]):
+        Email().send_order_digests(digests)
 
     @staticmethod
     @celery_app.task(queue=CELERY_QUEUE)
     def send_mail(recipient: str):
-        with Email() as email:
-            email.send_welcome_mail(recipient)
+        Email().send_welcome_mails([recipient])
 
+    @staticmethod
+    @celery_app.task(queue=CELERY_QUEUE)
+    def send_buffered_mails():
+        recipients = welcome_mail_buffer.pop_all()
+        if recipients:
+            Email().send_welcome_mails(recipients)
 
-class Email:
-    subject = "Trade Platform"
-    sender = settings.EMAIL_HOST_USER
-    password = settings.EMAIL_HOST_PASSWORD
+    @staticmethod
+    def buffer_mail(recipient: str):
+        """Send the welcome mail with the others of the buffering window"""
+        if settings.WELCOME_MAIL_BUFFER_WINDOW <= 0:
+            Sender.send_mail.delay(recipient)
+        elif welcome_mail_buffer.add(recipient):
+            Sender.send_buffered_mails.apply_async(
+                countdown=settings.WELCOME_MAIL_BUFFER_WINDOW
+            )
+
+    @staticmethod
+    def __group_orders(orders: list[dict]) -> dict[str, dict[str, int]]:
+        """Return bought quantity of every investment per recipient"""
+        digests = defaultdict(lambda: defaultdict(int))
+        for order in orders:
+            digests[order["recipient"]][order["investment"]] += order.get("quantity", 1)
 
-    def __enter__(self):
-        self.server = smtplib.SMTP_SSL(settings.EMAIL_HOST, settings.EMAIL_PORT)
-        self.server.login(self.sender, self.password)
+        return {recipient: dict(digest) for recipient, digest in digests.items()}
 
-        return self
 
-    def __exit__(self, exc_type, exc_val, exc_tb):
-        self.server.quit()
+@worker_process_shutdown.connect
+def close_smtp_connections(**kwargs):
+    smtp_pool.clear()
 
-    def __get_welcome_message(self):
-        return """
+
+class Email:
+    subject = "Trade Platform"
+    sender = settings.EMAIL_HOST_USER
+
+    # compiled once per process, rendered for every recipient
+    engine = Engine()
+    welcome_template = engine.from_string(
+        """
         Hi! You have been successfully registered!
         Thank you for choosing our trade platform
         """
+    )
+    order_digest_template = engine.from_string(
+        "Hey! Your limit orders have been executed, you have bought:\n"
+        "{% for investment, quantity in investments %}"
+        "- {{ investment }}: {{ quantity }}\n"
+        "{% endfor %}"
+    )
 
-    def send_welcome_mail(self, recipient: str):
-        welcome_message = self.__get_welcome_message()
-        message = self.__get_email_message(welcome_message, recipient)
-        self.server.send_message(message)
+    def send_welcome_mails(self, recipients: list[str]):
+        welcome_message = self.welcome_template.render(Context(autoescape=False))
+        messages = [
+            self.__get_email_message(welcome_message, recipient)
+            for recipient in recipients
+        ]
+
+        self.__send(messages)
 
-    def send_executed_orders(self, orders: list[dict]):
-        message_template = "Hey! You have bought %s!"
+    def send_order_digests(self, digests: dict[str, dict[str, int]]):
         messages = [
             self.__get_email_message(
-                message_template % order["investment"], order["recipient"]
+                self.order_digest_template.render(
+                    Context(
+                        {"investments": sorted(investments.items())}, autoescape=False
+                    )
+                ),
+                recipient,
             )
-            for order in orders
+            for recipient, investments in digests.items()
         ]
 
-        [self.server.send_message(message) for message in messages]
+        self.__send(messages)
+
+    def __send(self, messages: list[EmailMessage]):
+        """
+        Send the mails and keep the undelivered ones.
+
+        Batches larger than SMTP_CONCURRENCY go over concurrent connections,
+        smaller ones reuse a pooled connection instead of opening new ones.
+        """
+        if len(messages) > settings.SMTP_CONCURRENCY > 1:
+            failures = async_smtp_delivery.send(messages)
+        else:
+            failures = smtp_pool.send(messages)
+
+        if not failures:
+            return
+
+        logger.warning("Failed to deliver %s of %s mails", len(failures), len(messages))
+        FailedMail.objects.bulk_create(
+            FailedMail(
+                recipient=failure.message["To"],
+                subject=failure.message["Subject"],
+                body=failure.message.get_content(),
+                error=failure.error,
+                attempts=failure.attempts,
+            )
+            for failure in failures
+        )
 
     def __get_email_message(self, message: str, recipient: str) -> EmailMessage:
         email = EmailMessage()
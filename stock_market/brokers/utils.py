@@ -1,8 +1,17 @@
+import csv
+import io
+import json
+import logging
+import time
 from decimal import Decimal
 from math import ceil
-from typing import Iterable
+from typing import Any, Iterable
 
+import redis
+from brokers.exceptions import TradeError
 from brokers.models import (
+    Candle,
+    CandleIntervals,
     Investment,
     InvestmentPortfolio,
     InvestmentTypes,
@@ -13,10 +22,107 @@ from brokers.models import (
     Recommendation,
     Trade,
 )
+from django.core.cache import cache
+from django.core.serializers.json import DjangoJSONEncoder
 from django.db import IntegrityError, transaction
-from django.db.models import Count, F, QuerySet
+from django.db.models import Count, F, Q, QuerySet, Sum, Value
+from django.db.models.functions import Coalesce
 from django.http import Http404
+from django.utils import timezone
+from users.models import User
+from users.utils import UserService
 from utils.interfaces import IService
+from utils.redis import get_redis
+from utils.statsd import statsd
+from utils.transactions import retry_on_conflict
+
+from stock_market.settings import (
+    AWS_PRESIGNED_EXPIRY,
+    CANDLES_ENABLED,
+    INVESTMENT_CACHE_TIMEOUT,
+    INVESTMENT_LIST_CACHE_TIMEOUT,
+    PORTFOLIO_SUMMARY_CACHE_ENABLED,
+    PRICE_PUSH_CHANNEL,
+    PRICE_PUSH_ENABLED,
+    TICKER_CACHE_TIMEOUT,
+)
+
+logger = logging.getLogger(__name__)
+
+
+class InvestmentCacheService:
+    """
+    Cache of serialized investments.
+
+    Entries keep the version they were built for, so one lookup reads both
+    keys in a single round trip. A cached investment is validated against its
+    own version, which every write of the investment bumps, so it's never
+    stale. Ticker batches and trades write investments every second, so the
+    list and data derived from prices of many investments, like portfolio
+    summaries, are cached for list_timeout seconds instead. Their version is
+    bumped only when investments are added or changed by the admin.
+    """
+
+    list_version_key = "investments:version"
+    item_version_key = "investments:%s:version"
+    list_key = "investments:list"
+    item_key = "investments:%s"
+    timeout = min(INVESTMENT_CACHE_TIMEOUT, AWS_PRESIGNED_EXPIRY)
+    list_timeout = min(INVESTMENT_LIST_CACHE_TIMEOUT, timeout)
+
+    def get_list(self) -> tuple[Any, int]:
+        return self.get(self.list_key)
+
+    def set_list(self, data: list, version: int):
+        self.set(self.list_key, data, version, self.list_timeout)
+
+    def get_item(self, investment_id: int) -> tuple[Any, int]:
+        return self.get(
+            self.item_key % investment_id, self.item_version_key % investment_id
+        )
+
+    def set_item(self, investment_id: int, data: dict, version: int):
+        self.set(self.item_key % investment_id, data, version, self.timeout)
+
+    def get(self, key: str, version_key: str = list_version_key) -> tuple[Any, int]:
+        """Return cached data or None and the current version"""
+        values = cache.get_many([version_key, key])
+
+        version = values.get(version_key)
+        if version is None:
+            version = time.time_ns()
+            cache.add(version_key, version, timeout=None)
+            return None, version
+
+        entry_version, data = values.get(key, (None, None))
+        if entry_version != version:
+            return None, version
+
+        return data, version
+
+    def set(self, key: str, data: Any, version: int, timeout: int = list_timeout):
+        cache.set(key, (version, data), timeout)
+
+    def bump_version(self, *investment_ids: int):
+        """Invalidate the cached investments"""
+        self.__bump([self.item_version_key % pk for pk in investment_ids])
+
+    def bump_list_version(self):
+        """Invalidate the cached list and data derived from it"""
+        self.__bump([self.list_version_key])
+
+    @staticmethod
+    def __bump(version_keys: list[str]):
+        """
+        Drop versions now and once more on commit, so entries built from rows
+        read before the commit are dropped too. The next lookup starts a new one.
+        """
+        if not version_keys:
+            return
+
+        cache.delete_many(version_keys)
+        if transaction.get_connection().in_atomic_block:
+            transaction.on_commit(lambda: cache.delete_many(version_keys))
 
 
 class InvestmentService(IService):
@@ -27,8 +133,14 @@ class InvestmentService(IService):
     def get_by_filters(self, **filters):
         return Investment.objects.filter(**filters)
 
+    def get_for_update(self, **filters):
+        return Investment.objects.select_for_update().filter(**filters).order_by("id")
+
     def create(self):
-        return Investment.objects.create(**self.data)
+        investment = Investment.objects.create(**self.data)
+        InvestmentUpdateService.forget_tickers([investment.name])
+
+        return investment
 
     def update(self):
         self.instance.image = self.data.get("image", self.instance.image)
@@ -36,6 +148,7 @@ class InvestmentService(IService):
         self.instance.quantity = self.data["quantity"]
         self.instance.type = self.data["type"]
         self.instance.save()
+        InvestmentUpdateService.forget_tickers([self.instance.name])
 
         return self.instance
 
@@ -46,6 +159,7 @@ class InvestmentService(IService):
             raise Http404
 
     def delete(self, investment: Investment):
+        InvestmentUpdateService.forget_tickers([investment.name])
         return investment.delete()
 
     def get_all(self):
@@ -62,6 +176,8 @@ class InvestmentService(IService):
 
 
 class InvestmentPortfolioService(IService):
+    summary_cache_key = "portfolio_summary:%s"
+
     def __init__(
         self, validated_data: dict = None, instance: InvestmentPortfolio = None
     ):
@@ -101,12 +217,19 @@ class InvestmentPortfolioService(IService):
     def bulk_create(self, portfolios: Iterable[InvestmentPortfolio]):
         return InvestmentPortfolio.objects.bulk_create(portfolios)
 
-    def bulk_update(self, portfolios: Iterable[InvestmentPortfolio]):
-        return InvestmentPortfolio.objects.bulk_update(portfolios)
+    def bulk_update(self, portfolios: Iterable[InvestmentPortfolio], *args):
+        return InvestmentPortfolio.objects.bulk_update(portfolios, *args)
 
     def get_by_filters(self, **filters):
         return InvestmentPortfolio.objects.select_related("owner").filter(**filters)
 
+    def get_for_update(self, **filters):
+        return (
+            InvestmentPortfolio.objects.select_for_update()
+            .filter(**filters)
+            .order_by("id")
+        )
+
     def get_by_filters_and_values(self, *values, **filters):
         return (
             InvestmentPortfolio.objects.select_related("owner")
@@ -114,6 +237,48 @@ class InvestmentPortfolioService(IService):
             .values(*values)
         )
 
+    def get_summary(self, owner: User) -> dict:
+        """Return market value, cost basis and unrealized P&L of the owner"""
+        money_field = InvestmentPortfolio._meta.get_field("spend_amount")
+        zero = Value(Decimal("0"), output_field=money_field)
+
+        summary = InvestmentPortfolio.objects.filter(owner=owner).aggregate(
+            portfolios=Count("id"),
+            market_value=Coalesce(
+                Sum(F("quantity") * F("investment__price"), output_field=money_field),
+                zero,
+            ),
+            cost_basis=Coalesce(Sum("spend_amount"), zero),
+        )
+        summary["unrealized_pnl"] = summary["market_value"] - summary["cost_basis"]
+
+        return summary
+
+    def get_cached_summary(self, owner: User) -> dict:
+        """
+        Return the summary snapshot valid for the list timeout of investments,
+        or until a portfolio of the owner changes
+        """
+        if not PORTFOLIO_SUMMARY_CACHE_ENABLED:
+            return self.get_summary(owner)
+
+        cache_service = InvestmentCacheService()
+        key = self.summary_cache_key % owner.id
+
+        summary, version = cache_service.get(key)
+        if summary is None:
+            summary = self.get_summary(owner)
+            cache_service.set(key, summary, version)
+
+        return summary
+
+    def delete_cached_summary(self, owner_id: int):
+        """Drop the owner's summary now and once more on commit"""
+        key = self.summary_cache_key % owner_id
+        cache.delete(key)
+        if transaction.get_connection().in_atomic_block:
+            transaction.on_commit(lambda: cache.delete(key))
+
 
 class OrderService(IService):
     model: MarketOrder | LimitOrder = None
@@ -178,11 +343,42 @@ class LimitOrderService(OrderService):
 
         return self.instance
 
-    def get_group_by_investment(self):
+    def get_group_by_investment(self, **filters):
         return (
             self.model.objects.values("investment")
             .annotate(count=Count("id"))
-            .filter(status=OrderStatuses.ACTIVE)
+            .filter(status=OrderStatuses.ACTIVE, **filters)
+        )
+
+    def get_executable(self, investment: Investment):
+        """Return executable limit orders"""
+        return self.get_by_filters(
+            Q(
+                investment=investment,
+                status=OrderStatuses.ACTIVE,
+                quantity__lte=investment.quantity,
+            )
+            & (
+                Q(
+                    price__gte=investment.price,
+                    activated_status__in=[
+                        OrderActivatedStatuses.LTE,
+                        OrderActivatedStatuses.EQUAL,
+                    ],
+                )
+                | Q(
+                    price__gt=investment.price,
+                    activated_status=OrderActivatedStatuses.LT,
+                )
+                | Q(
+                    price__lte=investment.price,
+                    activated_status=OrderActivatedStatuses.GTE,
+                )
+                | Q(
+                    price__lt=investment.price,
+                    activated_status=OrderActivatedStatuses.GT,
+                )
+            )
         )
 
 
@@ -232,6 +428,49 @@ class TradeService(IService):
         )
 
 
+class TradeExporter:
+    """Stream trades row by row from a server-side cursor"""
+
+    fields = ("id", "quantity", "price", "portfolio", "investment", "created_at")
+    chunk_size = 2000
+    filters = {
+        "investment": "investment_id",
+        "portfolio": "portfolio_id",
+        "created_from": "created_at__gte",
+        "created_to": "created_at__lte",
+    }
+
+    def __init__(self, queryset: QuerySet, params: dict):
+        filters = {
+            self.filters[key]: value
+            for key, value in params.items()
+            if key in self.filters
+        }
+        self.rows = (
+            queryset.filter(**filters)
+            .values_list(*self.fields)
+            .iterator(chunk_size=self.chunk_size)
+        )
+
+    def to_ndjson(self) -> Iterable[str]:
+        for row in self.rows:
+            yield json.dumps(dict(zip(self.fields, row)), cls=DjangoJSONEncoder) + "\n"
+
+    def to_csv(self) -> Iterable[str]:
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+
+        writer.writerow(self.fields)
+        for row in self.rows:
+            writer.writerow(row)
+
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+
+        yield buffer.getvalue()
+
+
 class RecommendationService(IService):
     def __init__(self, validated_data: dict = None, instance: Recommendation = None):
         self.data = validated_data
@@ -274,32 +513,148 @@ class RecommendationService(IService):
 
 
 class TradeMaker:
+    @retry_on_conflict
     def make(
         self, quantity: int, portfolio: InvestmentPortfolio, investment: Investment
     ):
+        """
+        Buy the investment for the portfolio owner.
+
+        The owner, the portfolio and the investment are locked in a fixed order
+        and the balance and the investment quantity are checked before writing.
+        """
         with transaction.atomic():
+            owner = UserService().get_for_update(id=portfolio.owner_id).get()
+            portfolio = (
+                InvestmentPortfolioService().get_for_update(id=portfolio.id).get()
+            )
+            investment = InvestmentService().get_for_update(id=investment.id).get()
+
             spend_money = investment.price * quantity
 
-            portfolio.owner.balance = F("balance") - spend_money
+            if quantity > investment.quantity:
+                raise TradeError("Not enough investment quantity")
+            if spend_money > owner.balance:
+                raise TradeError("Not enough balance")
+
+            owner.balance -= spend_money
             portfolio.spend_amount += spend_money
 
             portfolio.quantity += quantity
-            investment.quantity = F("quantity") - quantity
+            investment.quantity -= quantity
 
+            portfolio.investment = investment
             trade = {
                 "quantity": quantity,
                 "portfolio": portfolio,
             }
 
-            portfolio.owner.save()
-            portfolio.save()
-            investment.save()
+            owner.save(update_fields=("balance", "updated_at"))
+            portfolio.save(update_fields=("quantity", "spend_amount", "updated_at"))
+            investment.save(update_fields=("quantity", "updated_at"))
             TradeService(trade).create()
 
+        InvestmentUpdateService.forget_tickers([investment.name])
+        InvestmentCacheService().bump_version(investment.id)
+        statsd.incr("trades.written")
+
+    @retry_on_conflict
+    def make_batch(
+        self, investment: Investment, orders: list[LimitOrder]
+    ) -> list[LimitOrder]:
+        """
+        Execute limit orders of one investment with a fixed number of queries.
+
+        Orders are filled in the given order while the investment quantity
+        and the owners' balances allow it, the rest of them stay active.
+        Orders are checked again against the locked investment price, since
+        it may have changed after they were selected.
+        Rows are locked in a fixed order (owners, portfolios, investment, each
+        by id), so batches of different investments sharing an owner wait
+        for each other instead of deadlocking.
+        """
+        if not orders:
+            return []
+
+        with transaction.atomic():
+            owners = {
+                owner.id: owner
+                for owner in UserService().get_for_update(
+                    id__in={order.portfolio.owner_id for order in orders}
+                )
+            }
+            portfolios = {
+                portfolio.id: portfolio
+                for portfolio in InvestmentPortfolioService().get_for_update(
+                    id__in={order.portfolio_id for order in orders}
+                )
+            }
+            investment = InvestmentService().get_for_update(id=investment.id).get()
+
+            completed_orders = []
+            trades = []
+            for order in orders:
+                portfolio = portfolios[order.portfolio_id]
+                owner = owners[portfolio.owner_id]
+                spend_money = investment.price * order.quantity
+
+                if not self.__is_triggered(order, investment.price):
+                    continue
+                if order.quantity > investment.quantity or spend_money > owner.balance:
+                    continue
+
+                owner.balance -= spend_money
+                portfolio.spend_amount += spend_money
+                portfolio.quantity += order.quantity
+                investment.quantity -= order.quantity
+
+                order.status = OrderStatuses.COMPLETED
+                completed_orders.append(order)
+                trades.append(
+                    Trade(
+                        quantity=order.quantity,
+                        price=investment.price,
+                        portfolio=portfolio,
+                        investment=investment,
+                    )
+                )
+
+                if investment.quantity == 0:
+                    break
+
+            if not completed_orders:
+                return []
+
+            traded_portfolios = {
+                portfolios[order.portfolio_id] for order in completed_orders
+            }
+            traded_owners = {
+                owners[portfolio.owner_id] for portfolio in traded_portfolios
+            }
+
+            now = timezone.now()
+            for item in (*traded_owners, *traded_portfolios, *completed_orders):
+                item.updated_at = now
+            investment.updated_at = now
+
+            UserService().bulk_update(traded_owners, ("balance", "updated_at"))
+            InvestmentPortfolioService().bulk_update(
+                traded_portfolios, ("quantity", "spend_amount", "updated_at")
+            )
+            InvestmentService().bulk_update([investment], ("quantity", "updated_at"))
+            LimitOrderService().bulk_update(completed_orders, ("status", "updated_at"))
+            TradeService().bulk_create(trades)
+
+        InvestmentUpdateService.forget_tickers([investment.name])
+        InvestmentCacheService().bump_version(investment.id)
+        statsd.incr("trades.written", len(trades))
+
+        return completed_orders
+
     def make_market_order(self, quantity: int, portfolio: InvestmentPortfolio) -> bool:
         try:
             self.make(quantity, portfolio, portfolio.investment)
-        except IntegrityError:
+        except (TradeError, IntegrityError):
             return False
         return True
 
@@ -311,7 +666,7 @@ class TradeMaker:
             self.make(
                 limit_order.quantity, limit_order.portfolio, limit_order.investment
             )
-        except IntegrityError:
+        except (TradeError, IntegrityError):
             ...
         else:
             limit_order.status = OrderStatuses.COMPLETED
@@ -321,14 +676,18 @@ class TradeMaker:
 
     def __is_executable_limit_order(self, limit_order: LimitOrder):
         investment = limit_order.investment
-        investment_price = investment.price
-
-        order_price = limit_order.price
-        order_activated_status = limit_order.activated_status
 
         if limit_order.quantity > investment.quantity:
             return False
 
+        return self.__is_triggered(limit_order, investment.price)
+
+    @staticmethod
+    def __is_triggered(limit_order: LimitOrder, investment_price: Decimal) -> bool:
+        """Check the order activation condition against the investment price"""
+        order_price = limit_order.price
+        order_activated_status = limit_order.activated_status
+
         if order_price >= investment_price and order_activated_status in (
             OrderActivatedStatuses.LTE,
             OrderActivatedStatuses.EQUAL,
@@ -336,7 +695,7 @@ class TradeMaker:
             return True
 
         if (
-            order_price < investment_price
+            order_price > investment_price
             and order_activated_status == OrderActivatedStatuses.LT
         ):
             return True
@@ -355,15 +714,129 @@ class TradeMaker:
         return False
 
 
+class CandleService:
+    """Roll investment prices up into OHLC candles of every interval"""
+
+    truncate = {
+        CandleIntervals.MINUTE: {"second": 0, "microsecond": 0},
+        CandleIntervals.HOUR: {"minute": 0, "second": 0, "microsecond": 0},
+        CandleIntervals.DAY: {"hour": 0, "minute": 0, "second": 0, "microsecond": 0},
+    }
+
+    def add_prices(self, investments: Iterable[Investment]):
+        """
+        Add current prices of the investments to their candles.
+
+        Missing candles are inserted first, then all candles of the batch
+        are locked and updated, so concurrent batches never lose a tick.
+        """
+        prices = {
+            investment.id: Decimal(investment.price) for investment in investments
+        }
+        if not prices:
+            return
+
+        now = timezone.now()
+        started_at = {
+            interval: now.replace(**fields)
+            for interval, fields in self.truncate.items()
+        }
+
+        with transaction.atomic():
+            Candle.objects.bulk_create(
+                (
+                    Candle(
+                        investment_id=investment_id,
+                        interval=interval,
+                        started_at=started_at[interval],
+                        open=price,
+                        high=price,
+                        low=price,
+                        close=price,
+                    )
+                    for investment_id, price in prices.items()
+                    for interval in self.truncate
+                ),
+                ignore_conflicts=True,
+            )
+
+            periods = Q()
+            for interval, value in started_at.items():
+                periods |= Q(interval=interval, started_at=value)
+
+            candles = list(
+                Candle.objects.select_for_update()
+                .filter(periods, investment_id__in=prices.keys())
+                .order_by("id")
+            )
+            for candle in candles:
+                price = prices[candle.investment_id]
+                candle.high = max(candle.high, price)
+                candle.low = min(candle.low, price)
+                candle.close = price
+                candle.ticks += 1
+
+            Candle.objects.bulk_update(candles, ("high", "low", "close", "ticks"))
+
+    def get_range(
+        self, investment_id: int, interval: str, started_from, started_to
+    ) -> QuerySet:
+        return Candle.objects.filter(
+            investment_id=investment_id,
+            interval=interval,
+            started_at__gte=started_from,
+            started_at__lte=started_to,
+        ).values("started_at", "open", "high", "low", "close", "ticks")
+
+
+class PricePublisher:
+    """Publish changed prices to websocket subscribers, best effort"""
+
+    def publish(self, recommendations: Iterable[Recommendation]):
+        prices = [
+            {
+                "id": recommendation.investment_id,
+                "name": recommendation.investment.name,
+                "price": recommendation.investment.price,
+                "percentage": recommendation.percentage,
+            }
+            for recommendation in recommendations
+        ]
+        if not prices:
+            return
+
+        try:
+            get_redis().publish(
+                PRICE_PUSH_CHANNEL, json.dumps(prices, cls=DjangoJSONEncoder)
+            )
+        except redis.RedisError:
+            logger.warning("Failed to publish %s price changes", len(prices))
+
+
 class InvestmentUpdateService:
     """Update investments and recommendations"""
 
     investment_service = InvestmentService()
     recommendation_service = RecommendationService()
+    ticker_cache_key = "ticker:%s"
 
-    def update(self, tickers: Iterable[dict]):
+    def update(self, tickers: Iterable[dict]) -> set[int]:
+        """Return ids of investments whose price has changed"""
         tickers = self.__change_tickers(tickers)
-        investments_names = tickers.keys()
+        changed_tickers = self.__get_changed_tickers(tickers)
+
+        statsd.incr("tickers.received", len(tickers))
+        statsd.incr("tickers.changed", len(changed_tickers))
+
+        logger.info(
+            "Skipped %s of %s unchanged tickers",
+            len(tickers) - len(changed_tickers),
+            len(tickers),
+        )
+        if not changed_tickers:
+            return set()
+
+        investments_names = changed_tickers.keys()
 
         recommendations = self.recommendation_service.get_by_filters(
             investment__name__in=investments_names
@@ -373,25 +846,100 @@ class InvestmentUpdateService:
         ]
         create_investments = set(investments_names) - set(existed_investments)
 
+        created_investments = []
+        updated_investment_ids = set()
         if create_investments:
-            self.__create(tickers, create_investments)
+            created_investments = self.__create(changed_tickers, create_investments)
         if existed_investments:
-            self.__update(tickers, recommendations)
+            updated_investment_ids = self.__update(changed_tickers, recommendations)
+
+        if CANDLES_ENABLED:
+            CandleService().add_prices(
+                [
+                    *created_investments,
+                    *(
+                        recommendation.investment
+                        for recommendation in recommendations
+                        if recommendation.investment_id in updated_investment_ids
+                    ),
+                ]
+            )
+
+        self.__set_last_tickers(changed_tickers)
+        cache_service = InvestmentCacheService()
+        cache_service.bump_version(
+            *(recommendation.investment_id for recommendation in recommendations)
+        )
+        if created_investments:
+            cache_service.bump_list_version()
+
+        if updated_investment_ids and PRICE_PUSH_ENABLED:
+            PricePublisher().publish(
+                recommendation
+                for recommendation in recommendations
+                if recommendation.investment_id in updated_investment_ids
+            )
+
+        return updated_investment_ids
 
-    def __update(self, tickers: dict, recommendations: QuerySet):
+    def __update(self, tickers: dict, recommendations: QuerySet) -> set[int]:
         updated_investments = []
+        updated_recommendations = []
+        price_changed_ids = set()
 
         for recommendation in recommendations:
             investment = recommendation.investment
-            investment.price = tickers[investment.name]["best_bid_price"]
-            recommendation.percentage = tickers[investment.name]["price_change_percent"]
+            ticker = tickers[investment.name]
+
+            if investment.price != ticker["best_bid_price"]:
+                price_changed_ids.add(investment.id)
+            elif recommendation.percentage == ticker["price_change_percent"]:
+                continue
+
+            investment.price = ticker["best_bid_price"]
+            recommendation.percentage = ticker["price_change_percent"]
 
             updated_investments.append(investment)
+            updated_recommendations.append(recommendation)
+
+        if updated_investments:
+            self.investment_service.bulk_update(updated_investments, ["price"])
+            self.recommendation_service.bulk_update(
+                updated_recommendations, ["percentage"]
+            )
 
-        self.investment_service.bulk_update(updated_investments, ["price"])
-        self.recommendation_service.bulk_update(recommendations, ["percentage"])
+        return price_changed_ids
+
+    def __get_changed_tickers(self, tickers: dict) -> dict:
+        """Return tickers which differ from the last seen ones"""
+        keys = {self.ticker_cache_key % symbol: symbol for symbol in tickers}
+        last_tickers = cache.get_many(keys)
+
+        return {
+            symbol: ticker
+            for symbol, ticker in tickers.items()
+            if last_tickers.get(self.ticker_cache_key % symbol) != ticker
+        }
+
+    @classmethod
+    def forget_tickers(cls, names: Iterable[str]):
+        """
+        Drop the last seen tickers of written investments on commit,
+        so the next tickers are applied even if they didn't change
+        """
+        keys = [cls.ticker_cache_key % name for name in names]
+        transaction.on_commit(lambda: cache.delete_many(keys))
+
+    def __set_last_tickers(self, tickers: dict):
+        cache.set_many(
+            {
+                self.ticker_cache_key % symbol: ticker
+                for symbol, ticker in tickers.items()
+            },
+            timeout=TICKER_CACHE_TIMEOUT,
+        )
 
-    def __create(self, tickers: dict, create_investments: set):
+    def __create(self, tickers: dict, create_investments: set) -> list[Investment]:
         created_investments = []
         created_recommendations = []
 
@@ -412,6 +960,8 @@ class InvestmentUpdateService:
         self.investment_service.bulk_create(created_investments)
         self.recommendation_service.bulk_create(created_recommendations)
 
+        return created_investments
+
     def __change_tickers(self, tickers: Iterable[dict]) -> dict:
         new_tickers = {}
         for ticker in tickers:
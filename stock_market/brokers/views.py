@@ -7,11 +7,16 @@ from brokers.models import (
     Recommendation,
     Trade,
 )
+from brokers.order_book import limit_order_book
+from brokers.pagination import OptionalCursorPagination
 from brokers.permissions import IsKafkaUser, IsPortfolioOwner
 from brokers.serializers import (
+    CandleQuerySerializer,
+    CandleRetrieveSerializer,
     InvestmentCreateSerializer,
     InvestmentPortfolioCreateSerializer,
     InvestmentPortfolioRetrieveSerializer,
+    InvestmentPortfolioSummarySerializer,
     InvestmentPortfolioUpdateSerializer,
     InvestmentRetrieveSerializer,
     InvestmentUpdateSerializer,
@@ -25,30 +30,37 @@ from brokers.serializers import (
     RecommendationRetrieveSerializer,
     RecommendationUpdateSerializer,
     TradeCreateSerializer,
+    TradeExportSerializer,
     TradeRetrieveSerializer,
     TradeUpdateSerializer,
 )
 from brokers.tasks import MessageBrokerHandler
 from brokers.utils import (
+    CandleService,
+    InvestmentCacheService,
     InvestmentPortfolioService,
     InvestmentService,
     LimitOrderService,
     MarketOrderService,
     RecommendationService,
+    TradeExporter,
     TradeMaker,
     TradeService,
 )
+from django.http import StreamingHttpResponse
 from rest_framework import mixins, status, viewsets
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from users.exceptions import Http400
 from users.models import Roles
 from users.permissions import IsAdmin, IsAnalyst, IsOwner, IsUser
+from utils.mixins import TimedSerializerMixin, get_timed_serializer_class
 
 from stock_market.settings import RECOMMENDATION_THRESHOLD
 
 
 class InvestmentViewSet(
+    TimedSerializerMixin,
     mixins.ListModelMixin,
     mixins.CreateModelMixin,
     mixins.UpdateModelMixin,
@@ -56,16 +68,19 @@ class InvestmentViewSet(
     viewsets.GenericViewSet,
 ):
     queryset = Investment.objects.all()
+    pagination_class = OptionalCursorPagination
     serializer_action_classes = {
         "list": InvestmentRetrieveSerializer,
         "retrieve": InvestmentRetrieveSerializer,
         "create": InvestmentCreateSerializer,
         "update": InvestmentUpdateSerializer,
         "partial_update": InvestmentUpdateSerializer,
+        "candles": CandleRetrieveSerializer,
     }
     permission_action_classes = {
         "list": (IsAdmin | IsAnalyst | IsUser,),
         "retrieve": (IsAdmin | IsAnalyst | IsUser,),
+        "candles": (IsAdmin | IsAnalyst | IsUser,),
         "create": (IsAdmin,),
         "update": (IsAdmin,),
         "partial_update": (IsAdmin,),
@@ -82,6 +97,31 @@ class InvestmentViewSet(
     def get_serializer_class(self):
         return self.serializer_action_classes[self.action]
 
+    def list(self, request, *args, **kwargs):
+        if request.query_params:
+            return super().list(request, *args, **kwargs)
+
+        cache_service = InvestmentCacheService()
+        data, version = cache_service.get_list()
+        if data is None:
+            response = super().list(request, *args, **kwargs)
+            cache_service.set_list(response.data, version)
+
+            return response
+
+        return Response(data, status=status.HTTP_200_OK)
+
+    def retrieve(self, request, *args, **kwargs):
+        cache_service = InvestmentCacheService()
+        data, version = cache_service.get_item(self.kwargs["pk"])
+        if data is None:
+            response = super().retrieve(request, *args, **kwargs)
+            cache_service.set_item(self.kwargs["pk"], response.data, version)
+
+            return response
+
+        return Response(data, status=status.HTTP_200_OK)
+
     def create(self, request, *args, **kwargs):
         serializer = self.get_serializer(data=request.data)
         serializer.is_valid(raise_exception=True)
@@ -89,6 +129,7 @@ class InvestmentViewSet(
         validated_data = serializer.validated_data
         instance = InvestmentService(validated_data).create()
         RecommendationService({"investment": instance}).create()
+        InvestmentCacheService().bump_list_version()
 
         data = self.get_serializer(instance).data
 
@@ -110,13 +151,33 @@ class InvestmentViewSet(
 
         recommendation, _ = RecommendationService().get_or_create(investment=instance)
         RecommendationService({"percentage": percentage}, recommendation).update()
+        cache_service = InvestmentCacheService()
+        cache_service.bump_version(instance.id)
+        cache_service.bump_list_version()
 
         data = self.get_serializer(instance).data
 
         return Response(data, status=status.HTTP_200_OK)
 
+    @action(detail=True, methods=["get"], url_path="candles")
+    def candles(self, request, *args, **kwargs):
+        query_serializer = get_timed_serializer_class(CandleQuerySerializer)(
+            data=request.query_params
+        )
+        query_serializer.is_valid(raise_exception=True)
+
+        instance = InvestmentService().get_by_id_or_404(self.kwargs["pk"])
+        candles = CandleService().get_range(
+            instance.id, **query_serializer.validated_data
+        )
+
+        serializer = self.get_serializer(candles, many=True)
+
+        return Response(serializer.data, status=status.HTTP_200_OK)
+
 
 class MarketOrderViewSet(
+    TimedSerializerMixin,
     mixins.ListModelMixin,
     mixins.CreateModelMixin,
     mixins.UpdateModelMixin,
@@ -124,6 +185,7 @@ class MarketOrderViewSet(
     viewsets.GenericViewSet,
 ):
     queryset = MarketOrder.objects.all()
+    pagination_class = OptionalCursorPagination
     serializer_action_classes = {
         "list": MarketOrderRetrieveSerializer,
         "retrieve": MarketOrderRetrieveSerializer,
@@ -186,6 +248,7 @@ class MarketOrderViewSet(
 
 
 class LimitOrderViewSet(
+    TimedSerializerMixin,
     mixins.ListModelMixin,
     mixins.CreateModelMixin,
     mixins.UpdateModelMixin,
@@ -193,6 +256,7 @@ class LimitOrderViewSet(
     viewsets.GenericViewSet,
 ):
     queryset = LimitOrder.objects.all()
+    pagination_class = OptionalCursorPagination
     serializer_action_classes = {
         "list": LimitOrderRetrieveSerializer,
         "retrieve": LimitOrderRetrieveSerializer,
@@ -225,6 +289,7 @@ class LimitOrderViewSet(
 
         instance = LimitOrderService(serializer.validated_data).create()
         instance = TradeMaker().make_limit_order(instance)
+        limit_order_book.sync(instance)
 
         data = self.get_serializer(instance).data
 
@@ -241,6 +306,7 @@ class LimitOrderViewSet(
             serializer.validated_data, instance=instance
         ).update()
         instance = TradeMaker().make_limit_order(instance)
+        limit_order_book.sync(instance)
 
         data = self.get_serializer(instance).data
 
@@ -248,6 +314,7 @@ class LimitOrderViewSet(
 
 
 class InvestmentPortfolioViewSet(
+    TimedSerializerMixin,
     mixins.ListModelMixin,
     mixins.CreateModelMixin,
     mixins.UpdateModelMixin,
@@ -255,10 +322,12 @@ class InvestmentPortfolioViewSet(
     viewsets.GenericViewSet,
 ):
     queryset = InvestmentPortfolio.objects.all()
+    pagination_class = OptionalCursorPagination
     serializer_action_classes = {
         "list": InvestmentPortfolioRetrieveSerializer,
         "retrieve": InvestmentPortfolioRetrieveSerializer,
         "own": InvestmentPortfolioRetrieveSerializer,
+        "own_summary": InvestmentPortfolioSummarySerializer,
         "create": InvestmentPortfolioCreateSerializer,
         "update": InvestmentPortfolioUpdateSerializer,
         "partial_update": InvestmentPortfolioUpdateSerializer,
@@ -267,6 +336,7 @@ class InvestmentPortfolioViewSet(
         "list": (IsAdmin,),
         "retrieve": (IsAdmin | IsOwner,),
         "own": (IsUser,),
+        "own_summary": (IsAdmin | IsAnalyst | IsUser,),
         "create": (IsAdmin | IsAnalyst | IsUser,),
         "update": (IsAdmin,),
         "partial_update": (IsAdmin,),
@@ -288,6 +358,7 @@ class InvestmentPortfolioViewSet(
         serializer.is_valid(raise_exception=True)
 
         instance = InvestmentPortfolioService(serializer.validated_data).create()
+        InvestmentPortfolioService().delete_cached_summary(instance.owner_id)
 
         data = self.get_serializer(instance).data
 
@@ -303,6 +374,7 @@ class InvestmentPortfolioViewSet(
         instance = InvestmentPortfolioService(
             serializer.validated_data, instance=instance
         ).update()
+        InvestmentPortfolioService().delete_cached_summary(instance.owner_id)
 
         data = self.get_serializer(instance).data
 
@@ -315,8 +387,16 @@ class InvestmentPortfolioViewSet(
 
         return Response(serializer.data, status=status.HTTP_200_OK)
 
+    @action(detail=False, methods=["get"], url_path="own/summary")
+    def own_summary(self, request, *args, **kwargs):
+        summary = InvestmentPortfolioService().get_cached_summary(request.jwt_user)
+        serializer = self.get_serializer(summary)
+
+        return Response(serializer.data, status=status.HTTP_200_OK)
+
 
 class TradeViewSet(
+    TimedSerializerMixin,
     mixins.ListModelMixin,
     mixins.CreateModelMixin,
     mixins.UpdateModelMixin,
@@ -324,15 +404,18 @@ class TradeViewSet(
     viewsets.GenericViewSet,
 ):
     queryset = Trade.objects.all()
+    pagination_class = OptionalCursorPagination
     serializer_action_classes = {
         "list": TradeRetrieveSerializer,
         "retrieve": TradeRetrieveSerializer,
         "create": TradeCreateSerializer,
         "update": TradeUpdateSerializer,
         "partial_update": TradeUpdateSerializer,
+        "export": TradeExportSerializer,
     }
     permission_action_classes = {
         "list": (IsAdmin | IsAnalyst | IsUser,),
+        "export": (IsAdmin | IsAnalyst | IsUser,),
         "retrieve": (IsAdmin | IsAnalyst | IsPortfolioOwner,),
         "create": (IsAdmin | IsAnalyst | IsUser,),
         "update": (IsAdmin,),
@@ -383,8 +466,27 @@ class TradeViewSet(
 
         return Response(data, status=status.HTTP_200_OK)
 
+    @action(detail=False, methods=["get"], url_path="export")
+    def export(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.query_params)
+        serializer.is_valid(raise_exception=True)
+
+        output = serializer.validated_data["output"]
+        exporter = TradeExporter(self.get_queryset(), serializer.validated_data)
+
+        if output == "csv":
+            response = StreamingHttpResponse(exporter.to_csv(), content_type="text/csv")
+        else:
+            response = StreamingHttpResponse(
+                exporter.to_ndjson(), content_type="application/x-ndjson"
+            )
+        response["Content-Disposition"] = f'attachment; filename="trades.{output}"'
+
+        return response
+
 
 class RecommendationViewSet(
+    TimedSerializerMixin,
     mixins.ListModelMixin,
     mixins.CreateModelMixin,
     mixins.UpdateModelMixin,
@@ -0,0 +1,227 @@
+import asyncio
+import json
+import logging
+from collections import defaultdict
+
+from asgiref.sync import sync_to_async
+from users.models import User
+from users.utils import user_cache
+from utils.redis import get_async_redis
+from utils.token import Token
+
+from stock_market.settings import (
+    PRICE_PUSH_AUTH_TIMEOUT,
+    PRICE_PUSH_CHANNEL,
+    PRICE_PUSH_QUEUE_SIZE,
+)
+
+logger = logging.getLogger(__name__)
+
+
+class PriceFanout:
+    """
+    Deliver published prices to websocket connections of this process.
+
+    The process holds a single redis subscription, each price is routed only
+    to connections subscribed to its investment. A lost subscription is
+    restored with exponential backoff, malformed messages are skipped.
+    """
+
+    min_reconnect_delay = 0.5
+    max_reconnect_delay = 30
+
+    def __init__(self):
+        self.connections: dict[int, set["PriceConnection"]] = defaultdict(set)
+        self.task: asyncio.Task | None = None
+
+    def subscribe(self, connection: "PriceConnection", investment_ids: set[int]):
+        for investment_id in investment_ids:
+            self.connections[investment_id].add(connection)
+
+        if self.task is None or self.task.done():
+            self.task = asyncio.create_task(self.listen())
+
+    def unsubscribe(self, connection: "PriceConnection", investment_ids: set[int]):
+        for investment_id in investment_ids:
+            connections = self.connections.get(investment_id)
+            if connections is None:
+                continue
+
+            connections.discard(connection)
+            if not connections:
+                del self.connections[investment_id]
+
+    def dispatch(self, prices: list[dict]):
+        connection_prices = defaultdict(list)
+        for price in prices:
+            for connection in self.connections.get(price["id"], ()):
+                connection_prices[connection].append(price)
+
+        for connection, data in connection_prices.items():
+            connection.push({"type": "prices", "data": data})
+
+    async def listen(self):
+        delay = self.min_reconnect_delay
+        while True:
+            client = get_async_redis()
+            pubsub = client.pubsub(ignore_subscribe_messages=True)
+            try:
+                await pubsub.subscribe(PRICE_PUSH_CHANNEL)
+                delay = self.min_reconnect_delay
+
+                async for message in pubsub.listen():
+                    self.__dispatch_message(message)
+            except Exception:
+                logger.exception("Price subscription lost, reconnecting in %ss", delay)
+            finally:
+                await self.__close(client, pubsub)
+
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, self.max_reconnect_delay)
+
+    def __dispatch_message(self, message: dict):
+        try:
+            prices = json.loads(message["data"])
+            self.dispatch(prices)
+        except (ValueError, TypeError, KeyError):
+            logger.warning("Skipped a malformed price message: %r", message.get("data"))
+
+    @staticmethod
+    async def __close(client, pubsub):
+        try:
+            await pubsub.aclose()
+            await client.aclose()
+        except Exception:
+            logger.debug("Failed to close the price subscription", exc_info=True)
+
+
+price_fanout = PriceFanout()
+
+
+class PriceConnection:
+    """
+    Websocket connection which receives prices of subscribed investments.
+
+    The first message must be {"action": "authenticate", "token": access token},
+    the token is kept out of the URL so it doesn't reach access logs. Without
+    it the connection is closed with code 4401. Then the client sends
+    {"action": "subscribe" | "unsubscribe", "investments": [ids]},
+    {"subscriptions": true} adds investments from the user subscriptions.
+    """
+
+    actions = ("subscribe", "unsubscribe")
+
+    def __init__(self, scope, receive, send):
+        self.scope = scope
+        self.receive = receive
+        self.send = send
+        self.user: User | None = None
+        self.investment_ids: set[int] = set()
+        self.queue = asyncio.Queue(maxsize=PRICE_PUSH_QUEUE_SIZE)
+
+    async def __call__(self):
+        message = await self.receive()
+        if message["type"] != "websocket.connect":
+            return
+
+        # closing before accept would be answered with HTTP 403
+        await self.send({"type": "websocket.accept"})
+
+        try:
+            message = await asyncio.wait_for(self.receive(), PRICE_PUSH_AUTH_TIMEOUT)
+        except asyncio.TimeoutError:
+            message = {"type": "websocket.receive"}
+
+        if message["type"] == "websocket.disconnect":
+            return
+
+        self.user = await self.__authenticate(message.get("text") or "")
+        if self.user is None:
+            await self.send({"type": "websocket.close", "code": 4401})
+            return
+
+        writer = asyncio.create_task(self.__write())
+        try:
+            await self.__read()
+        finally:
+            writer.cancel()
+            price_fanout.unsubscribe(self, self.investment_ids)
+
+    def push(self, message: dict):
+        try:
+            self.queue.put_nowait(message)
+        except asyncio.QueueFull:
+            logger.warning("Dropped prices for a slow client of user %s", self.user.id)
+
+    async def __authenticate(self, text: str) -> User | None:
+        try:
+            data = json.loads(text)
+            if data["action"] != "authenticate":
+                return None
+            token = str(data["token"])
+        except (ValueError, TypeError, KeyError):
+            return None
+
+        payload = Token.get_payload(token)
+        if payload.get("type") != "access_token":
+            return None
+
+        user = await sync_to_async(user_cache.get)(payload["id"])
+        if user is None or user.is_blocked:
+            return None
+
+        return user
+
+    async def __read(self):
+        while True:
+            message = await self.receive()
+            if message["type"] == "websocket.disconnect":
+                return
+
+            if message["type"] == "websocket.receive":
+                await self.__handle(message.get("text") or "")
+
+    async def __handle(self, text: str):
+        try:
+            data = json.loads(text)
+            action = data["action"]
+            investment_ids = {int(item) for item in data.get("investments", [])}
+        except (ValueError, TypeError, KeyError):
+            return self.push({"type": "error", "detail": "Invalid message"})
+
+        if action not in self.actions:
+            return self.push({"type": "error", "detail": "Unknown action"})
+
+        if data.get("subscriptions"):
+            investment_ids |= await self.__get_user_subscriptions()
+
+        if action == "subscribe":
+            self.investment_ids |= investment_ids
+            price_fanout.subscribe(self, investment_ids)
+        else:
+            self.investment_ids -= investment_ids
+            price_fanout.unsubscribe(self, investment_ids)
+
+        self.push({"type": "subscriptions", "investments": sorted(self.investment_ids)})
+
+    @sync_to_async
+    def __get_user_subscriptions(self) -> set[int]:
+        return set(self.user.subscriptions.values_list("id", flat=True))
+
+    async def __write(self):
+        while True:
+            message = await self.queue.get()
+            await self.send({"type": "websocket.send", "text": json.dumps(message)})
+
+
+class PriceWebSocketApplication:
+    """ASGI application serving websocket connections"""
+
+    path = "/ws/prices/"
+
+    async def __call__(self, scope, receive, send):
+        if scope["path"].rstrip("/") + "/" != self.path:
+            await send({"type": "websocket.close", "code": 4404})
+            return
+
+        await PriceConnection(scope, receive, send)()
@@ -1,11 +1,21 @@
 import asyncio
+import json
+from typing import Iterable
 
 import aiohttp
+import django
 from aiokafka import AIOKafkaConsumer
+from asgiref.sync import sync_to_async
+from django.db import close_old_connections
 from rest_framework.status import HTTP_200_OK, HTTP_401_UNAUTHORIZED
 
 from stock_market.settings import (
+    CONSUMER_BATCH_ENABLED,
+    CONSUMER_BATCH_SIZE,
+    CONSUMER_BATCH_TIMEOUT_MS,
+    CONSUMER_CONNECTION_LIMIT,
     CONSUMER_GROUP,
+    CONSUMER_INGESTION_MODE,
     HTTP_AUTH_KEYWORD,
     KAFKA_EMAIL,
     KAFKA_ENDPOINT,
@@ -21,8 +31,6 @@ from stock_market.settings import (
 
 
 class Consumer:
-    kafka_endpoint = f"{WEB_URL}{KAFKA_ENDPOINT}"
-
     async def __aenter__(self):
         self.consumer = AIOKafkaConsumer(
             KAFKA_TOPIC,
@@ -31,36 +39,141 @@ class Consumer:
         )
         await self.consumer.start()
 
-        self.kafka_auth = KafkaAuth()
-        await self.kafka_auth.start()
+        self.sender = senders[CONSUMER_INGESTION_MODE]()
+        await self.sender.start()
 
         return self
 
     async def __aexit__(self, exc_type, exc_val, exc_tb):
         await self.consumer.stop()
+        await self.sender.stop()
 
     async def start(self):
+        if CONSUMER_BATCH_ENABLED:
+            return await self.__start_batches()
+
         async for msg in self.consumer:
-            await self.__send_message(msg.value)
-
-    async def __send_message(self, data):
-        async with aiohttp.ClientSession() as session:
-            for _ in range(2):
-                response = await session.put(
-                    url=self.kafka_endpoint,
-                    data=data,
-                    headers={
-                        "Content-Type": "application/json",
-                        "Authorization": f"{HTTP_AUTH_KEYWORD} {self.kafka_auth.access_token}",
-                    },
-                )
-
-                if response.status == HTTP_401_UNAUTHORIZED:
-                    await self.kafka_auth.refresh()
-
-                    continue
+            await self.sender.send(load_tickers(msg.value))
+
+    async def __start_batches(self):
+        """Send the latest tickers received within a time or size window"""
+        while True:
+            messages = await self.__get_batch()
+            if not messages:
+                continue
+
+            await self.sender.send(self.merge_tickers(messages))
+
+    async def __get_batch(self) -> list[bytes]:
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + CONSUMER_BATCH_TIMEOUT_MS / 1000
+
+        messages = []
+        while len(messages) < CONSUMER_BATCH_SIZE:
+            timeout_ms = int((deadline - loop.time()) * 1000)
+            if timeout_ms <= 0:
                 break
 
+            records = await self.consumer.getmany(
+                timeout_ms=timeout_ms,
+                max_records=CONSUMER_BATCH_SIZE - len(messages),
+            )
+            for partition_messages in records.values():
+                messages.extend(msg.value for msg in partition_messages)
+
+        return messages
+
+    @staticmethod
+    def merge_tickers(messages: Iterable[bytes]) -> list[dict]:
+        """Merge tickers by symbol, the latest ticker wins"""
+        tickers = {}
+        for message in messages:
+            for ticker in load_tickers(message):
+                tickers[ticker["symbol"]] = ticker
+
+        return list(tickers.values())
+
+
+class HttpSender:
+    """Send tickers to the kafka endpoint of the web application"""
+
+    kafka_endpoint = f"{WEB_URL}{KAFKA_ENDPOINT}"
+
+    async def start(self):
+        self.session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(limit=CONSUMER_CONNECTION_LIMIT)
+        )
+
+        self.kafka_auth = KafkaAuth(self.session)
+        await self.kafka_auth.start()
+
+    async def stop(self):
+        await self.session.close()
+
+    async def send(self, tickers: list[dict]):
+        data = json.dumps(tickers)
+        for _ in range(2):
+            response = await self.session.put(
+                url=self.kafka_endpoint,
+                data=data,
+                headers={
+                    "Content-Type": "application/json",
+                    "Authorization": f"{HTTP_AUTH_KEYWORD} {self.kafka_auth.access_token}",
+                },
+            )
+            response.release()
+
+            if response.status == HTTP_401_UNAUTHORIZED:
+                await self.kafka_auth.refresh()
+
+                continue
+            break
+
+
+class CelerySender:
+    """Enqueue tickers handling directly to the celery queue"""
+
+    async def start(self):
+        django.setup()
+
+        from brokers.tasks import MessageBrokerHandler
+
+        self.handler = MessageBrokerHandler
+
+    async def stop(self):
+        ...
+
+    async def send(self, tickers: list[dict]):
+        await sync_to_async(self.handler.handle.delay)(tickers)
+
+
+class DirectSender:
+    """Update investments in the consumer process and enqueue orders matching"""
+
+    async def start(self):
+        django.setup()
+
+        from brokers.tasks import LimitOrderTrade, RecommendationScoring
+        from brokers.utils import InvestmentUpdateService
+
+        self.update_service = InvestmentUpdateService()
+        self.order_trade = LimitOrderTrade
+        self.scoring = RecommendationScoring
+
+    async def stop(self):
+        ...
+
+    async def send(self, tickers: list[dict]):
+        await sync_to_async(self.__handle)(tickers)
+
+    def __handle(self, tickers: list[dict]):
+        close_old_connections()
+
+        investment_ids = self.update_service.update(tickers)
+        if investment_ids:
+            self.order_trade.make_orders.delay(list(investment_ids))
+            self.scoring.schedule()
+
 
 class KafkaAuth:
     """Register, login and refresh tokens for kafka user"""
@@ -71,43 +184,44 @@ class KafkaAuth:
     access_token: str = None
     refresh_token: str = None
 
+    def __init__(self, session: aiohttp.ClientSession):
+        self.session = session
+
     async def start(self):
         await self.__register()
         await self.__login()
 
     async def refresh(self):
-        async with aiohttp.ClientSession() as session:
-            response = await session.post(
-                url=self.refresh_endpoint,
-                data={
-                    "refresh_token": self.refresh_token,
-                },
-            )
+        response = await self.session.post(
+            url=self.refresh_endpoint,
+            data={
+                "refresh_token": self.refresh_token,
+            },
+        )
 
-            await self.__set_tokens(response)
+        await self.__set_tokens(response)
 
     async def __register(self):
-        async with aiohttp.ClientSession() as session:
-            await session.post(
-                url=self.register_endpoint,
-                data={
-                    "email": KAFKA_EMAIL,
-                    "username": KAFKA_USERNAME,
-                    "password": KAFKA_PASSWORD,
-                },
-            )
+        response = await self.session.post(
+            url=self.register_endpoint,
+            data={
+                "email": KAFKA_EMAIL,
+                "username": KAFKA_USERNAME,
+                "password": KAFKA_PASSWORD,
+            },
+        )
+        response.release()
 
     async def __login(self):
-        async with aiohttp.ClientSession() as session:
-            response = await session.post(
-                url=self.login_endpoint,
-                data={
-                    "username": KAFKA_USERNAME,
-                    "password": KAFKA_PASSWORD,
-                },
-            )
+        response = await self.session.post(
+            url=self.login_endpoint,
+            data={
+                "username": KAFKA_USERNAME,
+                "password": KAFKA_PASSWORD,
+            },
+        )
 
-            await self.__set_tokens(response)
+        await self.__set_tokens(response)
 
     async def __set_tokens(self, response):
         if response.status == HTTP_200_OK:
@@ -116,6 +230,23 @@ class KafkaAuth:
             self.access_token = response_data["access_token"]
             self.refresh_token = response_data["refresh_token"]
 
+        response.release()
+
+
+def load_tickers(data: bytes | str) -> list[dict]:
+    tickers = json.loads(data)
+    if isinstance(tickers, dict):
+        return [tickers]
+
+    return tickers
+
+
+senders = {
+    "http": HttpSender,
+    "celery": CelerySender,
+    "direct": DirectSender,
+}
+
 
 async def consume():
     async with Consumer() as consumer:
@@ -2,6 +2,7 @@
 ASGI config for stock_market project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
+HTTP requests are served by Django, websocket connections by the price push.
 
 For more information on this file, see
 https://docs.djangoproject.com/en/5.0/howto/deployment/asgi/
@@ -13,4 +14,15 @@ from django.core.asgi import get_asgi_application
 
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "stock_market.settings")
 
-application = get_asgi_application()
+django_application = get_asgi_application()
+
+from brokers.websockets import PriceWebSocketApplication  # noqa: E402
+
+websocket_application = PriceWebSocketApplication()
+
+
+async def application(scope, receive, send):
+    if scope["type"] == "websocket":
+        return await websocket_application(scope, receive, send)
+
+    return await django_application(scope, receive, send)
@@ -56,9 +56,19 @@ MIDDLEWARE = [
     "django.contrib.auth.middleware.AuthenticationMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
+    "utils.middlewares.MetricsMiddleware",
     "users.middlewares.JWTAuthMiddleware",
 ]
 
+METRICS_ENABLED = env.bool("METRICS_ENABLED", default=False)
+# REMOTE_ADDR is the address of the last hop, behind a reverse proxy or docker's
+# userland proxy every client comes from a private network, so widen the
+# allowlist only together with METRICS_TOKEN
+METRICS_ALLOWED_NETWORKS = env.list(
+    "METRICS_ALLOWED_NETWORKS", default=["127.0.0.1/32"]
+)
+METRICS_TOKEN = env.str("METRICS_TOKEN", default="")
+
 ROOT_URLCONF = "stock_market.urls"
 
 TEMPLATES = [
@@ -146,15 +156,37 @@ JWT_SECRET_KEY = env.str("JWT_SECRET_KEY")
 JWT_ACCESS_TOKEN_EXPIRES_IN = env.int("JWT_ACCESS_TOKEN_EXPIRES_IN")
 JWT_REFRESH_TOKEN_EXPIRES_IN = env.int("JWT_REFRESH_TOKEN_EXPIRES_IN")
 JWT_ALGORITHM = env.str("JWT_ALGORITHM")
+TOKEN_CACHE_SIZE = env.int("TOKEN_CACHE_SIZE", default=4096)
 HTTP_AUTH_KEYWORD = env.str("HTTP_AUTH_KEYWORD")
 
 RECOMMENDATION_THRESHOLD = env.int("RECOMMENDATION_THRESHOLD")
 
+TRADE_PARTITIONS_AHEAD = env.int("TRADE_PARTITIONS_AHEAD", default=3)
+TRADE_ARCHIVE_AFTER_MONTHS = env.int("TRADE_ARCHIVE_AFTER_MONTHS", default=12)
+TRADE_ARCHIVE_SCHEMA = env.str("TRADE_ARCHIVE_SCHEMA", default="archive")
+
+TRANSACTION_RETRY_ATTEMPTS = env.int("TRANSACTION_RETRY_ATTEMPTS", default=3)
+TRANSACTION_RETRY_BACKOFF = env.float("TRANSACTION_RETRY_BACKOFF", default=0.05)
+
+LIMIT_ORDER_BOOK_ENABLED = env.bool("LIMIT_ORDER_BOOK_ENABLED", default=True)
+LIMIT_ORDER_MATCHING_PARALLEL = env.bool("LIMIT_ORDER_MATCHING_PARALLEL", default=False)
+
 EMAIL_BACKEND = env.str("EMAIL_BACKEND")
 EMAIL_HOST = env.str("EMAIL_HOST")
 EMAIL_PORT = env.int("EMAIL_PORT")
 EMAIL_HOST_USER = env.str("EMAIL_HOST_USER")
 EMAIL_HOST_PASSWORD = env.str("EMAIL_HOST_PASSWORD")
+EMAIL_USE_SSL = env.bool("EMAIL_USE_SSL", default=True)
+SMTP_POOL_SIZE = env.int("SMTP_POOL_SIZE", default=2)
+SMTP_KEEPALIVE = env.float("SMTP_KEEPALIVE", default=30)
+SMTP_TIMEOUT = env.float("SMTP_TIMEOUT", default=10)
+SMTP_CONCURRENCY = env.int("SMTP_CONCURRENCY", default=4)
+SMTP_RETRIES = env.int("SMTP_RETRIES", default=3)
+SMTP_RETRY_BACKOFF = env.float("SMTP_RETRY_BACKOFF", default=0.5)
+WELCOME_MAIL_BUFFER_WINDOW = env.float("WELCOME_MAIL_BUFFER_WINDOW", default=5)
+ORDER_DIGEST_WINDOW = env.float("ORDER_DIGEST_WINDOW", default=10)
+ORDER_DIGEST_BATCH_SIZE = env.int("ORDER_DIGEST_BATCH_SIZE", default=50)
+ORDER_DIGEST_RATE_LIMIT = env.str("ORDER_DIGEST_RATE_LIMIT", default="30/m")
 
 DEFAULT_FILE_STORAGE = env.str("AWS_FILE_STORAGE")
 AWS_ACCESS_KEY_ID = env.str("AWS_ACCESS_KEY_ID")
@@ -170,6 +202,45 @@ AWS_PRESIGNED_EXPIRY = env.int("AWS_PRESIGNED_EXPIRY")
 
 REDIS_HOST = env.str("REDIS_HOST")
 REDIS_PORT = env.str("REDIS_PORT")
+REDIS_URL = f"redis://{REDIS_HOST}:{REDIS_PORT}/0"
+
+CACHES = {
+    "default": {
+        "BACKEND": env.str(
+            "CACHE_BACKEND", default="django.core.cache.backends.redis.RedisCache"
+        ),
+        "LOCATION": f"redis://{REDIS_HOST}:{REDIS_PORT}/1",
+    }
+}
+
+TICKER_CACHE_TIMEOUT = env.int("TICKER_CACHE_TIMEOUT", default=300)
+INVESTMENT_CACHE_TIMEOUT = env.int("INVESTMENT_CACHE_TIMEOUT", default=300)
+INVESTMENT_LIST_CACHE_TIMEOUT = env.int("INVESTMENT_LIST_CACHE_TIMEOUT", default=5)
+PORTFOLIO_SUMMARY_CACHE_ENABLED = env.bool(
+    "PORTFOLIO_SUMMARY_CACHE_ENABLED", default=True
+)
+
+USER_CACHE_TIMEOUT = env.int("USER_CACHE_TIMEOUT", default=30)
+USER_CACHE_SIZE = env.int("USER_CACHE_SIZE", default=1024)
+USER_CACHE_SHARED = env.bool("USER_CACHE_SHARED", default=False)
+
+CANDLES_ENABLED = env.bool("CANDLES_ENABLED", default=True)
+CANDLES_MAX_POINTS = env.int("CANDLES_MAX_POINTS", default=1000)
+
+SCORING_ENABLED = env.bool("SCORING_ENABLED", default=True)
+SCORING_WINDOW = env.int("SCORING_WINDOW", default=60)
+SCORING_SHORT_WINDOW = env.int("SCORING_SHORT_WINDOW", default=5)
+SCORING_TIME_BUDGET = env.float("SCORING_TIME_BUDGET", default=0.5)
+
+PRICE_PUSH_ENABLED = env.bool("PRICE_PUSH_ENABLED", default=True)
+PRICE_PUSH_CHANNEL = env.str("PRICE_PUSH_CHANNEL", default="prices")
+PRICE_PUSH_QUEUE_SIZE = env.int("PRICE_PUSH_QUEUE_SIZE", default=100)
+PRICE_PUSH_AUTH_TIMEOUT = env.float("PRICE_PUSH_AUTH_TIMEOUT", default=10)
+
+STATSD_ENABLED = env.bool("STATSD_ENABLED", default=False)
+STATSD_HOST = env.str("STATSD_HOST", default="localhost")
+STATSD_PORT = env.int("STATSD_PORT", default=8125)
+STATSD_PREFIX = env.str("STATSD_PREFIX", default="stock_market")
 
 CELERY_BROKER_URL = f"redis://{REDIS_HOST}:{REDIS_PORT}/0"
 CELERY_RESULT_BACKEND = f"redis://{REDIS_HOST}:{REDIS_PORT}/0"
@@ -186,6 +257,11 @@ KAFKA_EMAIL = env.str("KAFKA_EMAIL")
 KAFKA_USERNAME = env.str("KAFKA_USERNAME")
 KAFKA_PASSWORD = env.str("KAFKA_PASSWORD")
 CONSUMER_GROUP = env.str("CONSUMER_GROUP")
+CONSUMER_INGESTION_MODE = env.str("CONSUMER_INGESTION_MODE", default="http")
+CONSUMER_BATCH_ENABLED = env.bool("CONSUMER_BATCH_ENABLED", default=False)
+CONSUMER_BATCH_SIZE = env.int("CONSUMER_BATCH_SIZE", default=500)
+CONSUMER_BATCH_TIMEOUT_MS = env.int("CONSUMER_BATCH_TIMEOUT_MS", default=200)
+CONSUMER_CONNECTION_LIMIT = env.int("CONSUMER_CONNECTION_LIMIT", default=10)
 
 WEB_HOST = env.str("WEB_HOST")
 WEB_PORT = env.int("WEB_PORT")
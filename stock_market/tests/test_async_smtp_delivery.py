@@ -0,0 +1,157 @@
+import asyncio
+from email.message import EmailMessage
+from unittest import mock
+
+from aiosmtpd.controller import Controller
+from brokers.models import FailedMail
+from brokers.tasks import Email
+from django.test import SimpleTestCase, TestCase
+from tests.utils import get_free_port
+from utils.smtp import AsyncSMTPDelivery, SMTPPool
+
+
+class FlakyHandler:
+    """Refuse "bad" recipients, "flaky" ones once, and delay every message"""
+
+    def __init__(self, delay: float = 0):
+        self.delay = delay
+        self.messages = []
+        self.sessions = set()
+        self.refused = set()
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def handle_RCPT(self, server, session, envelope, address, rcpt_options):
+        if address.startswith("bad"):
+            return "550 No such user"
+        if address.startswith("flaky") and address not in self.refused:
+            self.refused.add(address)
+            return "451 Try again later"
+
+        envelope.rcpt_tos.append(address)
+        return "250 OK"
+
+    async def handle_DATA(self, server, session, envelope):
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        await asyncio.sleep(self.delay)
+        self.in_flight -= 1
+        self.messages.extend(envelope.rcpt_tos)
+        self.sessions.add(session.peer)
+        return "250 OK"
+
+
+def new_messages(*recipients: str) -> list[EmailMessage]:
+    messages = []
+    for recipient in recipients:
+        message = EmailMessage()
+        message["From"] = "trade@example.com"
+        message["To"] = recipient
+        message["Subject"] = "Trade Platform"
+        message.set_content("Hi!")
+        messages.append(message)
+
+    return messages
+
+
+class SMTPServerMixin:
+    def start_server(self, delay: float = 0):
+        self.handler = FlakyHandler(delay)
+        controller = Controller(
+            self.handler, hostname="127.0.0.1", port=get_free_port()
+        )
+        controller.start()
+        self.addCleanup(controller.stop)
+
+        self.pool = SMTPPool(
+            controller.hostname, controller.port, use_ssl=False, backoff=0.01
+        )
+        self.addCleanup(self.pool.clear)
+
+        return AsyncSMTPDelivery(
+            controller.hostname, controller.port, use_ssl=False, backoff=0.01
+        )
+
+
+class AsyncSMTPDeliveryTest(SMTPServerMixin, SimpleTestCase):
+    def test_send_over_concurrent_connections(self):
+        delivery = self.start_server(delay=0.05)
+        delivery.concurrency = 3
+        recipients = [f"user{i}@example.com" for i in range(6)]
+
+        failures = delivery.send(new_messages(*recipients))
+
+        self.assertEqual(failures, [])
+        self.assertCountEqual(self.handler.messages, recipients)
+        self.assertEqual(len(self.handler.sessions), 3)
+
+    def test_retry_temporary_failure(self):
+        delivery = self.start_server()
+
+        failures = delivery.send(new_messages("flaky@example.com"))
+
+        self.assertEqual(failures, [])
+        self.assertEqual(self.handler.messages, ["flaky@example.com"])
+
+    def test_return_permanent_failure_without_retry(self):
+        delivery = self.start_server()
+
+        failures = delivery.send(new_messages("bad@example.com", "ok@example.com"))
+
+        self.assertEqual([failure.attempts for failure in failures], [1])
+        self.assertEqual(failures[0].message["To"], "bad@example.com")
+        self.assertEqual(self.handler.messages, ["ok@example.com"])
+
+    def test_deliver_in_parallel_up_to_concurrency(self):
+        delivery = self.start_server(delay=0.05)
+        messages = new_messages(*(f"user{i}@example.com" for i in range(8)))
+
+        delivery.concurrency = 1
+        delivery.send(messages)
+        sequential_max_in_flight = self.handler.max_in_flight
+
+        self.handler.max_in_flight = 0
+        delivery.concurrency = 4
+        delivery.send(messages)
+
+        self.assertEqual(sequential_max_in_flight, 1)
+        self.assertEqual(self.handler.max_in_flight, 4)
+
+
+class EmailDeadLetterTest(SMTPServerMixin, TestCase):
+    def setUp(self) -> None:
+        self.delivery = self.start_server()
+        patchers = (
+            mock.patch("brokers.tasks.settings.SMTP_CONCURRENCY", 2),
+            mock.patch("brokers.tasks.async_smtp_delivery", self.delivery),
+            mock.patch("brokers.tasks.smtp_pool", self.pool),
+        )
+        for patcher in patchers:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def test_store_undelivered_mails_of_small_batch(self):
+        with mock.patch.object(
+            self.delivery, "send", wraps=self.delivery.send
+        ) as delivery_send:
+            Email().send_welcome_mails(["bad@example.com", "ok@example.com"])
+
+        failed_mail = FailedMail.objects.get()
+
+        delivery_send.assert_not_called()
+        self.assertEqual(failed_mail.recipient, "bad@example.com")
+        self.assertIn("No such user", failed_mail.error)
+        self.assertEqual(self.handler.messages, ["ok@example.com"])
+
+    def test_store_undelivered_mails_of_large_batch(self):
+        recipients = ["bad@example.com", "ok1@example.com", "ok2@example.com"]
+
+        with mock.patch.object(self.pool, "send", wraps=self.pool.send) as pool_send:
+            Email().send_welcome_mails(recipients)
+
+        failed_mail = FailedMail.objects.get()
+
+        pool_send.assert_not_called()
+        self.assertEqual(failed_mail.recipient, "bad@example.com")
+        self.assertIn("No such user", failed_mail.error)
+        self.assertCountEqual(self.handler.messages, recipients[1:])
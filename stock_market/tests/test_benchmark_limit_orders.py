@@ -0,0 +1,24 @@
+import io
+
+from brokers.models import LimitOrder
+from django.core.management import call_command
+from django.test import TestCase
+
+
+class BenchmarkLimitOrdersTest(TestCase):
+    def test_sample_fewer_investments_than_requested(self):
+        stdout = io.StringIO()
+
+        call_command(
+            "benchmark_limit_orders",
+            "--orders",
+            "10",
+            "--investments",
+            "2",
+            "--samples",
+            "5",
+            stdout=stdout,
+        )
+
+        self.assertIn("matching:", stdout.getvalue())
+        self.assertFalse(LimitOrder.objects.exists())
@@ -0,0 +1,31 @@
+import io
+import json
+from unittest import mock
+
+from brokers.models import Investment
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase
+
+
+class BenchmarkPipelineTest(TestCase):
+    def setUp(self) -> None:
+        cache.clear()
+
+    @mock.patch("brokers.utils.PRICE_PUSH_ENABLED", False)
+    def test_report_operations_and_rollback_seeded_rows(self):
+        stdout = io.StringIO()
+
+        call_command(
+            "benchmark_pipeline", "--sizes", "2,3", "--samples", "2", stdout=stdout
+        )
+
+        report = json.loads(stdout.getvalue())
+
+        self.assertEqual(
+            [result["investments"] for result in report["results"]], [2, 3]
+        )
+        self.assertCountEqual(
+            report["results"][0]["operations"], ["update", "make_orders", "make"]
+        )
+        self.assertFalse(Investment.objects.exists())
@@ -0,0 +1,104 @@
+from datetime import datetime, timezone
+from decimal import Decimal
+from unittest import mock
+
+from brokers.factories import InvestmentFactory
+from brokers.models import Candle, CandleIntervals
+from brokers.utils import CandleService, InvestmentUpdateService
+from django.core.cache import cache
+from django.test import TestCase
+from tests.utils import TestUser
+
+
+class CandleServiceTest(TestCase):
+    def setUp(self) -> None:
+        # keep all prices in the same minute
+        now = datetime(2024, 1, 1, 12, 30, 15, tzinfo=timezone.utc)
+        patcher = mock.patch("brokers.utils.timezone.now", return_value=now)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        self.service = CandleService()
+        self.investment = InvestmentFactory(price=10)
+
+    def add_price(self, price: int):
+        self.investment.price = price
+        self.service.add_prices([self.investment])
+
+    def test_add_prices_creates_candles(self):
+        self.add_price(10)
+
+        candles = Candle.objects.filter(investment=self.investment)
+
+        self.assertCountEqual(
+            [candle.interval for candle in candles], CandleIntervals.values
+        )
+
+    def test_add_prices_updates_candles(self):
+        for price in (10, 12, 8, 11):
+            self.add_price(price)
+
+        candle = Candle.objects.get(
+            investment=self.investment, interval=CandleIntervals.MINUTE
+        )
+
+        self.assertEqual(candle.open, Decimal("10"))
+        self.assertEqual(candle.high, Decimal("12"))
+        self.assertEqual(candle.low, Decimal("8"))
+        self.assertEqual(candle.close, Decimal("11"))
+        self.assertEqual(candle.ticks, 4)
+
+    def test_ticker_update_adds_prices(self):
+        cache.clear()
+        ticker = {
+            "symbol": "BTCUSDT",
+            "best_bid_price": "10",
+            "price_change_percent": 1,
+        }
+        InvestmentUpdateService().update([ticker])
+
+        ticker["best_bid_price"] = "11"
+        InvestmentUpdateService().update([ticker])
+
+        candle = Candle.objects.get(
+            investment__name="BTCUSDT", interval=CandleIntervals.DAY
+        )
+
+        self.assertEqual(candle.close, Decimal("11"))
+        self.assertEqual(candle.ticks, 2)
+
+
+class CandleViewSetTest(TestCase):
+    def setUp(self) -> None:
+        self.investment = InvestmentFactory(price=10)
+        self.path = f"/v1/investments/{self.investment.id}/candles/"
+        self.test_user = TestUser()
+        CandleService().add_prices([self.investment])
+
+    def test_list_candles_ok(self):
+        token = self.test_user.get_user_token()
+
+        response = self.client.get(
+            self.path,
+            {"interval": CandleIntervals.MINUTE},
+            headers={"Authorization": f"Bearer {token}"},
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data), 1)
+        self.assertEqual(Decimal(response.data[0]["close"]), Decimal("10"))
+
+    def test_list_candles_with_too_long_range(self):
+        token = self.test_user.get_user_token()
+
+        response = self.client.get(
+            self.path,
+            {
+                "interval": CandleIntervals.MINUTE,
+                "started_from": "2020-01-01T00:00",
+                "started_to": "2024-01-01T00:00",
+            },
+            headers={"Authorization": f"Bearer {token}"},
+        )
+
+        self.assertEqual(response.status_code, 400)
@@ -0,0 +1,34 @@
+import json
+
+from consumer import Consumer
+from django.test import SimpleTestCase
+
+
+class ConsumerTest(SimpleTestCase):
+    def test_merge_tickers_latest_wins(self):
+        messages = [
+            json.dumps(
+                [
+                    {"symbol": "BTCUSDT", "best_bid_price": "1"},
+                    {"symbol": "ETHUSDT", "best_bid_price": "2"},
+                ]
+            ),
+            json.dumps([{"symbol": "BTCUSDT", "best_bid_price": "3"}]),
+        ]
+
+        result = Consumer.merge_tickers(messages)
+
+        self.assertEqual(
+            result,
+            [
+                {"symbol": "BTCUSDT", "best_bid_price": "3"},
+                {"symbol": "ETHUSDT", "best_bid_price": "2"},
+            ],
+        )
+
+    def test_merge_single_ticker_message(self):
+        messages = [json.dumps({"symbol": "BTCUSDT", "best_bid_price": "1"})]
+
+        result = Consumer.merge_tickers(messages)
+
+        self.assertEqual(result, [{"symbol": "BTCUSDT", "best_bid_price": "1"}])
@@ -1,12 +1,18 @@
+from decimal import Decimal
+
 from brokers.factories import InvestmentFactory, InvestmentPortfolioFactory
+from brokers.utils import InvestmentCacheService
+from django.core.cache import cache
 from django.test import TestCase
 from faker import Faker
 from tests.utils import TestUser
 from users.factories import UserFactory
+from utils.token import Token
 
 
 class InvestmentPortfolioViewSetTest(TestCase):
     def setUp(self) -> None:
+        cache.clear()
         self.path = "/v1/portfolios/"
         self.fake = Faker()
         self.new_portfolio = InvestmentPortfolioFactory
@@ -153,3 +159,66 @@ class InvestmentPortfolioViewSetTest(TestCase):
         self.assertEqual(response.status_code, 200)
         self.assertIsInstance(response.data, dict)
         self.assertEqual(response.data["spend_amount"], spend_amount)
+
+    def test_own_summary_ok(self):
+        user = UserFactory()
+        _ = self.new_portfolio(
+            owner=user,
+            investment=InvestmentFactory(price=10),
+            quantity=3,
+            spend_amount=20,
+        )
+        _ = self.new_portfolio(
+            owner=user,
+            investment=InvestmentFactory(price=5),
+            quantity=2,
+            spend_amount=15,
+        )
+        _ = self.new_portfolio(quantity=1)
+        token = Token(user).get_access_token()
+
+        response = self.client.get(
+            self.path + "own/summary/", headers={"Authorization": f"Bearer {token}"}
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["portfolios"], 2)
+        self.assertEqual(Decimal(response.data["market_value"]), Decimal("40"))
+        self.assertEqual(Decimal(response.data["cost_basis"]), Decimal("35"))
+        self.assertEqual(Decimal(response.data["unrealized_pnl"]), Decimal("5"))
+
+    def test_update_portfolio_refreshes_only_owner_summary(self):
+        user = UserFactory()
+        portfolio = self.new_portfolio(
+            owner=user,
+            investment=InvestmentFactory(price=10),
+            quantity=1,
+            spend_amount=10,
+        )
+        summary_path = self.path + "own/summary/"
+        user_headers = {"Authorization": f"Bearer {Token(user).get_access_token()}"}
+        admin_headers = {"Authorization": f"Bearer {self.test_user.get_admin_token()}"}
+
+        _ = self.client.get(summary_path, headers=user_headers)
+        _, version = InvestmentCacheService().get_list()
+
+        _ = self.client.put(
+            path=f"{self.path}{portfolio.id}/",
+            data={"quantity": 3},
+            content_type="application/json",
+            headers=admin_headers,
+        )
+        response = self.client.get(summary_path, headers=user_headers)
+
+        self.assertEqual(Decimal(response.data["market_value"]), Decimal("30"))
+        self.assertEqual(InvestmentCacheService().get_list()[1], version)
+
+    def test_own_summary_without_portfolios(self):
+        token = self.test_user.get_user_token()
+
+        response = self.client.get(
+            self.path + "own/summary/", headers={"Authorization": f"Bearer {token}"}
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(Decimal(response.data["market_value"]), Decimal("0"))
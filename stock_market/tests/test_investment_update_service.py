@@ -0,0 +1,74 @@
+from decimal import Decimal
+
+from brokers.models import Investment, Recommendation
+from brokers.utils import InvestmentService, InvestmentUpdateService
+from django.core.cache import cache
+from django.test import TestCase
+from faker import Faker
+
+
+class InvestmentUpdateServiceTest(TestCase):
+    def setUp(self) -> None:
+        cache.clear()
+        self.fake = Faker()
+        self.service = InvestmentUpdateService()
+
+    def new_ticker(self, symbol: str = None, price: str = None) -> dict:
+        return {
+            "symbol": symbol or self.fake.pystr(),
+            "best_bid_price": price or str(self.fake.pyint(min_value=1)),
+            "price_change_percent": self.fake.pyint(),
+        }
+
+    def test_update_creates_investments(self):
+        tickers = [self.new_ticker(), self.new_ticker()]
+
+        self.service.update(tickers)
+
+        self.assertEqual(Investment.objects.count(), 2)
+        self.assertEqual(Recommendation.objects.count(), 2)
+
+    def test_update_changed_ticker(self):
+        ticker = self.new_ticker(price="10")
+        self.service.update([ticker])
+
+        ticker["best_bid_price"] = "11"
+        self.service.update([ticker])
+
+        investment = Investment.objects.get(name=ticker["symbol"])
+
+        self.assertEqual(investment.price, Decimal("11"))
+
+    def test_update_skips_unchanged_tickers(self):
+        tickers = [self.new_ticker(), self.new_ticker()]
+        self.service.update(tickers)
+
+        with self.assertNumQueries(0):
+            self.service.update(tickers)
+
+    def test_update_after_investment_write(self):
+        ticker = self.new_ticker(price="10")
+        self.service.update([ticker])
+        investment = Investment.objects.get(name=ticker["symbol"])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            InvestmentService(
+                {"price": 20, "quantity": 1, "type": investment.type}, investment
+            ).update()
+        self.service.update([ticker])
+
+        investment.refresh_from_db()
+        self.assertEqual(investment.price, Decimal("10"))
+
+    def test_update_returns_price_changed_investments(self):
+        ticker = self.new_ticker(price="10")
+        other_ticker = self.new_ticker(price="10")
+        self.service.update([ticker, other_ticker])
+
+        ticker["best_bid_price"] = "11"
+        other_ticker["price_change_percent"] += 1
+        result = self.service.update([ticker, other_ticker])
+
+        investment = Investment.objects.get(name=ticker["symbol"])
+
+        self.assertEqual(result, {investment.id})
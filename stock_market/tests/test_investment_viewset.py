@@ -1,5 +1,7 @@
-from brokers.factories import InvestmentFactory
+from brokers.factories import InvestmentFactory, RecommendationFactory
 from brokers.models import InvestmentTypes
+from brokers.utils import InvestmentCacheService, InvestmentUpdateService
+from django.core.cache import cache
 from django.test import TestCase
 from faker import Faker
 from tests.utils import TestUser
@@ -7,6 +9,7 @@ from tests.utils import TestUser
 
 class InvestmentViewSetTest(TestCase):
     def setUp(self) -> None:
+        cache.clear()
         self.path = "/v1/investments/"
         self.fake = Faker()
         self.new_investment = InvestmentFactory
@@ -24,6 +27,72 @@ class InvestmentViewSetTest(TestCase):
         self.assertIsInstance(response.data, list)
         self.assertIsInstance(response.data[0], dict)
 
+    def test_list_investment_from_cache(self):
+        investment = self.new_investment(price=10)
+        token = self.test_user.get_admin_token()
+        headers = {"Authorization": f"Bearer {token}"}
+        self.client.get(self.path, headers=headers)
+
+        with self.assertNumQueries(0):
+            response = self.client.get(self.path, headers=headers)
+
+        self.assertEqual(response.data[0]["id"], investment.id)
+
+    def test_list_investment_after_ticker_update(self):
+        investment = self.new_investment(price=10)
+        _ = RecommendationFactory(investment=investment)
+        token = self.test_user.get_admin_token()
+        headers = {"Authorization": f"Bearer {token}"}
+        self.client.get(self.path, headers=headers)
+
+        self.update_price(investment.name, "11")
+        cached_response = self.client.get(self.path, headers=headers)
+        cache.delete(InvestmentCacheService.list_key)
+        response = self.client.get(self.path, headers=headers)
+
+        self.assertEqual(cached_response.data[0]["price"], "10.00")
+        self.assertEqual(response.data[0]["price"], "11.00")
+
+    def test_retrieve_investment_after_ticker_update(self):
+        investment, other_investment = self.new_investment(), self.new_investment()
+        _ = RecommendationFactory(investment=investment)
+        token = self.test_user.get_admin_token()
+        headers = {"Authorization": f"Bearer {token}"}
+        path, other_path = (
+            f"{self.path}{item.id}/" for item in (investment, other_investment)
+        )
+        self.client.get(path, headers=headers)
+        self.client.get(other_path, headers=headers)
+
+        self.update_price(investment.name, "11")
+        response = self.client.get(path, headers=headers)
+        with self.assertNumQueries(0):
+            self.client.get(other_path, headers=headers)
+
+        self.assertEqual(response.data["price"], "11.00")
+
+    def test_list_investment_after_update(self):
+        investment = self.new_investment()
+        token = self.test_user.get_admin_token()
+        headers = {"Authorization": f"Bearer {token}"}
+        self.client.get(self.path, headers=headers)
+
+        self.client.put(
+            path=f"{self.path}{investment.id}/",
+            data={"price": 11, "quantity": 1, "type": investment.type},
+            content_type="application/json",
+            headers=headers,
+        )
+        response = self.client.get(self.path, headers=headers)
+
+        self.assertEqual(response.data[0]["price"], "11.00")
+
+    @staticmethod
+    def update_price(name: str, price: str):
+        InvestmentUpdateService().update(
+            [{"symbol": name, "best_bid_price": price, "price_change_percent": 1}]
+        )
+
     def test_create_investment_ok(self):
         token = self.test_user.get_admin_token()
 
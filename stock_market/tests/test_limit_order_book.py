@@ -0,0 +1,216 @@
+from decimal import Decimal
+from unittest import mock
+
+from brokers.factories import (
+    InvestmentFactory,
+    InvestmentPortfolioFactory,
+    LimitOrderFactory,
+)
+from brokers.models import LimitOrder, OrderActivatedStatuses, OrderStatuses
+from brokers.order_book import LimitOrderBook, OrderBook, limit_order_book
+from brokers.tasks import LimitOrderTrade, Sender
+from django.test import TestCase
+
+
+class OrderBookTest(TestCase):
+    def setUp(self) -> None:
+        self.book = OrderBook()
+        self.book.add(1, OrderActivatedStatuses.LTE, Decimal("10"), 1)
+        self.book.add(2, OrderActivatedStatuses.EQUAL, Decimal("10"), 1)
+        self.book.add(3, OrderActivatedStatuses.LT, Decimal("10"), 1)
+        self.book.add(4, OrderActivatedStatuses.GTE, Decimal("10"), 1)
+        self.book.add(5, OrderActivatedStatuses.GT, Decimal("10"), 1)
+
+    def test_get_triggered_at_order_price(self):
+        result = self.book.get_triggered(Decimal("10"), max_quantity=1)
+
+        self.assertCountEqual(result, [1, 2, 4])
+
+    def test_get_triggered_below_order_price(self):
+        result = self.book.get_triggered(Decimal("9"), max_quantity=1)
+
+        self.assertCountEqual(result, [1, 2, 3])
+
+    def test_get_triggered_above_order_price(self):
+        result = self.book.get_triggered(Decimal("11"), max_quantity=1)
+
+        self.assertCountEqual(result, [4, 5])
+
+    def test_get_triggered_with_insufficient_quantity(self):
+        result = self.book.get_triggered(Decimal("10"), max_quantity=0)
+
+        self.assertEqual(result, [])
+
+    def test_remove_order(self):
+        self.book.remove(1)
+
+        result = self.book.get_triggered(Decimal("10"), max_quantity=1)
+
+        self.assertCountEqual(result, [2, 4])
+
+    def test_readd_order_with_new_price(self):
+        self.book.add(1, OrderActivatedStatuses.LTE, Decimal("5"), 1)
+
+        result = self.book.get_triggered(Decimal("10"), max_quantity=1)
+
+        self.assertEqual(len(self.book), 5)
+        self.assertCountEqual(result, [2, 4])
+
+
+class LimitOrderBookTest(TestCase):
+    def setUp(self) -> None:
+        self.book = LimitOrderBook()
+        self.new_order = LimitOrderFactory
+
+    def test_load_active_orders(self):
+        active_order = self.new_order(status=OrderStatuses.ACTIVE)
+        _ = self.new_order(status=OrderStatuses.CANCELED)
+
+        self.book.load()
+
+        self.assertEqual(self.book.investment_ids, [active_order.investment_id])
+
+    def test_refresh_changed_orders(self):
+        order = self.new_order(status=OrderStatuses.ACTIVE)
+        self.book.load()
+
+        order.status = OrderStatuses.CANCELED
+        order.save()
+        new_order = self.new_order(status=OrderStatuses.ACTIVE)
+        self.book.refresh()
+
+        self.assertEqual(self.book.investment_ids, [new_order.investment_id])
+
+    def test_sync_order(self):
+        order = self.new_order(
+            status=OrderStatuses.ACTIVE,
+            activated_status=OrderActivatedStatuses.LTE,
+            price=10,
+            quantity=1,
+        )
+        self.book.load()
+
+        order.price = 5
+        self.book.sync(order)
+
+        result = self.book.get_triggered(order.investment_id, Decimal("10"), 1)
+
+        self.assertEqual(result, [])
+
+
+class LimitOrderTradeTest(TestCase):
+    def setUp(self) -> None:
+        limit_order_book.load()
+
+    def test_make_triggered_orders(self):
+        investment = InvestmentFactory(price=10, quantity=10)
+        portfolio = InvestmentPortfolioFactory(investment=investment)
+        portfolio.owner.balance = 100
+        portfolio.owner.save()
+
+        order = LimitOrderFactory(
+            investment=investment,
+            portfolio=portfolio,
+            status=OrderStatuses.ACTIVE,
+            activated_status=OrderActivatedStatuses.LTE,
+            price=10,
+            quantity=1,
+        )
+        not_triggered_order = LimitOrderFactory(
+            investment=investment,
+            portfolio=portfolio,
+            status=OrderStatuses.ACTIVE,
+            activated_status=OrderActivatedStatuses.GT,
+            price=10,
+            quantity=1,
+        )
+
+        with mock.patch.object(Sender.send_mass_mail, "delay") as send_mass_mail:
+            LimitOrderTrade.make_orders()
+
+        order.refresh_from_db()
+        not_triggered_order.refresh_from_db()
+
+        self.assertEqual(order.status, OrderStatuses.COMPLETED)
+        self.assertEqual(not_triggered_order.status, OrderStatuses.ACTIVE)
+        self.assertEqual(
+            LimitOrder.objects.filter(status=OrderStatuses.COMPLETED).count(), 1
+        )
+        send_mass_mail.assert_called_once()
+
+    def test_make_investment_orders(self):
+        investment = InvestmentFactory(price=10, quantity=10)
+        order = LimitOrderFactory(
+            investment=investment,
+            status=OrderStatuses.ACTIVE,
+            activated_status=OrderActivatedStatuses.LTE,
+            price=10,
+            quantity=1,
+        )
+        order.portfolio.owner.balance = 100
+        order.portfolio.owner.save()
+
+        with mock.patch.object(Sender.send_mass_mail, "delay"):
+            LimitOrderTrade.make_investment_orders(investment.id)
+
+        order.refresh_from_db()
+
+        self.assertEqual(order.status, OrderStatuses.COMPLETED)
+
+    def test_make_investment_orders_of_given_ids_without_refresh(self):
+        investment = InvestmentFactory(price=10, quantity=10)
+        orders = [
+            LimitOrderFactory(
+                investment=investment,
+                status=OrderStatuses.ACTIVE,
+                activated_status=OrderActivatedStatuses.LTE,
+                price=10,
+                quantity=1,
+            )
+            for _ in range(2)
+        ]
+        for order in orders:
+            order.portfolio.owner.balance = 100
+            order.portfolio.owner.save()
+
+        with (
+            mock.patch.object(limit_order_book, "refresh") as refresh,
+            mock.patch.object(Sender.send_mass_mail, "delay"),
+        ):
+            LimitOrderTrade.make_investment_orders(investment.id, [orders[0].id])
+
+        for order in orders:
+            order.refresh_from_db()
+
+        refresh.assert_not_called()
+        self.assertEqual(orders[0].status, OrderStatuses.COMPLETED)
+        self.assertEqual(orders[1].status, OrderStatuses.ACTIVE)
+
+    def test_make_orders_in_parallel(self):
+        investment = InvestmentFactory(price=10, quantity=10)
+        order = LimitOrderFactory(
+            investment=investment,
+            status=OrderStatuses.ACTIVE,
+            activated_status=OrderActivatedStatuses.LTE,
+            price=10,
+            quantity=1,
+        )
+        _ = LimitOrderFactory(
+            investment=InvestmentFactory(price=10, quantity=10),
+            status=OrderStatuses.ACTIVE,
+            activated_status=OrderActivatedStatuses.GT,
+            price=10,
+            quantity=1,
+        )
+        limit_order_book.load()
+
+        with (
+            mock.patch("brokers.tasks.LIMIT_ORDER_MATCHING_PARALLEL", True),
+            mock.patch("brokers.tasks.group") as shards,
+        ):
+            LimitOrderTrade.make_orders()
+
+        tasks = list(shards.call_args.args[0])
+
+        self.assertEqual([task.args for task in tasks], [(investment.id, [order.id])])
+        shards.return_value.apply_async.assert_called_once()
@@ -0,0 +1,126 @@
+from unittest import mock
+
+from brokers.factories import InvestmentFactory
+from brokers.models import Investment
+from brokers.serializers import InvestmentRetrieveSerializer
+from django.core.cache import cache
+from django.test import TestCase
+from rest_framework.serializers import BaseSerializer, ListSerializer
+from tests.utils import TestUser
+from utils.metrics import COUNT_BUCKETS, MetricsRegistry, registry
+from utils.middlewares import RequestTimings, current_timings
+from utils.mixins import get_timed_serializer_class
+
+
+class MetricsRegistryTest(TestCase):
+    def setUp(self) -> None:
+        self.registry = MetricsRegistry()
+
+    def test_render_counter(self):
+        counter = self.registry.counter("tasks_total", "Tasks", ("task",))
+        counter.inc(task="handle")
+        counter.inc(task="handle")
+
+        result = self.registry.render()
+
+        self.assertIn("# TYPE tasks_total counter", result)
+        self.assertIn('tasks_total{task="handle"} 2.0', result)
+
+    def test_render_cumulative_histogram(self):
+        histogram = self.registry.histogram(
+            "queries", "Queries", ("view",), buckets=COUNT_BUCKETS
+        )
+        histogram.observe(1, view="list")
+        histogram.observe(3, view="list")
+
+        result = self.registry.render()
+
+        self.assertIn('queries_bucket{view="list",le="1"} 1', result)
+        self.assertIn('queries_bucket{view="list",le="5"} 2', result)
+        self.assertIn('queries_bucket{view="list",le="+Inf"} 2', result)
+        self.assertIn('queries_sum{view="list"} 4', result)
+        self.assertIn('queries_count{view="list"} 2', result)
+
+
+class MetricsMiddlewareTest(TestCase):
+    def setUp(self) -> None:
+        cache.clear()
+        self.path = "/v1/investments/"
+        self.test_user = TestUser()
+
+    @mock.patch("utils.middlewares.METRICS_ENABLED", True)
+    def test_record_request_metrics(self):
+        _ = InvestmentFactory()
+        token = self.test_user.get_admin_token()
+
+        response = self.client.get(
+            self.path, headers={"Authorization": f"Bearer {token}"}
+        )
+
+        self.assertRegex(response.headers["Server-Timing"], r'db;dur=[\d.]+;desc="\d+ ')
+        self.assertIn("serializer;dur=", response.headers["Server-Timing"])
+        self.assertIn(
+            'http_request_queries_count{view="InvestmentViewSet",action="list"}',
+            registry.render(),
+        )
+
+        self.assertFalse(hasattr(BaseSerializer.is_valid, "__wrapped__"))
+
+    def test_timed_list_serializer(self):
+        _ = InvestmentFactory.create_batch(2)
+        serializer_class = get_timed_serializer_class(InvestmentRetrieveSerializer)
+        timings = RequestTimings()
+        token = current_timings.set(timings)
+
+        try:
+            serializer = serializer_class(Investment.objects.all(), many=True)
+            data = serializer.data
+        finally:
+            current_timings.reset(token)
+
+        self.assertIsInstance(serializer, ListSerializer)
+        self.assertEqual(len(data), 2)
+        self.assertGreater(timings.serializer, 0)
+        self.assertEqual(timings.serializer_depth, 0)
+        self.assertEqual(serializer_class.__name__, "InvestmentRetrieveSerializer")
+
+    def test_disabled_middleware(self):
+        response = self.client.get(self.path)
+
+        self.assertNotIn("Server-Timing", response.headers)
+
+    @mock.patch("utils.metrics.METRICS_ENABLED", True)
+    def test_metrics_endpoint(self):
+        response = self.client.get("/metrics/")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(
+            b"# TYPE http_request_duration_seconds histogram", response.content
+        )
+
+    @mock.patch("utils.metrics.METRICS_ENABLED", True)
+    def test_metrics_endpoint_outside_allowed_networks(self):
+        response = self.client.get("/metrics/", REMOTE_ADDR="172.17.0.1")
+
+        self.assertEqual(response.status_code, 404)
+
+    @mock.patch("utils.metrics.METRICS_ENABLED", True)
+    @mock.patch("utils.metrics.METRICS_TOKEN", "secret")
+    def test_metrics_endpoint_requires_token(self):
+        response = self.client.get("/metrics/")
+        authorized_response = self.client.get(
+            "/metrics/", headers={"Authorization": "Bearer secret"}
+        )
+
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(authorized_response.status_code, 200)
+
+    def test_metrics_endpoint_disabled(self):
+        response = self.client.get("/metrics/")
+
+        self.assertEqual(response.status_code, 404)
+
+    def test_short_path_requires_authentication(self):
+        response = self.client.get("/")
+
+        self.assertEqual(response.status_code, 401)
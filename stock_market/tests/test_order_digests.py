@@ -0,0 +1,63 @@
+import json
+from unittest import mock
+
+from brokers.tasks import Email, Sender
+from django.test import SimpleTestCase
+
+
+class OrderDigestTest(SimpleTestCase):
+    def setUp(self) -> None:
+        self.orders = [
+            {"investment": "BTC", "quantity": 1, "recipient": "a@example.com"},
+            {"investment": "BTC", "quantity": 2, "recipient": "a@example.com"},
+            {"investment": "ETH", "quantity": 1, "recipient": "a@example.com"},
+            {"investment": "ETH", "quantity": 5, "recipient": "b@example.com"},
+        ]
+
+    @mock.patch("brokers.tasks.settings.ORDER_DIGEST_WINDOW", 0)
+    @mock.patch("brokers.tasks.smtp_pool")
+    def test_send_one_digest_per_recipient(self, pool):
+        pool.send.return_value = []
+
+        Sender.send_mass_mail(self.orders)
+
+        messages = pool.send.call_args.args[0]
+        content = messages[0].get_content()
+
+        self.assertEqual(
+            [message["To"] for message in messages], ["a@example.com", "b@example.com"]
+        )
+        self.assertIn("- BTC: 3\n- ETH: 1\n", content)
+
+    @mock.patch("brokers.tasks.order_mail_buffer")
+    @mock.patch.object(Sender.send_buffered_digests, "apply_async")
+    def test_buffer_orders_and_schedule_flush_once(self, apply_async, buffer):
+        buffer.add.side_effect = [True, False]
+
+        Sender.send_mass_mail(self.orders[:2])
+        Sender.send_mass_mail(self.orders[2:])
+
+        self.assertEqual(json.loads(buffer.add.call_args.args[0]), self.orders[2])
+        apply_async.assert_called_once()
+
+    @mock.patch("brokers.tasks.settings.ORDER_DIGEST_BATCH_SIZE", 1)
+    @mock.patch("brokers.tasks.order_mail_buffer")
+    @mock.patch.object(Sender.send_digests, "delay")
+    def test_queue_digests_in_batches(self, send_digests, buffer):
+        buffer.pop_all.return_value = [json.dumps(order) for order in self.orders]
+
+        Sender.send_buffered_digests()
+
+        self.assertEqual(
+            [call.args[0] for call in send_digests.call_args_list],
+            [{"a@example.com": {"BTC": 3, "ETH": 1}}, {"b@example.com": {"ETH": 5}}],
+        )
+
+    def test_render_without_escaping(self):
+        with mock.patch("brokers.tasks.smtp_pool") as pool:
+            pool.send.return_value = []
+            Email().send_order_digests({"a@example.com": {"S&P": 1}})
+
+        message = pool.send.call_args.args[0][0]
+
+        self.assertIn("- S&P: 1", message.get_content())
@@ -0,0 +1,156 @@
+import asyncio
+import json
+from unittest import mock
+
+from brokers.factories import InvestmentFactory
+from brokers.utils import InvestmentUpdateService
+from brokers.websockets import PriceConnection, PriceFanout, price_fanout
+from django.core.cache import cache
+from django.test import TestCase
+from users.factories import UserFactory
+from utils.token import Token
+
+
+class PricePublisherTest(TestCase):
+    def setUp(self) -> None:
+        cache.clear()
+        self.service = InvestmentUpdateService()
+        self.ticker = {
+            "symbol": "BTCUSDT",
+            "best_bid_price": "10",
+            "price_change_percent": 1,
+        }
+
+    @mock.patch("brokers.utils.get_redis")
+    def test_publish_changed_prices(self, get_redis):
+        self.service.update([self.ticker])
+
+        self.ticker["best_bid_price"] = "11"
+        investment_ids = self.service.update([self.ticker])
+
+        channel, message = get_redis.return_value.publish.call_args.args
+        prices = json.loads(message)
+
+        self.assertEqual([price["id"] for price in prices], list(investment_ids))
+        self.assertEqual(prices[0]["price"], "11")
+
+
+class PriceFanoutTest(TestCase):
+    def test_dispatch_to_subscribed_connections(self):
+        fanout = PriceFanout()
+        connection, other_connection = mock.Mock(), mock.Mock()
+        fanout.connections[1] = {connection}
+        fanout.connections[2] = {other_connection}
+
+        fanout.dispatch([{"id": 1}, {"id": 3}])
+
+        connection.push.assert_called_once_with({"type": "prices", "data": [{"id": 1}]})
+        other_connection.push.assert_not_called()
+
+    async def test_reconnect_and_skip_malformed_messages(self):
+        fanout = PriceFanout()
+        fanout.min_reconnect_delay = 0
+        connection = mock.Mock()
+        fanout.connections[1] = {connection}
+        delivered = asyncio.Event()
+        connection.push.side_effect = lambda message: delivered.set()
+
+        async def broken_listen():
+            raise ConnectionError("Connection reset by peer")
+            yield
+
+        async def listen():
+            yield {"data": "not json"}
+            yield {"data": json.dumps([{"id": 1}])}
+            await asyncio.Event().wait()
+
+        clients = [mock.MagicMock(), mock.MagicMock()]
+        for client, listen_messages in zip(clients, (broken_listen, listen)):
+            pubsub = client.pubsub.return_value
+            pubsub.subscribe = pubsub.aclose = client.aclose = mock.AsyncMock()
+            pubsub.listen = listen_messages
+
+        with (
+            mock.patch("brokers.websockets.get_async_redis", side_effect=clients),
+            self.assertLogs("brokers.websockets", "WARNING") as logs,
+        ):
+            task = asyncio.create_task(fanout.listen())
+            await asyncio.wait_for(delivered.wait(), timeout=1)
+            task.cancel()
+            with self.assertRaises(asyncio.CancelledError):
+                await task
+
+        connection.push.assert_called_once_with({"type": "prices", "data": [{"id": 1}]})
+        self.assertEqual(len(logs.records), 2)
+
+
+class PriceConnectionTest(TestCase):
+    def setUp(self) -> None:
+        self.user = UserFactory()
+        self.investment = InvestmentFactory()
+        self.user.subscriptions.add(self.investment)
+
+    async def connect(self, messages: list[dict]):
+        received = asyncio.Queue()
+        for message in [{"type": "websocket.connect"}, *messages]:
+            received.put_nowait(message)
+        sent = []
+
+        async def receive():
+            if received.empty():
+                await asyncio.sleep(0.01)
+                return {"type": "websocket.disconnect"}
+            return await received.get()
+
+        async def send(message):
+            sent.append(message)
+
+        await PriceConnection({"type": "websocket"}, receive, send)()
+
+        return sent
+
+    @staticmethod
+    def get_message(data: dict) -> dict:
+        return {"type": "websocket.receive", "text": json.dumps(data)}
+
+    def get_authenticate_message(self) -> dict:
+        token = Token(self.user).get_access_token()
+        return self.get_message({"action": "authenticate", "token": token})
+
+    @mock.patch.object(PriceFanout, "listen", new_callable=mock.AsyncMock)
+    async def test_subscribe_to_user_subscriptions(self, _):
+        message = {"action": "subscribe", "subscriptions": True}
+
+        sent = await self.connect(
+            [self.get_authenticate_message(), self.get_message(message)]
+        )
+
+        self.assertEqual(sent[0], {"type": "websocket.accept"})
+        self.assertEqual(
+            json.loads(sent[1]["text"]),
+            {"type": "subscriptions", "investments": [self.investment.id]},
+        )
+        self.assertNotIn(self.investment.id, price_fanout.connections)
+
+    async def test_reject_invalid_token(self):
+        sent = await self.connect(
+            [self.get_message({"action": "authenticate", "token": "invalid"})]
+        )
+
+        self.assertEqual(
+            sent,
+            [{"type": "websocket.accept"}, {"type": "websocket.close", "code": 4401}],
+        )
+
+    async def test_reject_message_before_authentication(self):
+        sent = await self.connect(
+            [self.get_message({"action": "subscribe", "investments": [1]})]
+        )
+
+        self.assertEqual(sent[-1], {"type": "websocket.close", "code": 4401})
+
+    @mock.patch("brokers.websockets.PRICE_PUSH_AUTH_TIMEOUT", 0)
+    async def test_reject_authentication_timeout(self):
+        sent = await self.connect([])
+
+        self.assertEqual(sent[-1], {"type": "websocket.close", "code": 4401})
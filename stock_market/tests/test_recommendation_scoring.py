@@ -0,0 +1,129 @@
+from datetime import datetime, timedelta, timezone
+from unittest import mock, skipUnless
+
+import numpy as np
+from brokers.factories import RecommendationFactory
+from brokers.models import Candle, CandleIntervals
+from brokers.scoring import RecommendationScorer
+from brokers.tasks import RecommendationScoring
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+
+
+class RecommendationScorerTest(TestCase):
+    def setUp(self) -> None:
+        self.now = datetime(2024, 1, 1, 12, 30, 15, tzinfo=timezone.utc)
+        patcher = mock.patch("brokers.scoring.timezone.now", return_value=self.now)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        self.scorer = RecommendationScorer(window=5, short_window=2, time_budget=10)
+
+    def new_candles(self, investment, closes: list):
+        ended_at = self.now.replace(second=0)
+        for minutes_ago, close in enumerate(reversed(closes)):
+            if close is None:
+                continue
+            Candle.objects.create(
+                investment=investment,
+                interval=CandleIntervals.MINUTE,
+                started_at=ended_at - timedelta(minutes=minutes_ago),
+                open=close,
+                high=close,
+                low=close,
+                close=close,
+            )
+
+    def test_get_prices_fills_missing_minutes(self):
+        recommendation = RecommendationFactory()
+        self.new_candles(recommendation.investment, [None, 10, None, 12, None])
+
+        investment_ids, prices = self.scorer.get_prices(self.now)
+
+        self.assertEqual(investment_ids, [recommendation.investment_id])
+        np.testing.assert_array_equal(prices, [[np.nan, 10, 10, 12, 12]])
+
+    def test_compute_prefers_falling_prices(self):
+        prices = np.array([[10, 10, 10, 10, 10], [10, 9, 8, 7, 6], [6, 7, 8, 9, 10]])
+
+        scores = self.scorer.compute(prices.astype(float))
+
+        self.assertEqual(scores[0], 0)
+        self.assertGreater(scores[1], 0)
+        self.assertLess(scores[2], 0)
+
+    def test_score_writes_all_recommendations(self):
+        falling, rising = RecommendationFactory(), RecommendationFactory()
+        unscored = RecommendationFactory()
+        self.new_candles(falling.investment, [10, 9, 8, 7, 6])
+        self.new_candles(rising.investment, [6, 7, 8, 9, 10])
+
+        result = self.scorer.score()
+
+        for recommendation in (falling, rising, unscored):
+            recommendation.refresh_from_db()
+
+        self.assertEqual(result, 2)
+        self.assertGreater(falling.score, 0)
+        self.assertLess(rising.score, 0)
+        self.assertIsNone(unscored.score)
+
+    def test_score_skips_write_over_time_budget(self):
+        recommendation = RecommendationFactory()
+        self.new_candles(recommendation.investment, [10, 9])
+        self.scorer.time_budget = 0
+
+        result = self.scorer.score()
+
+        recommendation.refresh_from_db()
+
+        self.assertEqual(result, 0)
+        self.assertIsNone(recommendation.score)
+
+    def test_score_skips_compute_over_time_budget(self):
+        recommendation = RecommendationFactory()
+        self.new_candles(recommendation.investment, [10, 9])
+        self.scorer.time_budget = 0
+
+        with mock.patch.object(self.scorer, "compute") as compute:
+            result = self.scorer.score()
+
+        self.assertEqual(result, 0)
+        compute.assert_not_called()
+
+    @skipUnless(connection.vendor == "postgresql", "Statement timeout of PostgreSQL")
+    def test_score_cancels_prices_query_over_time_budget(self):
+        recommendation = RecommendationFactory()
+        self.new_candles(recommendation.investment, [10, 9])
+        self.scorer.time_budget = 0.01
+
+        def get_prices(now):
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT pg_sleep(1)")
+
+        with mock.patch.object(self.scorer, "get_prices", get_prices):
+            result = self.scorer.score()
+
+        self.assertEqual(result, 0)
+        self.assertEqual(self.scorer.score(), 1)
+
+
+class RecommendationScoringTest(TestCase):
+    def setUp(self) -> None:
+        cache.clear()
+
+    @mock.patch.object(RecommendationScorer, "score")
+    def test_skip_when_scoring_is_running(self, score):
+        cache.add(RecommendationScoring.lock_key, 1)
+
+        RecommendationScoring.score()
+
+        score.assert_not_called()
+
+    @mock.patch.object(RecommendationScorer, "score")
+    def test_release_lock(self, score):
+        RecommendationScoring.score()
+
+        score.assert_called_once()
+        self.assertIsNone(cache.get(RecommendationScoring.lock_key))
@@ -0,0 +1,128 @@
+import socket
+from email.message import EmailMessage
+from unittest import mock
+
+from aiosmtpd.controller import Controller
+from brokers.tasks import Sender
+from django.test import SimpleTestCase
+from tests.utils import get_free_port
+from utils.smtp import SMTPPool
+
+
+class RecordingHandler:
+    def __init__(self):
+        self.messages = []
+        self.sessions = set()
+        self.deferred = set()
+
+    async def handle_DATA(self, server, session, envelope):
+        recipient = envelope.rcpt_tos[0]
+        if recipient.startswith("bad"):
+            return "554 Message rejected"
+        if recipient.startswith("flaky") and recipient not in self.deferred:
+            self.deferred.add(recipient)
+            return "451 Try again later"
+
+        self.messages.append(envelope.rcpt_tos)
+        self.sessions.add(session.peer)
+        return "250 OK"
+
+
+class SMTPPoolTest(SimpleTestCase):
+    def setUp(self) -> None:
+        self.handler = RecordingHandler()
+        self.controller = Controller(
+            self.handler, hostname="127.0.0.1", port=get_free_port()
+        )
+        self.controller.start()
+        self.addCleanup(self.controller.stop)
+
+        self.pool = SMTPPool(
+            self.controller.hostname, self.controller.port, use_ssl=False
+        )
+        self.addCleanup(self.pool.clear)
+
+    def new_messages(self, *recipients: str) -> list[EmailMessage]:
+        messages = []
+        for recipient in recipients:
+            message = EmailMessage()
+            message["From"] = "trade@example.com"
+            message["To"] = recipient
+            message.set_content("Hi!")
+            messages.append(message)
+
+        return messages
+
+    def test_send_over_one_session(self):
+        self.pool.send(self.new_messages("a@example.com", "b@example.com"))
+        self.pool.send(self.new_messages("c@example.com"))
+
+        self.assertEqual(len(self.handler.messages), 3)
+        self.assertEqual(len(self.handler.sessions), 1)
+
+    def test_replace_dead_idle_connection(self):
+        self.pool.send(self.new_messages("a@example.com"))
+        self.pool.keepalive = 0
+        self.pool.idle[0][1].sock.shutdown(socket.SHUT_RDWR)
+
+        self.pool.send(self.new_messages("b@example.com"))
+
+        self.assertEqual(len(self.handler.messages), 2)
+        self.assertEqual(len(self.handler.sessions), 2)
+
+    def test_reconnect_on_send_failure(self):
+        self.pool.send(self.new_messages("a@example.com"))
+        self.pool.idle[0][1].sock.shutdown(socket.SHUT_RDWR)
+
+        self.pool.send(self.new_messages("b@example.com"))
+
+        self.assertEqual(self.handler.messages[-1], ["b@example.com"])
+        self.assertEqual(len(self.handler.sessions), 2)
+
+    def test_continue_after_rejected_message(self):
+        failures = self.pool.send(
+            self.new_messages("a@example.com", "bad@example.com", "c@example.com")
+        )
+
+        self.assertEqual(
+            [failure.message["To"] for failure in failures], ["bad@example.com"]
+        )
+        self.assertIn("Message rejected", failures[0].error)
+        self.assertEqual(self.handler.messages, [["a@example.com"], ["c@example.com"]])
+        self.assertEqual(len(self.handler.sessions), 1)
+
+    def test_retry_temporary_failure(self):
+        self.pool.backoff = 0.01
+
+        failures = self.pool.send(self.new_messages("flaky@example.com"))
+
+        self.assertEqual(failures, [])
+        self.assertEqual(self.handler.messages, [["flaky@example.com"]])
+        self.assertEqual(len(self.handler.sessions), 1)
+
+    def test_send_buffered_mails_in_one_session(self):
+        recipients = ["a@example.com", "b@example.com", "c@example.com"]
+
+        with (
+            mock.patch("brokers.tasks.smtp_pool", self.pool),
+            mock.patch("brokers.tasks.welcome_mail_buffer") as buffer,
+        ):
+            buffer.pop_all.return_value = recipients
+            Sender.send_buffered_mails()
+
+        self.assertEqual(
+            [rcpt_tos[0] for rcpt_tos in self.handler.messages], recipients
+        )
+        self.assertEqual(len(self.handler.sessions), 1)
+
+
+class SenderBufferTest(SimpleTestCase):
+    @mock.patch("brokers.tasks.welcome_mail_buffer")
+    @mock.patch.object(Sender.send_buffered_mails, "apply_async")
+    def test_schedule_flush_once_per_window(self, apply_async, buffer):
+        buffer.add.side_effect = [True, False]
+
+        Sender.buffer_mail("a@example.com")
+        Sender.buffer_mail("b@example.com")
+
+        apply_async.assert_called_once()
@@ -0,0 +1,111 @@
+import socket
+from unittest import mock
+
+from brokers.tasks import add_enqueued_at, record_task_runtime, record_task_start
+from brokers.utils import InvestmentUpdateService
+from celery.app.task import Context
+from django.core.cache import cache
+from django.test import TestCase
+from utils.statsd import StatsdClient
+
+
+class StatsdClientTest(TestCase):
+    def setUp(self) -> None:
+        self.sink = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.sink.bind(("127.0.0.1", 0))
+        self.sink.settimeout(1)
+        self.addCleanup(self.sink.close)
+
+        self.client = StatsdClient("127.0.0.1", self.sink.getsockname()[1], "test")
+
+    def test_send_counter_and_timing(self):
+        self.client.incr("orders.filled", 3)
+        self.client.timing("celery.handle.runtime", 0.5)
+
+        lines = [self.sink.recv(1024).decode() for _ in range(2)]
+
+        self.assertEqual(
+            lines, ["test.orders.filled:3|c", "test.celery.handle.runtime:500.000|ms"]
+        )
+
+    def test_resolve_host_once(self):
+        with mock.patch("socket.getaddrinfo", wraps=socket.getaddrinfo) as getaddrinfo:
+            self.client.incr("orders.filled")
+            self.client.incr("orders.scanned")
+
+        lines = [self.sink.recv(1024).decode() for _ in range(2)]
+
+        getaddrinfo.assert_called_once()
+        self.assertEqual(lines, ["test.orders.filled:1|c", "test.orders.scanned:1|c"])
+
+    def test_retry_failed_lookup_after_delay(self):
+        with mock.patch(
+            "socket.getaddrinfo", side_effect=socket.gaierror
+        ) as getaddrinfo:
+            self.client.incr("orders.filled")
+            self.client.incr("orders.filled")
+
+        getaddrinfo.assert_called_once()
+        self.assertIsNone(self.client.socket)
+
+    def test_skip_when_disabled(self):
+        self.client.enabled = False
+
+        self.client.incr("orders.filled")
+
+        self.assertIsNone(self.client.socket)
+
+
+@mock.patch("utils.statsd.statsd.enabled", True)
+class TaskSignalsTest(TestCase):
+    def setUp(self) -> None:
+        self.task = mock.Mock(request=Context())
+        self.task.name = "brokers.tasks.handle"
+
+    @mock.patch("brokers.tasks.statsd.timing")
+    @mock.patch("brokers.tasks.statsd.incr")
+    def test_record_queue_lag_and_runtime(self, incr, timing):
+        headers = {}
+        add_enqueued_at(headers=headers)
+        self.task.request.enqueued_at = headers["enqueued_at"]
+
+        record_task_start(task=self.task)
+        record_task_runtime(task=self.task, state="SUCCESS")
+
+        self.assertEqual(
+            [call.args[0] for call in timing.call_args_list],
+            [
+                "celery.brokers.tasks.handle.queue_lag",
+                "celery.brokers.tasks.handle.runtime",
+            ],
+        )
+        incr.assert_called_once_with("celery.brokers.tasks.handle.success")
+
+    @mock.patch("utils.statsd.statsd.enabled", False)
+    def test_stamp_headers_with_statsd_disabled(self):
+        headers = {}
+
+        add_enqueued_at(headers=headers)
+
+        self.assertIn("enqueued_at", headers)
+
+
+class DomainCountersTest(TestCase):
+    def setUp(self) -> None:
+        cache.clear()
+
+    @mock.patch("brokers.utils.statsd.incr")
+    def test_count_received_and_changed_tickers(self, incr):
+        ticker = {
+            "symbol": "BTCUSDT",
+            "best_bid_price": "10",
+            "price_change_percent": 1,
+        }
+        InvestmentUpdateService().update([ticker])
+        incr.reset_mock()
+
+        InvestmentUpdateService().update([ticker])
+
+        incr.assert_has_calls(
+            [mock.call("tickers.received", 1), mock.call("tickers.changed", 0)]
+        )
@@ -0,0 +1,42 @@
+from unittest import mock
+
+import jwt
+from django.test import SimpleTestCase
+from users.models import User
+from utils.token import Token
+
+
+class TokenPayloadCacheTest(SimpleTestCase):
+    def setUp(self) -> None:
+        Token.payload_cache.clear()
+        self.token = Token(User(id=1)).get_access_token()
+
+    def test_get_payload_from_cache(self):
+        payload = Token.get_payload(self.token)
+
+        with mock.patch.object(Token, "decode") as decode:
+            cached_payload = Token.get_payload(self.token)
+
+        decode.assert_not_called()
+        self.assertEqual(cached_payload, payload)
+
+    def test_cached_payload_expires(self):
+        payload = Token.get_payload(self.token)
+
+        with (
+            mock.patch("utils.cache.time.monotonic") as monotonic,
+            mock.patch.object(
+                Token, "decode", side_effect=jwt.ExpiredSignatureError
+            ) as decode,
+        ):
+            monotonic.return_value = float(payload["exp"]) * 2
+            result = Token.get_payload(self.token)
+
+        decode.assert_called_once()
+        self.assertEqual(result, {})
+
+    def test_invalid_token_is_not_cached(self):
+        result = Token.get_payload(self.token + "x")
+
+        self.assertEqual(result, {})
+        self.assertEqual(len(Token.payload_cache), 0)
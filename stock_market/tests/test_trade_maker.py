@@ -0,0 +1,214 @@
+from decimal import Decimal
+from unittest import mock
+
+from brokers.exceptions import TradeError
+from brokers.factories import (
+    InvestmentFactory,
+    InvestmentPortfolioFactory,
+    LimitOrderFactory,
+)
+from brokers.models import Investment, OrderActivatedStatuses, OrderStatuses, Trade
+from brokers.utils import TradeMaker
+from django.db import OperationalError
+from django.test import SimpleTestCase, TestCase
+from users.factories import UserFactory
+from utils.transactions import retry_on_conflict
+
+
+class TradeMakerTest(TestCase):
+    def setUp(self) -> None:
+        self.trade_maker = TradeMaker()
+        self.investment = InvestmentFactory(price=10, quantity=3)
+        self.portfolio = InvestmentPortfolioFactory(
+            owner=UserFactory(balance=100),
+            investment=self.investment,
+            quantity=0,
+            spend_amount=0,
+        )
+
+    def test_make_ok(self):
+        self.trade_maker.make(2, self.portfolio, self.investment)
+
+        self.investment.refresh_from_db()
+        self.portfolio.refresh_from_db()
+        self.portfolio.owner.refresh_from_db()
+
+        self.assertEqual(self.investment.quantity, 1)
+        self.assertEqual(self.portfolio.quantity, 2)
+        self.assertEqual(self.portfolio.spend_amount, Decimal("20"))
+        self.assertEqual(self.portfolio.owner.balance, Decimal("80"))
+        self.assertEqual(Trade.objects.count(), 1)
+
+    def test_make_with_stale_objects(self):
+        self.trade_maker.make(1, self.portfolio, self.investment)
+        self.trade_maker.make(1, self.portfolio, self.investment)
+
+        self.portfolio.refresh_from_db()
+        self.portfolio.owner.refresh_from_db()
+
+        self.assertEqual(self.portfolio.quantity, 2)
+        self.assertEqual(self.portfolio.owner.balance, Decimal("80"))
+
+    def test_make_with_insufficient_quantity(self):
+        with self.assertRaises(TradeError):
+            self.trade_maker.make(4, self.portfolio, self.investment)
+
+        self.assertEqual(Trade.objects.count(), 0)
+
+    def test_make_with_insufficient_balance(self):
+        self.investment.price = 100
+        self.investment.save()
+
+        with self.assertRaises(TradeError):
+            self.trade_maker.make(2, self.portfolio, self.investment)
+
+        self.portfolio.owner.refresh_from_db()
+
+        self.assertEqual(self.portfolio.owner.balance, Decimal("100"))
+
+    def test_make_market_order_with_insufficient_balance(self):
+        result = self.trade_maker.make_market_order(20, self.portfolio)
+
+        self.assertFalse(result)
+
+
+class RetryOnConflictTest(SimpleTestCase):
+    def new_conflict(self, pgcode: str) -> OperationalError:
+        cause = Exception()
+        cause.pgcode = pgcode
+
+        error = OperationalError()
+        error.__cause__ = cause
+        return error
+
+    @mock.patch("utils.transactions.time.sleep")
+    def test_retry_deadlock(self, sleep):
+        func = mock.Mock(
+            side_effect=[self.new_conflict("40P01"), "ok"], __name__="func"
+        )
+
+        result = retry_on_conflict(func)()
+
+        self.assertEqual(result, "ok")
+        self.assertEqual(func.call_count, 2)
+        sleep.assert_called_once()
+
+    @mock.patch("utils.transactions.time.sleep")
+    def test_retry_is_bounded(self, sleep):
+        func = mock.Mock(side_effect=self.new_conflict("40001"), __name__="func")
+
+        with self.assertRaises(OperationalError):
+            retry_on_conflict(func)()
+
+        self.assertEqual(func.call_count, 3)
+
+    def test_other_errors_are_not_retried(self):
+        func = mock.Mock(side_effect=self.new_conflict("08006"), __name__="func")
+
+        with self.assertRaises(OperationalError):
+            retry_on_conflict(func)()
+
+        self.assertEqual(func.call_count, 1)
+
+
+class TradeMakerBatchTest(TestCase):
+    def setUp(self) -> None:
+        self.trade_maker = TradeMaker()
+        self.investment = InvestmentFactory(price=10, quantity=3)
+
+    def new_order(self, quantity: int, balance: int, portfolio=None):
+        if portfolio is None:
+            portfolio = InvestmentPortfolioFactory(
+                owner=UserFactory(balance=balance),
+                investment=self.investment,
+                quantity=0,
+                spend_amount=0,
+            )
+
+        return LimitOrderFactory(
+            investment=self.investment,
+            portfolio=portfolio,
+            status=OrderStatuses.ACTIVE,
+            quantity=quantity,
+            price=10,
+            activated_status=OrderActivatedStatuses.LTE,
+        )
+
+    def test_make_batch_ok(self):
+        orders = [self.new_order(1, 100), self.new_order(2, 100)]
+
+        completed_orders = self.trade_maker.make_batch(self.investment, orders)
+
+        self.investment.refresh_from_db()
+        portfolio = orders[1].portfolio
+        portfolio.refresh_from_db()
+        portfolio.owner.refresh_from_db()
+
+        self.assertEqual(completed_orders, orders)
+        self.assertEqual(self.investment.quantity, 0)
+        self.assertEqual(portfolio.quantity, 2)
+        self.assertEqual(portfolio.spend_amount, Decimal("20"))
+        self.assertEqual(portfolio.owner.balance, Decimal("80"))
+        self.assertEqual(Trade.objects.count(), 2)
+
+    def test_make_batch_with_insufficient_quantity(self):
+        orders = [self.new_order(2, 100), self.new_order(2, 100)]
+
+        completed_orders = self.trade_maker.make_batch(self.investment, orders)
+
+        orders[1].refresh_from_db()
+
+        self.assertEqual(completed_orders, orders[:1])
+        self.assertEqual(orders[1].status, OrderStatuses.ACTIVE)
+
+    def test_make_batch_with_insufficient_shared_balance(self):
+        order = self.new_order(1, 15)
+        orders = [order, self.new_order(1, 0, order.portfolio)]
+
+        completed_orders = self.trade_maker.make_batch(self.investment, orders)
+
+        owner = order.portfolio.owner
+        owner.refresh_from_db()
+
+        self.assertEqual(completed_orders, orders[:1])
+        self.assertEqual(owner.balance, Decimal("5"))
+
+    def test_make_batch_skips_orders_untriggered_at_locked_price(self):
+        orders = [self.new_order(1, 100), self.new_order(1, 100)]
+        orders[1].price = 12
+        orders[1].save()
+        Investment.objects.filter(id=self.investment.id).update(price=11)
+
+        completed_orders = self.trade_maker.make_batch(self.investment, orders)
+
+        orders[0].refresh_from_db()
+
+        self.assertEqual(completed_orders, orders[1:])
+        self.assertEqual(orders[0].status, OrderStatuses.ACTIVE)
+        self.assertEqual(Trade.objects.get().price, Decimal("11"))
+
+    def test_make_batch_updates_only_traded_portfolios(self):
+        orders = [self.new_order(1, 100), self.new_order(1, 100)]
+        orders[0].price = 5
+        orders[0].save()
+        portfolio, owner = orders[0].portfolio, orders[0].portfolio.owner
+
+        completed_orders = self.trade_maker.make_batch(self.investment, orders)
+
+        updated_at, owner_updated_at = portfolio.updated_at, owner.updated_at
+        portfolio.refresh_from_db()
+        owner.refresh_from_db()
+
+        self.assertEqual(completed_orders, orders[1:])
+        self.assertEqual(portfolio.updated_at, updated_at)
+        self.assertEqual(owner.updated_at, owner_updated_at)
+
+    def test_make_batch_fixed_number_of_queries(self):
+        self.investment.quantity = 100
+        self.investment.save()
+        orders = [self.new_order(1, 100) for _ in range(10)]
+
+        with self.assertNumQueries(10):
+            completed_orders = self.trade_maker.make_batch(self.investment, orders)
+
+        self.assertEqual(len(completed_orders), 10)
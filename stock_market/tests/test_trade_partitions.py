@@ -0,0 +1,110 @@
+from datetime import date, datetime, timezone
+from unittest import mock, skipUnless
+
+from brokers.factories import InvestmentPortfolioFactory, TradeFactory
+from brokers.models import Trade
+from brokers.partitions import TradePartitionService
+from django.core.management import CommandError, call_command
+from django.db import IntegrityError, connection, transaction
+from django.test import TestCase
+
+
+class TradePartitionServiceTest(TestCase):
+    def setUp(self) -> None:
+        self.service = TradePartitionService()
+
+    def test_add_months(self):
+        self.assertEqual(
+            self.service.add_months(date(2024, 11, 1), 3), date(2025, 2, 1)
+        )
+        self.assertEqual(
+            self.service.add_months(date(2024, 1, 1), -1), date(2023, 12, 1)
+        )
+
+    def test_partition_name(self):
+        name = self.service.get_name(date(2024, 3, 1))
+
+        self.assertEqual(name, "trade_p202403")
+        self.assertEqual(self.service.get_month(name), date(2024, 3, 1))
+
+    @mock.patch("brokers.partitions.connection")
+    def test_get_month_partitions_only(self, connection_mock):
+        cursor = connection_mock.cursor.return_value.__enter__.return_value
+        cursor.fetchall.return_value = [
+            ("trade_default",),
+            ("trade_p202403",),
+            ("tradexp202404",),
+            ("trade_p2024_old",),
+            ("trade_p202405",),
+        ]
+
+        partitions = self.service.get_partitions()
+
+        self.assertEqual(partitions, ["trade_p202403", "trade_p202405"])
+        self.assertEqual(
+            [self.service.get_month(name) for name in partitions],
+            [date(2024, 3, 1), date(2024, 5, 1)],
+        )
+
+    @mock.patch("brokers.partitions.connection")
+    def test_archive_partitions_before_month(self, connection_mock):
+        cursor = connection_mock.cursor.return_value.__enter__.return_value
+        cursor.fetchall.return_value = [("trade_p202402",), ("trade_p202403",)]
+
+        with mock.patch("brokers.partitions.transaction"):
+            names = self.service.archive(date(2024, 3, 15))
+
+        self.assertEqual(names, ["trade_p202402"])
+        self.assertIn(
+            mock.call("ALTER TABLE trade DETACH PARTITION trade_p202402"),
+            cursor.execute.call_args_list,
+        )
+
+    @skipUnless(connection.vendor == "postgresql", "Partitioning needs PostgreSQL")
+    def test_create_partition(self):
+        month = date(2000, 1, 1)
+
+        self.assertTrue(self.service.create(month))
+        self.assertFalse(self.service.create(month))
+        self.assertIn("trade_p200001", self.service.get_partitions())
+
+    @skipUnless(connection.vendor == "postgresql", "Partitioning needs PostgreSQL")
+    def test_create_partition_moves_default_rows(self):
+        portfolio = InvestmentPortfolioFactory()
+        trade = TradeFactory(portfolio=portfolio, investment=portfolio.investment)
+        Trade.objects.filter(pk=trade.pk).update(
+            created_at=datetime(2000, 2, 10, tzinfo=timezone.utc)
+        )
+
+        self.assertEqual(self.__count("trade_default", trade.pk), 1)
+
+        self.service.create(date(2000, 2, 1))
+
+        self.assertEqual(self.__count("trade_default", trade.pk), 0)
+        self.assertEqual(self.__count("trade_p200002", trade.pk), 1)
+        self.assertEqual(Trade.objects.get(pk=trade.pk).portfolio, portfolio)
+
+    @skipUnless(connection.vendor == "postgresql", "Partitioning needs PostgreSQL")
+    def test_partitioned_trade_keeps_ids_and_foreign_keys(self):
+        portfolio = InvestmentPortfolioFactory()
+        first = TradeFactory(portfolio=portfolio, investment=portfolio.investment)
+        second = TradeFactory(portfolio=portfolio, investment=portfolio.investment)
+
+        self.assertGreater(second.pk, first.pk)
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            TradeFactory(portfolio=portfolio, investment_id=0)
+            # foreign keys are deferred until commit
+            connection.check_constraints()
+
+    def test_create_partitions_requires_postgresql(self):
+        if connection.vendor == "postgresql":
+            self.skipTest("Partitioning is supported")
+
+        with self.assertRaises(CommandError):
+            call_command("create_trade_partitions")
+
+    @staticmethod
+    def __count(partition: str, pk: int) -> int:
+        with connection.cursor() as cursor:
+            cursor.execute(f"SELECT COUNT(*) FROM {partition} WHERE id = %s", [pk])
+            return cursor.fetchone()[0]
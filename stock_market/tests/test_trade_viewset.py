@@ -1,3 +1,7 @@
+import csv
+import io
+import json
+
 from brokers.factories import InvestmentPortfolioFactory, TradeFactory
 from django.test import TestCase
 from faker import Faker
@@ -24,6 +28,67 @@ class TradeViewSetTest(TestCase):
         self.assertIsInstance(response.data, list)
         self.assertIsInstance(response.data[0], dict)
 
+    def test_list_trade_with_cursor_pagination(self):
+        trades = [self.new_trade() for _ in range(3)]
+        token = self.test_user.get_admin_token()
+        headers = {"Authorization": f"Bearer {token}"}
+
+        response = self.client.get(self.path, {"page_size": 2}, headers=headers)
+        next_response = self.client.get(response.data["next"], headers=headers)
+
+        ids = [item["id"] for item in response.data["results"]]
+        next_ids = [item["id"] for item in next_response.data["results"]]
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(ids + next_ids, [trade.id for trade in reversed(trades)])
+        self.assertIsNone(next_response.data["next"])
+
+    def test_export_trade_ndjson(self):
+        trade = self.new_trade()
+        _ = self.new_trade()
+        token = self.test_user.get_admin_token()
+
+        response = self.client.get(
+            self.path + "export/",
+            {"investment": trade.investment_id},
+            headers={"Authorization": f"Bearer {token}"},
+        )
+        rows = [
+            json.loads(line)
+            for line in b"".join(response.streaming_content).splitlines()
+        ]
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Content-Type"], "application/x-ndjson")
+        self.assertEqual([row["id"] for row in rows], [trade.id])
+
+    def test_export_trade_csv(self):
+        trade = self.new_trade()
+        token = self.test_user.get_analyst_token()
+
+        response = self.client.get(
+            self.path + "export/",
+            {"output": "csv"},
+            headers={"Authorization": f"Bearer {token}"},
+        )
+        content = b"".join(response.streaming_content).decode()
+        rows = list(csv.reader(io.StringIO(content)))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(rows[0][0], "id")
+        self.assertEqual(rows[1][0], str(trade.id))
+
+    def test_export_trade_with_invalid_date_range(self):
+        token = self.test_user.get_admin_token()
+
+        response = self.client.get(
+            self.path + "export/",
+            {"created_from": "2024-01-02T00:00", "created_to": "2024-01-01T00:00"},
+            headers={"Authorization": f"Bearer {token}"},
+        )
+
+        self.assertEqual(response.status_code, 400)
+
     def test_create_trade_ok(self):
         token = self.test_user.get_admin_token()
 
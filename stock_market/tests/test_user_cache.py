@@ -0,0 +1,138 @@
+from concurrent.futures import ThreadPoolExecutor
+from decimal import Decimal
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import SimpleTestCase, TestCase
+from tests.utils import TestUser
+from users.factories import UserFactory
+from users.models import User
+from users.utils import UserService, user_cache
+from utils.cache import TTLCache
+from utils.token import Token
+
+
+class TTLCacheTest(SimpleTestCase):
+    def test_evict_least_recently_used(self):
+        cache = TTLCache(maxsize=2, ttl=60)
+        cache.set(1, "first")
+        cache.set(2, "second")
+        cache.get(1)
+
+        cache.set(3, "third")
+
+        self.assertEqual(cache.get(1), "first")
+        self.assertIsNone(cache.get(2))
+
+    @mock.patch("utils.cache.time.monotonic")
+    def test_expire_entries(self, monotonic):
+        cache = TTLCache(maxsize=2, ttl=60)
+        monotonic.return_value = 0
+        cache.set(1, "first")
+
+        monotonic.return_value = 60
+
+        self.assertIsNone(cache.get(1))
+        self.assertEqual(len(cache), 0)
+
+    def test_concurrent_access(self):
+        cache = TTLCache(maxsize=8, ttl=60)
+
+        def use_cache():
+            for i in range(2000):
+                cache.set(i % 16, i)
+                cache.get((i + 1) % 16)
+                cache.delete((i + 2) % 16)
+
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            futures = [executor.submit(use_cache) for _ in range(4)]
+
+        for future in futures:
+            future.result()
+
+        self.assertLessEqual(len(cache), 8)
+
+
+class UserCacheTest(TestCase):
+    def setUp(self) -> None:
+        user_cache.local.clear()
+        cache.clear()
+        self.path = "/v1/users/"
+        self.test_user = TestUser()
+
+    def test_authenticate_from_cache(self):
+        token = self.test_user.get_admin_token()
+        headers = {"Authorization": f"Bearer {token}"}
+        self.client.get(self.path, headers=headers)
+
+        # list users and their subscriptions, no auth lookup
+        with self.assertNumQueries(2):
+            response = self.client.get(self.path, headers=headers)
+
+        self.assertEqual(response.status_code, 200)
+
+    def test_blocked_user_is_invalidated(self):
+        user = UserFactory()
+        headers = {"Authorization": f"Bearer {Token(user).get_access_token()}"}
+        self.client.get(self.path, headers=headers)
+
+        user.is_blocked = True
+        user.save()
+
+        response = self.client.get(self.path, headers=headers)
+
+        self.assertEqual(response.status_code, 401)
+
+    def test_invalidated_by_other_process(self):
+        user = UserFactory()
+        user_cache.get(user.id)
+
+        # another process blocks the user, only the shared version changes
+        User.objects.filter(pk=user.pk).update(is_blocked=True)
+        cache.incr(user_cache.version_key % user.id)
+
+        self.assertTrue(user_cache.get(user.id).is_blocked)
+
+    def test_invalidated_by_bulk_update(self):
+        user = UserFactory(balance=10)
+        user_cache.get(user.id)
+
+        user.balance = 5
+        UserService().bulk_update([user], ("balance",))
+
+        self.assertEqual(user_cache.get(user.id).balance, Decimal("5"))
+
+    def test_return_copy_of_cached_user(self):
+        user = UserFactory()
+
+        cached_user = user_cache.get(user.id)
+        cached_user.is_blocked = True
+
+        self.assertFalse(user_cache.get(user.id).is_blocked)
+
+    def test_change_password_keeps_balance_written_meanwhile(self):
+        user = UserFactory(balance=10)
+        user.set_password("old-password")
+        user.save()
+        headers = {"Authorization": f"Bearer {Token(user).get_access_token()}"}
+        self.client.get(self.path, headers=headers)
+
+        # bulk writes like TradeMaker.make_batch send no post_save
+        User.objects.filter(pk=user.pk).update(balance=5)
+
+        response = self.client.post(
+            self.path + "change-password/",
+            data={
+                "old_password": "old-password",
+                "new_password": "new-password",
+                "new_repeated_password": "new-password",
+            },
+            content_type="application/json",
+            headers=headers,
+        )
+
+        user.refresh_from_db()
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(user.balance, Decimal("5"))
+        self.assertTrue(user.check_password("new-password"))
@@ -1,3 +1,5 @@
+import socket
+
 from rest_framework.test import APIClient
 from users.factories import UserFactory
 from users.models import Roles
@@ -29,3 +31,9 @@ class TestUser:
         user.save()
 
         return Token(user).get_access_token()
+
+
+def get_free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
@@ -0,0 +1,39 @@
+import time
+
+from django.core.management.base import BaseCommand
+from users.models import User
+from utils.token import Token
+
+
+class Command(BaseCommand):
+    help = "Measure access token verification cost per request"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=100_000)
+        parser.add_argument("--tokens", type=int, default=100)
+
+    def handle(self, *args, **options):
+        requests, tokens_count = options["requests"], options["tokens"]
+        tokens = [
+            Token(User(id=user_id)).get_access_token()
+            for user_id in range(1, tokens_count + 1)
+        ]
+
+        Token.payload_cache.clear()
+        results = {
+            "no cache": self.__measure(Token.decode, tokens, requests),
+            "cache": self.__measure(Token.get_payload, tokens, requests),
+        }
+
+        for name, seconds in results.items():
+            self.stdout.write(
+                "%-8s %8.2f us/request" % (name, seconds / requests * 1_000_000)
+            )
+
+    @staticmethod
+    def __measure(verify, tokens: list[str], requests: int) -> float:
+        started_at = time.perf_counter()
+        for i in range(requests):
+            verify(tokens[i % len(tokens)])
+
+        return time.perf_counter() - started_at
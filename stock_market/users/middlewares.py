@@ -1,13 +1,17 @@
 from django.http import JsonResponse
 from django.utils.deprecation import MiddlewareMixin
 from rest_framework import status
-from users.models import User
+from users.utils import user_cache
 from utils.token import Token
 
 from stock_market.settings import HTTP_AUTH_KEYWORD
 
 
 class JWTAuthMiddleware(MiddlewareMixin):
+    public_prefixes = {
+        "admin",
+        "metrics",
+    }
     anonymous_urls = {
         "login",
         "register",
@@ -16,10 +20,11 @@ class JWTAuthMiddleware(MiddlewareMixin):
 
     def process_request(self, request):
         path = request.path if request.path.endswith("/") else request.path + "/"
-        if path.split("/")[1] == "admin":
+        parts = path.split("/")
+        if parts[1] in self.public_prefixes:
             return
 
-        if path.split("/")[3] not in self.anonymous_urls:
+        if len(parts) < 4 or parts[3] not in self.anonymous_urls:
             return self.__get_user(request)
 
     @staticmethod
@@ -41,9 +46,8 @@ class JWTAuthMiddleware(MiddlewareMixin):
         if not payload:
             return http_response
 
-        try:
-            user = User.objects.get(pk=payload["id"])
-        except User.DoesNotExist:
+        user = user_cache.get(payload["id"])
+        if user is None:
             return http_response
 
         if user.is_blocked:
@@ -106,7 +106,8 @@ class ChangePasswordSerializer(serializers.ModelSerializer):
         return attrs
 
     def validate_old_password(self, password):
-        user = self.context["request"].jwt_user
+        # the request user comes from the user cache, check the current hash
+        user = User.objects.get(pk=self.context["request"].jwt_user.pk)
         if not user.check_password(password):
             raise serializers.ValidationError(
                 {"old_password": "Old password is incorrect!"}
@@ -1,8 +1,18 @@
+import copy
+import time
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
 from django.http import Http404
 from users.exceptions import Http400
 from users.models import User
+from utils.cache import TTLCache
 from utils.interfaces import IService
 
+from stock_market.settings import USER_CACHE_SHARED, USER_CACHE_SIZE, USER_CACHE_TIMEOUT
+
 
 class UserService(IService):
     def __init__(self, validated_data: dict = None, instance: User = None):
@@ -38,16 +48,105 @@ class UserService(IService):
     def bulk_create(self, users: list[User]):
         return User.objects.bulk_create(users)
 
-    def bulk_update(self, users: list[User]):
-        return User.objects.bulk_update(users)
+    def bulk_update(self, users: list[User], *args):
+        """Bulk updates send no post_save, so cached users are dropped here"""
+        users = list(users)
+        result = User.objects.bulk_update(users, *args)
+        user_cache.invalidate(*(user.pk for user in users))
+
+        return result
+
+    def get_for_update(self, **filters):
+        return User.objects.select_for_update().filter(**filters).order_by("id")
 
     def change_password(self, user):
+        """Write only the password, the request user may be a cached copy"""
         user.set_password(self.data["new_password"])
-        user.save()
+        user.save(update_fields=("password", "updated_at"))
 
     def set_subscriptions(self, user):
         try:
             user.subscriptions.set(self.data["subscriptions"])
-            user.save()
         except KeyError:
             raise Http400({"detail": "'subscriptions' is not provided"})
+
+
+class UserCache:
+    """
+    Short-lived cache of authenticated users keyed by user id.
+
+    Users are kept in a per-process LRU and, if enabled, in the shared cache.
+    Entries keep the version of the user they were built for, the version
+    lives in the shared cache and is bumped on every write, so a lookup costs
+    one cache round trip and a blocked user is rejected by every process
+    right away.
+    """
+
+    cache_key = "user:%s"
+    version_key = "user:%s:version"
+
+    def __init__(self):
+        self.local = TTLCache(USER_CACHE_SIZE, USER_CACHE_TIMEOUT)
+
+    def get(self, user_id: int) -> User | None:
+        version_key = self.version_key % user_id
+        keys = (
+            [version_key, self.cache_key % user_id]
+            if USER_CACHE_SHARED
+            else [version_key]
+        )
+        values = cache.get_many(keys)
+
+        version = values.get(version_key)
+        if version is None:
+            version = time.time_ns()
+            cache.add(version_key, version, timeout=None)
+
+        entry = self.local.get(user_id)
+        if entry is None or entry[0] != version:
+            entry = values.get(self.cache_key % user_id)
+            if entry is not None and entry[0] == version:
+                self.local.set(user_id, entry)
+            else:
+                entry = None
+
+        if entry is None:
+            user = User.objects.filter(pk=user_id).first()
+            if user is None:
+                return None
+
+            entry = (version, user)
+            self.set(entry)
+
+        # requests must not share a mutable instance
+        return copy.copy(entry[1])
+
+    def set(self, entry: tuple[int, User]):
+        user = entry[1]
+        self.local.set(user.pk, entry)
+
+        if USER_CACHE_SHARED:
+            cache.set(self.cache_key % user.pk, entry, USER_CACHE_TIMEOUT)
+
+    def invalidate(self, *user_ids: int):
+        """Bump versions now and once more on commit, like the investment cache"""
+        self.__bump_versions(user_ids)
+        if transaction.get_connection().in_atomic_block:
+            transaction.on_commit(lambda: self.__bump_versions(user_ids))
+
+    def __bump_versions(self, user_ids):
+        for user_id in user_ids:
+            self.local.delete(user_id)
+            try:
+                cache.incr(self.version_key % user_id)
+            except ValueError:
+                cache.add(self.version_key % user_id, time.time_ns(), timeout=None)
+
+
+user_cache = UserCache()
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_user_cache(sender, instance: User, **kwargs):
+    user_cache.invalidate(instance.pk)
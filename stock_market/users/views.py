@@ -14,10 +14,12 @@ from users.serializers import (
     UserUpdateSerializer,
 )
 from users.utils import UserService
+from utils.mixins import TimedSerializerMixin
 from utils.token import Token
 
 
 class UserViewSet(
+    TimedSerializerMixin,
     mixins.ListModelMixin,
     mixins.RetrieveModelMixin,
     mixins.UpdateModelMixin,
@@ -73,7 +75,7 @@ class UserViewSet(
 
         instance = UserService(serializer.validated_data).create()
 
-        Sender.send_mail.delay(instance.email)
+        Sender.buffer_mail(instance.email)
 
         data = self.get_serializer(instance).data
 
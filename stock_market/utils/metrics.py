@@ -0,0 +1,180 @@
+import hmac
+import ipaddress
+import threading
+from bisect import bisect_left
+from collections import defaultdict
+
+from django.http import HttpResponse, HttpResponseNotFound
+
+from stock_market.settings import (
+    HTTP_AUTH_KEYWORD,
+    METRICS_ALLOWED_NETWORKS,
+    METRICS_ENABLED,
+    METRICS_TOKEN,
+)
+
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200, 500)
+
+
+class Metric:
+    type = ""
+
+    def __init__(self, name: str, documentation: str, labels: tuple[str, ...]):
+        self.name = name
+        self.documentation = documentation
+        self.labels = labels
+        self.lock = threading.Lock()
+
+    def get_key(self, labels: dict) -> tuple[str, ...]:
+        return tuple(str(labels[label]) for label in self.labels)
+
+    def format_labels(self, key: tuple[str, ...], **extra) -> str:
+        pairs = [*zip(self.labels, key), *extra.items()]
+        if not pairs:
+            return ""
+
+        values = (
+            '%s="%s"' % (name, value.replace("\\", "\\\\").replace('"', '\\"'))
+            for name, value in pairs
+        )
+        return "{%s}" % ",".join(values)
+
+    def render(self) -> list[str]:
+        return [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.type}",
+            *self.samples(),
+        ]
+
+    def samples(self) -> list[str]:
+        raise NotImplementedError
+
+
+class Counter(Metric):
+    type = "counter"
+
+    def __init__(self, *args):
+        super().__init__(*args)
+        self.values: dict[tuple, float] = defaultdict(float)
+
+    def inc(self, value: float = 1, **labels):
+        key = self.get_key(labels)
+        with self.lock:
+            self.values[key] += value
+
+    def samples(self) -> list[str]:
+        with self.lock:
+            values = list(self.values.items())
+
+        return [
+            f"{self.name}{self.format_labels(key)} {value}" for key, value in values
+        ]
+
+
+class Histogram(Metric):
+    type = "histogram"
+
+    def __init__(self, *args, buckets: tuple[float, ...] = DURATION_BUCKETS):
+        super().__init__(*args)
+        self.buckets = buckets
+        # per label values: counts of every bucket and +Inf, then sum
+        self.values: dict[tuple, list] = {}
+
+    def observe(self, value: float, **labels):
+        key = self.get_key(labels)
+        index = bisect_left(self.buckets, value)
+        with self.lock:
+            values = self.values.get(key)
+            if values is None:
+                values = self.values[key] = [0] * (len(self.buckets) + 1) + [0.0]
+
+            values[index] += 1
+            values[-1] += value
+
+    def samples(self) -> list[str]:
+        with self.lock:
+            values = [(key, list(counts)) for key, counts in self.values.items()]
+
+        lines = []
+        for key, counts in values:
+            total = 0
+            for bucket, count in zip((*self.buckets, "+Inf"), counts):
+                total += count
+                labels = self.format_labels(key, le=str(bucket))
+                lines.append(f"{self.name}_bucket{labels} {total}")
+
+            lines.append(f"{self.name}_sum{self.format_labels(key)} {counts[-1]}")
+            lines.append(f"{self.name}_count{self.format_labels(key)} {total}")
+
+        return lines
+
+
+class MetricsRegistry:
+    """
+    Process-wide metrics rendered in the Prometheus text format.
+
+    Every process keeps its own values, so each web and celery process is
+    scraped separately.
+    """
+
+    def __init__(self):
+        self.metrics: dict[str, Metric] = {}
+        self.lock = threading.Lock()
+
+    def counter(self, name: str, documentation: str, labels=()) -> Counter:
+        return self.__register(Counter, name, documentation, tuple(labels))
+
+    def histogram(
+        self, name: str, documentation: str, labels=(), buckets=DURATION_BUCKETS
+    ) -> Histogram:
+        return self.__register(
+            Histogram, name, documentation, tuple(labels), buckets=buckets
+        )
+
+    def render(self) -> str:
+        with self.lock:
+            metrics = list(self.metrics.values())
+
+        lines = [line for metric in metrics for line in metric.render()]
+        return "\n".join(lines) + "\n"
+
+    def __register(self, metric_class, name: str, *args, **kwargs):
+        with self.lock:
+            metric = self.metrics.get(name)
+            if metric is None:
+                metric = self.metrics[name] = metric_class(name, *args, **kwargs)
+
+        return metric
+
+
+registry = MetricsRegistry()
+
+allowed_networks = [
+    ipaddress.ip_network(network) for network in METRICS_ALLOWED_NETWORKS
+]
+
+
+def metrics_view(request):
+    """
+    Expose the registry to scrapers from the allowed networks.
+
+    The address check trusts REMOTE_ADDR, which is the proxy address when the
+    app runs behind one, so METRICS_TOKEN should be set in that case.
+    """
+    try:
+        address = ipaddress.ip_address(request.META.get("REMOTE_ADDR", ""))
+    except ValueError:
+        return HttpResponseNotFound()
+
+    if not METRICS_ENABLED or not any(address in net for net in allowed_networks):
+        return HttpResponseNotFound()
+    if METRICS_TOKEN and not hmac.compare_digest(
+        request.headers.get("Authorization", ""),
+        f"{HTTP_AUTH_KEYWORD} {METRICS_TOKEN}",
+    ):
+        return HttpResponseNotFound()
+
+    return HttpResponse(
+        registry.render(), content_type="text/plain; version=0.0.4; charset=utf-8"
+    )
@@ -0,0 +1,151 @@
+import time
+from contextvars import ContextVar
+from functools import wraps
+
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connection
+from utils.metrics import COUNT_BUCKETS, registry
+
+from stock_market.settings import METRICS_ENABLED
+
+request_duration = registry.histogram(
+    "http_request_duration_seconds",
+    "Request duration",
+    ("view", "action", "status"),
+)
+request_queries = registry.histogram(
+    "http_request_queries",
+    "Database queries per request",
+    ("view", "action"),
+    buckets=COUNT_BUCKETS,
+)
+request_db_duration = registry.histogram(
+    "http_request_db_duration_seconds",
+    "Time of database queries per request",
+    ("view", "action"),
+)
+request_serializer_duration = registry.histogram(
+    "http_request_serializer_duration_seconds",
+    "Time of serializers validation and representation per request",
+    ("view", "action"),
+)
+request_view_duration = registry.histogram(
+    "http_request_view_duration_seconds",
+    "Time of the view including response rendering",
+    ("view", "action"),
+)
+
+
+class RequestTimings:
+    """Timings of the current request, serializer time includes its queries"""
+
+    def __init__(self):
+        self.queries = 0
+        self.db = 0.0
+        self.serializer = 0.0
+        self.serializer_depth = 0
+        self.view_started_at: float | None = None
+        self.view_name: str | None = None
+        self.action: str | None = None
+
+    def record_query(self, execute, sql, params, many, context):
+        started_at = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db += time.perf_counter() - started_at
+            self.queries += 1
+
+
+current_timings: ContextVar[RequestTimings | None] = ContextVar(
+    "current_timings", default=None
+)
+
+
+def timed_serializer(method):
+    """Add the time of the outermost serializer call to the request timings"""
+
+    @wraps(method)
+    def wrapper(*args, **kwargs):
+        timings = current_timings.get()
+        if timings is None or timings.serializer_depth:
+            return method(*args, **kwargs)
+
+        timings.serializer_depth += 1
+        started_at = time.perf_counter()
+        try:
+            return method(*args, **kwargs)
+        finally:
+            timings.serializer += time.perf_counter() - started_at
+            timings.serializer_depth -= 1
+
+    return wrapper
+
+
+class MetricsMiddleware:
+    """
+    Record queries, SQL, serializer and view time of every request.
+
+    The numbers are sent in the Server-Timing header and observed in the
+    metrics registry per viewset and action. When METRICS_ENABLED is off
+    the middleware removes itself from the chain. Serializers are timed
+    by views using utils.mixins.TimedSerializerMixin.
+    """
+
+    def __init__(self, get_response):
+        if not METRICS_ENABLED:
+            raise MiddlewareNotUsed
+
+        self.get_response = get_response
+
+    def __call__(self, request):
+        timings = RequestTimings()
+        token = current_timings.set(timings)
+
+        started_at = time.perf_counter()
+        try:
+            with connection.execute_wrapper(timings.record_query):
+                response = self.get_response(request)
+        finally:
+            current_timings.reset(token)
+
+        ended_at = time.perf_counter()
+        total = ended_at - started_at
+        view = ended_at - (timings.view_started_at or ended_at)
+
+        response.headers["Server-Timing"] = ", ".join(
+            filter(
+                None,
+                (
+                    response.headers.get("Server-Timing"),
+                    'db;dur=%.2f;desc="%s queries"'
+                    % (timings.db * 1000, timings.queries),
+                    "serializer;dur=%.2f" % (timings.serializer * 1000),
+                    "view;dur=%.2f" % (view * 1000),
+                    "total;dur=%.2f" % (total * 1000),
+                ),
+            )
+        )
+
+        if timings.view_name is not None:
+            labels = {"view": timings.view_name, "action": timings.action}
+            request_duration.observe(total, status=response.status_code, **labels)
+            request_queries.observe(timings.queries, **labels)
+            request_db_duration.observe(timings.db, **labels)
+            request_serializer_duration.observe(timings.serializer, **labels)
+            request_view_duration.observe(view, **labels)
+
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        timings = current_timings.get()
+        if timings is None:
+            return
+
+        view_class = getattr(view_func, "cls", None)
+        actions = getattr(view_func, "actions", None) or {}
+        method = request.method.lower()
+
+        timings.view_name = view_class.__name__ if view_class else view_func.__name__
+        timings.action = actions.get(method, method)
+        timings.view_started_at = time.perf_counter()
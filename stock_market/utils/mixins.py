@@ -0,0 +1,52 @@
+from functools import cache
+
+from rest_framework.serializers import BaseSerializer, ListSerializer
+from utils.middlewares import timed_serializer
+
+
+class TimedSerializer:
+    """Serializer mixin adding validation and representation time to the request"""
+
+    @timed_serializer
+    def is_valid(self, *args, **kwargs):
+        return super().is_valid(*args, **kwargs)
+
+    @property
+    @timed_serializer
+    def data(self):
+        return super().data
+
+
+@cache
+def get_timed_serializer_class(
+    serializer_class: type[BaseSerializer],
+) -> type[BaseSerializer]:
+    """
+    Return a subclass of the serializer which is timed,
+    together with its list serializer when it's created with many=True
+    """
+    meta = getattr(serializer_class, "Meta", object)
+    list_serializer_class = getattr(meta, "list_serializer_class", ListSerializer)
+
+    class TimedListSerializer(TimedSerializer, list_serializer_class):
+        pass
+
+    class TimedSerializerClass(TimedSerializer, serializer_class):
+        class Meta(meta):
+            pass
+
+    TimedSerializerClass.Meta.list_serializer_class = TimedListSerializer
+    TimedSerializerClass.__name__ = serializer_class.__name__
+    TimedSerializerClass.__qualname__ = serializer_class.__qualname__
+
+    return TimedSerializerClass
+
+
+class TimedSerializerMixin:
+    """Time serializers of the view in the request metrics"""
+
+    def get_serializer(self, *args, **kwargs):
+        serializer_class = get_timed_serializer_class(self.get_serializer_class())
+        kwargs.setdefault("context", self.get_serializer_context())
+
+        return serializer_class(*args, **kwargs)
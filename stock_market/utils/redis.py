@@ -0,0 +1,23 @@
+from functools import cache
+
+import redis
+from redis import asyncio as aioredis
+
+from stock_market.settings import REDIS_URL
+
+SOCKET_TIMEOUT = 1
+
+
+@cache
+def get_redis() -> redis.Redis:
+    """Return the process-wide redis client"""
+    return redis.Redis.from_url(
+        REDIS_URL,
+        socket_timeout=SOCKET_TIMEOUT,
+        socket_connect_timeout=SOCKET_TIMEOUT,
+    )
+
+
+def get_async_redis() -> aioredis.Redis:
+    """Return a new asyncio redis client bound to the running event loop"""
+    return aioredis.Redis.from_url(REDIS_URL)
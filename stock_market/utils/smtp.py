@@ -0,0 +1,348 @@
+import asyncio
+import logging
+import os
+import random
+import smtplib
+import threading
+import time
+from dataclasses import dataclass
+from email.message import EmailMessage
+
+import aiosmtplib
+from utils.redis import get_redis
+
+from stock_market import settings
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class FailedDelivery:
+    message: EmailMessage
+    error: str
+    attempts: int
+
+
+def is_permanent(error: Exception) -> bool:
+    """Check if a smtplib or aiosmtplib error is a permanent (5xx) one"""
+    if isinstance(error, smtplib.SMTPRecipientsRefused):
+        return all(code >= 500 for code, _ in error.recipients.values())
+    if isinstance(error, aiosmtplib.SMTPRecipientsRefused):
+        return all(recipient.code >= 500 for recipient in error.recipients)
+
+    if isinstance(error, smtplib.SMTPResponseException):
+        return error.smtp_code >= 500
+    if isinstance(error, aiosmtplib.SMTPResponseException):
+        return error.code >= 500
+
+    return False
+
+
+def get_retry_delay(backoff: float, attempt: int) -> float:
+    """Exponential backoff with jitter"""
+    return backoff * 2 ** (attempt - 1) * random.uniform(0.5, 1.5)
+
+
+class SMTPPool:
+    """
+    Per-process pool of logged in SMTP connections.
+
+    A connection idle for longer than the keepalive interval is checked with
+    NOOP before reuse, broken connections are replaced by new ones. The pool
+    starts empty in every forked process, sockets are never shared.
+    """
+
+    reconnect_errors = (smtplib.SMTPServerDisconnected, ConnectionError)
+    # the server answered, so the connection is still usable
+    response_errors = (smtplib.SMTPResponseException, smtplib.SMTPRecipientsRefused)
+
+    def __init__(
+        self,
+        host: str,
+        port: int,
+        user: str = "",
+        password: str = "",
+        use_ssl: bool = True,
+        size: int = 2,
+        keepalive: float = 30,
+        retries: int = 3,
+        backoff: float = 0.5,
+        timeout: float = 10,
+    ):
+        self.host = host
+        self.port = port
+        self.user = user
+        self.password = password
+        self.use_ssl = use_ssl
+        self.size = size
+        self.keepalive = keepalive
+        self.retries = retries
+        self.backoff = backoff
+        self.timeout = timeout
+        self.idle: list[tuple[float, smtplib.SMTP]] = []
+        self.lock = threading.Lock()
+        self.pid = os.getpid()
+
+    def send(self, messages: list[EmailMessage]) -> list[FailedDelivery]:
+        """
+        Send the messages over one connection.
+
+        Temporary failures are retried with backoff, a connection broken on
+        the first attempt is replaced right away. A failed message does not
+        stop the rest of them, the undelivered ones are returned.
+        """
+        failures = []
+        server = None
+        try:
+            for message in messages:
+                for attempt in range(1, self.retries + 2):
+                    try:
+                        server = server or self.acquire()
+                        server.send_message(message)
+                        break
+                    except (smtplib.SMTPException, OSError) as error:
+                        if server is not None and not isinstance(
+                            error, self.response_errors
+                        ):
+                            self.discard(server)
+                            server = None
+
+                        if is_permanent(error) or attempt > self.retries:
+                            logger.warning(
+                                "Failed to send the mail to %s: %s",
+                                message["To"],
+                                error,
+                            )
+                            failures.append(
+                                FailedDelivery(message, str(error), attempt)
+                            )
+                            break
+
+                        if attempt > 1 or not isinstance(error, self.reconnect_errors):
+                            time.sleep(get_retry_delay(self.backoff, attempt))
+        except BaseException:
+            if server is not None:
+                self.discard(server)
+            raise
+
+        if server is not None:
+            self.release(server)
+
+        return failures
+
+    def acquire(self) -> smtplib.SMTP:
+        while True:
+            with self.lock:
+                if self.pid != os.getpid():
+                    self.idle, self.pid = [], os.getpid()
+                if not self.idle:
+                    break
+                released_at, server = self.idle.pop()
+
+            if time.monotonic() - released_at < self.keepalive or self.is_alive(server):
+                return server
+
+            self.discard(server)
+
+        return self.connect()
+
+    def release(self, server: smtplib.SMTP):
+        with self.lock:
+            if len(self.idle) < self.size:
+                self.idle.append((time.monotonic(), server))
+                return
+
+        self.close(server)
+
+    def discard(self, server: smtplib.SMTP):
+        try:
+            server.close()
+        except OSError:
+            pass
+
+    def close(self, server: smtplib.SMTP):
+        try:
+            server.quit()
+        except (smtplib.SMTPException, OSError):
+            server.close()
+
+    def clear(self):
+        with self.lock:
+            idle, self.idle = self.idle, []
+
+        for _, server in idle:
+            self.close(server)
+
+    def connect(self) -> smtplib.SMTP:
+        smtp_class = smtplib.SMTP_SSL if self.use_ssl else smtplib.SMTP
+        server = smtp_class(self.host, self.port, timeout=self.timeout)
+        if self.user and self.password:
+            server.login(self.user, self.password)
+
+        return server
+
+    @staticmethod
+    def is_alive(server: smtplib.SMTP) -> bool:
+        try:
+            return server.noop()[0] == 250
+        except (smtplib.SMTPException, OSError):
+            return False
+
+
+class AsyncSMTPDelivery:
+    """
+    Deliver messages over concurrent aiosmtplib connections.
+
+    Every connection takes the next message from a shared queue, so a slow
+    recipient server holds only its own connection. Temporary failures are
+    retried with exponential backoff and jitter over a new connection,
+    permanent (5xx) failures are returned with the retried out messages.
+    """
+
+    def __init__(
+        self,
+        host: str,
+        port: int,
+        user: str = "",
+        password: str = "",
+        use_ssl: bool = True,
+        concurrency: int = 4,
+        retries: int = 3,
+        backoff: float = 0.5,
+        timeout: float = 10,
+    ):
+        self.host = host
+        self.port = port
+        self.user = user
+        self.password = password
+        self.use_ssl = use_ssl
+        self.concurrency = concurrency
+        self.retries = retries
+        self.backoff = backoff
+        self.timeout = timeout
+
+    def send(self, messages: list[EmailMessage]) -> list[FailedDelivery]:
+        if not messages:
+            return []
+
+        return asyncio.run(self.send_async(messages))
+
+    async def send_async(self, messages: list[EmailMessage]) -> list[FailedDelivery]:
+        queue = asyncio.Queue()
+        for message in messages:
+            queue.put_nowait(message)
+
+        failures = []
+        await asyncio.gather(
+            *(
+                self.__deliver(queue, failures)
+                for _ in range(min(self.concurrency, len(messages)))
+            )
+        )
+
+        return failures
+
+    async def __deliver(self, queue: asyncio.Queue, failures: list[FailedDelivery]):
+        client = None
+        try:
+            while not queue.empty():
+                message = queue.get_nowait()
+
+                for attempt in range(1, self.retries + 2):
+                    try:
+                        client = client or await self.__connect()
+                        await client.send_message(message)
+                        break
+                    except (aiosmtplib.SMTPException, OSError) as error:
+                        client = await self.__close(client)
+
+                        if is_permanent(error) or attempt > self.retries:
+                            failures.append(
+                                FailedDelivery(message, str(error), attempt)
+                            )
+                            break
+
+                        await asyncio.sleep(get_retry_delay(self.backoff, attempt))
+        finally:
+            await self.__close(client)
+
+    async def __connect(self) -> aiosmtplib.SMTP:
+        client = aiosmtplib.SMTP(
+            hostname=self.host,
+            port=self.port,
+            use_tls=self.use_ssl,
+            timeout=self.timeout,
+        )
+        await client.connect()
+        if self.user and self.password:
+            await client.login(self.user, self.password)
+
+        return client
+
+    @staticmethod
+    async def __close(client: aiosmtplib.SMTP | None) -> None:
+        if client is None:
+            return
+
+        try:
+            await client.quit()
+        except (aiosmtplib.SMTPException, OSError):
+            client.close()
+
+
+class MailBuffer:
+    """
+    Redis list of mails waiting to be sent together in one SMTP session.
+
+    add returns True for the first items of a buffering window, the caller
+    schedules the flush then. The window key expires by itself, so a lost
+    flush only delays the items until the next window.
+    """
+
+    def __init__(self, name: str, window: float):
+        self.key = f"{name}:items"
+        self.window_key = f"{name}:window"
+        self.window = window
+
+    def add(self, *items: str) -> bool:
+        with get_redis().pipeline() as pipeline:
+            pipeline.rpush(self.key, *items)
+            pipeline.set(self.window_key, 1, nx=True, ex=int(self.window) + 60)
+            _, window_started = pipeline.execute()
+
+        return bool(window_started)
+
+    def pop_all(self) -> list[str]:
+        with get_redis().pipeline() as pipeline:
+            pipeline.lrange(self.key, 0, -1)
+            pipeline.delete(self.key, self.window_key)
+            items, _ = pipeline.execute()
+
+        return [item.decode() for item in items]
+
+
+smtp_pool = SMTPPool(
+    settings.EMAIL_HOST,
+    settings.EMAIL_PORT,
+    settings.EMAIL_HOST_USER,
+    settings.EMAIL_HOST_PASSWORD,
+    use_ssl=settings.EMAIL_USE_SSL,
+    size=settings.SMTP_POOL_SIZE,
+    keepalive=settings.SMTP_KEEPALIVE,
+    retries=settings.SMTP_RETRIES,
+    backoff=settings.SMTP_RETRY_BACKOFF,
+    timeout=settings.SMTP_TIMEOUT,
+)
+async_smtp_delivery = AsyncSMTPDelivery(
+    settings.EMAIL_HOST,
+    settings.EMAIL_PORT,
+    settings.EMAIL_HOST_USER,
+    settings.EMAIL_HOST_PASSWORD,
+    use_ssl=settings.EMAIL_USE_SSL,
+    concurrency=settings.SMTP_CONCURRENCY,
+    retries=settings.SMTP_RETRIES,
+    backoff=settings.SMTP_RETRY_BACKOFF,
+    timeout=settings.SMTP_TIMEOUT,
+)
+welcome_mail_buffer = MailBuffer("welcome_mail", settings.WELCOME_MAIL_BUFFER_WINDOW)
+order_mail_buffer = MailBuffer("order_digest", settings.ORDER_DIGEST_WINDOW)
@@ -0,0 +1,65 @@
+import socket
+import time
+
+from stock_market.settings import (
+    STATSD_ENABLED,
+    STATSD_HOST,
+    STATSD_PORT,
+    STATSD_PREFIX,
+)
+
+
+class StatsdClient:
+    """
+    Send counters and timings to a statsd compatible sink over UDP, best effort.
+
+    The host is resolved once when the socket is created, a failed lookup is
+    retried after a delay instead of on every metric.
+    """
+
+    resolve_retry_delay = 60
+
+    def __init__(self, host: str, port: int, prefix: str, enabled: bool = True):
+        self.address = (host, port)
+        self.prefix = prefix
+        self.enabled = enabled
+        self.socket: socket.socket | None = None
+        self.resolve_after = 0.0
+
+    def incr(self, name: str, value: int = 1):
+        if self.enabled and value:
+            self.send(f"{name}:{value}|c")
+
+    def timing(self, name: str, seconds: float):
+        if self.enabled:
+            self.send(f"{name}:{seconds * 1000:.3f}|ms")
+
+    def send(self, line: str):
+        if self.socket is None and not self.connect():
+            return
+
+        try:
+            self.socket.send(f"{self.prefix}.{line}".encode())
+        except OSError:
+            pass
+
+    def connect(self) -> bool:
+        if time.monotonic() < self.resolve_after:
+            return False
+
+        try:
+            family, _, _, _, address = socket.getaddrinfo(
+                *self.address, type=socket.SOCK_DGRAM
+            )[0]
+            sock = socket.socket(family, socket.SOCK_DGRAM)
+            sock.setblocking(False)
+            sock.connect(address)
+        except OSError:
+            self.resolve_after = time.monotonic() + self.resolve_retry_delay
+            return False
+
+        self.socket = sock
+        return True
+
+
+statsd = StatsdClient(STATSD_HOST, STATSD_PORT, STATSD_PREFIX, STATSD_ENABLED)
@@ -1,17 +1,24 @@
+import hashlib
+import time
 from datetime import datetime, timedelta, timezone
 
 import jwt
 from users.models import User
+from utils.cache import TTLCache
 
 from stock_market.settings import (
     JWT_ACCESS_TOKEN_EXPIRES_IN,
     JWT_ALGORITHM,
     JWT_REFRESH_TOKEN_EXPIRES_IN,
     JWT_SECRET_KEY,
+    TOKEN_CACHE_SIZE,
 )
 
 
 class Token:
+    # verified payloads keyed by token hash, each entry lives until the token "exp"
+    payload_cache = TTLCache(TOKEN_CACHE_SIZE, ttl=float("inf"))
+
     def __init__(self, user: User = None):
         self.user = user
 
@@ -43,11 +50,27 @@ class Token:
 
     @staticmethod
     def get_payload(token: str) -> dict:
+        key = hashlib.sha256(token.encode()).digest()
+
+        payload = Token.payload_cache.get(key)
+        if payload is not None:
+            return dict(payload)
+
         try:
-            return jwt.decode(token, JWT_SECRET_KEY, algorithms=[JWT_ALGORITHM])
+            payload = Token.decode(token)
         except (jwt.DecodeError, jwt.ExpiredSignatureError):
             return {}
 
+        if "exp" in payload:
+            Token.payload_cache.set(key, payload, ttl=payload["exp"] - time.time())
+
+        return dict(payload)
+
+    @staticmethod
+    def decode(token: str) -> dict:
+        """Verify the token without the payload cache"""
+        return jwt.decode(token, JWT_SECRET_KEY, algorithms=[JWT_ALGORITHM])
+
     @staticmethod
     def __get_expire_time(delta: timedelta) -> int:
         return int(datetime.now(tz=timezone.utc).timestamp() + delta.seconds)
@@ -0,0 +1,40 @@
+import random
+import time
+from functools import wraps
+
+from django.db import OperationalError, connection
+
+from stock_market.settings import TRANSACTION_RETRY_ATTEMPTS, TRANSACTION_RETRY_BACKOFF
+
+# PostgreSQL serialization_failure and deadlock_detected
+CONFLICT_CODES = {"40001", "40P01"}
+
+
+def is_conflict(exc: OperationalError) -> bool:
+    return getattr(exc.__cause__, "pgcode", None) in CONFLICT_CODES
+
+
+def retry_on_conflict(func):
+    """
+    Retry a transaction which failed with a deadlock or a serialization error.
+
+    Retries use exponential backoff with jitter. Inside an outer atomic block
+    the whole transaction is already broken, so the error is raised at once.
+    """
+
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        for attempt in range(1, TRANSACTION_RETRY_ATTEMPTS + 1):
+            try:
+                return func(*args, **kwargs)
+            except OperationalError as exc:
+                if (
+                    not is_conflict(exc)
+                    or connection.in_atomic_block
+                    or attempt == TRANSACTION_RETRY_ATTEMPTS
+                ):
+                    raise
+
+            time.sleep(TRANSACTION_RETRY_BACKOFF * 2 ** (attempt - 1) * random.random())
+
+    return wrapper